@@ -1,31 +1,299 @@
-import requests, matplotx
+import requests, matplotx, json, os, time, threading, shutil, glob
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
+from collections import Counter
+from urllib.parse import urlsplit, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 
-params = {
-    "content": "Albert Einstein,Sherlock Holmes,Bear Grylls,Frankenstein,Elon Musk,Richard Branson",
-    "year_start": "1800",
-    "year_end": "2019"
-}
+NGRAMS_URL = "https://books.google.com/ngrams/json"
 
 headers = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/98.0.4758.87 Safari/537.36",
 }
 
-html = requests.get("https://books.google.com/ngrams/json", params=params, headers=headers, timeout=30).text
-time_series = pd.read_json(html, typ="series")
+# the viewer accepts a limited number of comma-separated ngrams per request
+MAX_NGRAMS_PER_REQUEST = 12
+MAX_CONTENT_LENGTH = 500
+
+
+def chunk_ngrams(ngrams: list[str], max_ngrams: int = MAX_NGRAMS_PER_REQUEST, max_length: int = MAX_CONTENT_LENGTH):
+    chunk, chunk_length = [], 0
+
+    for ngram in ngrams:
+        if "," in ngram:
+            raise ValueError(f"{ngram!r}: a comma separates ngrams in the request and can't be part of one.")
+
+        if len(ngram) > max_length:
+            raise ValueError(f"{ngram[:50]!r}...: {len(ngram)} characters, a request can't be longer than {max_length}.")
+
+        if chunk and (len(chunk) == max_ngrams or chunk_length + len(ngram) + 1 > max_length):
+            yield chunk
+            chunk, chunk_length = [], 0
+
+        chunk.append(ngram)
+        chunk_length += len(ngram) + 1
+
+    if chunk:
+        yield chunk
+
+
+def normalized_ngram(ngram: str) -> str:
+    # "Albert  Einstein" -> "albert einstein", "Albert Einstein (All)" -> "albert einstein"
+    ngram = " ".join(ngram.split()).casefold()
+    return ngram[:-len(" (all)")] if ngram.endswith(" (all)") else ngram
+
+
+def match_ngrams_timeseries(chunk: list[str], series_list: list[dict]) -> tuple[dict, list[str]]:
+    """
+    Maps the returned series back to the requested ngrams. Returns ({requested ngram: timeseries}, returned ngrams that match nothing).
+
+    The viewer doesn't always answer under the requested key: whitespace is collapsed, case_insensitive queries
+    come back as "Albert Einstein (All)" and wildcards like "Albert *" as top expansions with "parent": "Albert *".
+    Keys are compared as they are first, then normalized. Expansions are summed only when there is no series for the query itself.
+    """
+
+    # two requested ngrams that only differ in case or whitespace can't be told apart after normalization
+    normalized_counts = Counter(map(normalized_ngram, chunk))
+    normalized = {normalized_ngram(ngram): ngram for ngram in chunk if normalized_counts[normalized_ngram(ngram)] == 1}
+
+    direct, expansions, unmatched = {}, {}, []
+
+    for series in series_list:
+        key = series.get("parent") or series["ngram"]
+        ngram = key if key in chunk else normalized.get(normalized_ngram(key))
+
+        if ngram is None:
+            unmatched.append(series["ngram"])
+        elif series.get("parent"):
+            expansions.setdefault(ngram, []).append(series["timeseries"])
+        else:
+            direct.setdefault(ngram, series["timeseries"])
+
+    timeseries = {ngram: np.sum(series, axis=0).tolist() for ngram, series in expansions.items()}
+    timeseries.update(direct)
+
+    return timeseries, unmatched
+
+
+def fetch_ngrams_chunk(session: requests.Session, chunk: list[str], corpus: str, year_start: int, year_end: int, smoothing: int, base_url: str = NGRAMS_URL) -> dict:
+    params = {
+        "content": ",".join(chunk),
+        "year_start": year_start,
+        "year_end": year_end,
+        "corpus": corpus,        # en-2019, en-GB-2019, de-2019, ...
+        "smoothing": smoothing   # moving average over smoothing years on each side
+    }
+
+    response = session.get(base_url, params=params, headers=headers, timeout=30)
+    response.raise_for_status()
+
+    # [{"ngram": "Albert Einstein", "parent": "", "type": "NGRAM", "timeseries": [...]}, ...]
+    timeseries, unmatched = match_ngrams_timeseries(chunk, response.json())
+
+    if unmatched:
+        # requested ngrams left without a series may be any of these, they aren't cached and are requested again next time
+        print(f"returned ngrams that don't match the request: {unmatched}")
+        return timeseries
+
+    # every returned series is accounted for: ngrams without one have no matches at all
+    # and are stored as zeros so they aren't requested again
+    years_count = year_end - year_start + 1
+    return {ngram: timeseries.get(ngram, [0.0] * years_count) for ngram in chunk}
+
+
+class NgramsCache:
+    """
+    One folder of Parquet part files per corpus, year range and smoothing: an "ngram" column plus one float column per year.
+    Only ngrams that aren't cached yet are requested, new rows go to a new part file instead of rewriting the old ones.
+    """
+
+    def __init__(self, cache_dir: str, corpus: str, year_start: int, year_end: int, smoothing: int):
+        self.folder = os.path.join(cache_dir, f"{corpus}_{year_start}-{year_end}_smoothing-{smoothing}")
+        os.makedirs(self.folder, exist_ok=True)
+        self.years = np.arange(year_start, year_end + 1)
+
+        # part names start with the time they were written at, so later parts win for the same ngram
+        parts = [pd.read_parquet(path) for path in sorted(glob.glob(os.path.join(self.folder, "part-*.parquet")))]
+
+        if parts:
+            frame = pd.concat(parts).set_index("ngram")
+            self.frame = frame[~frame.index.duplicated(keep="last")]
+        else:
+            self.frame = pd.DataFrame(columns=[str(year) for year in self.years], dtype="float64", index=pd.Index([], name="ngram"))
+
+    def missing(self, ngrams: list[str]) -> list[str]:
+        return list(dict.fromkeys(ngram for ngram in ngrams if ngram not in self.frame.index))
+
+    def write_part(self, frame: pd.DataFrame):
+        name = f"part-{time.time_ns()}-{os.getpid()}-{threading.get_ident()}.parquet"
+
+        # written under a hidden name first, so a reader never sees half of a part
+        temporary_path = os.path.join(self.folder, f".{name}.tmp")
+        frame.reset_index().to_parquet(temporary_path, index=False)
+        os.replace(temporary_path, os.path.join(self.folder, name))
+
+    def add(self, timeseries: dict):
+        if timeseries:
+            new_rows = pd.DataFrame.from_dict(timeseries, orient="index", columns=self.frame.columns, dtype="float64")
+            new_rows.index.name = "ngram"
+
+            self.write_part(new_rows)
+            self.frame = pd.concat([self.frame, new_rows]) if len(self.frame) else new_rows
+
+    def compact(self):
+        # many small parts make loading slower: merges them into one
+        old_parts = glob.glob(os.path.join(self.folder, "part-*.parquet"))
+        self.write_part(self.frame)
+
+        for path in old_parts:
+            os.remove(path)
+
+    def matrix(self, ngrams: list[str]) -> np.ndarray:
+        # rows in the order of `ngrams`, one column per year, NaN for ngrams that aren't cached
+        return self.frame.reindex(ngrams).to_numpy(dtype="float64")
+
+
+def fetch_ngrams(ngrams: list[str], corpus: str = "en-2019", year_start: int = 1800, year_end: int = 2019, smoothing: int = 3,
+                 max_workers: int = 8, cache_dir: str = ".ngrams_cache", base_url: str = NGRAMS_URL):
+    """
+    Returns (ngrams, years, matrix) where matrix[i] is the timeseries of ngrams[i].
+    Uncached ngrams are split into request-sized chunks and fetched concurrently.
+    Rows of ngrams the viewer answered under a key that couldn't be matched are NaN and are requested again next time.
+    """
+
+    ngrams = list(dict.fromkeys(ngrams))
+    cache = NgramsCache(cache_dir, corpus, year_start, year_end, smoothing)
+    chunks = list(chunk_ngrams(cache.missing(ngrams)))
+
+    if chunks:
+        session = requests.Session()
+        session.mount("https://", HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers))
+        session.mount("http://", HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers))
+
+        timeseries = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for chunk_timeseries in executor.map(lambda chunk: fetch_ngrams_chunk(session, chunk, corpus, year_start, year_end, smoothing, base_url), chunks):
+                timeseries.update(chunk_timeseries)
+
+        cache.add(timeseries)
+
+    return ngrams, cache.years, cache.matrix(ngrams)
+
+
+# comparisons below work on the whole matrix at once instead of looping over series
+
+def normalize(matrix: np.ndarray, how: str = "max") -> np.ndarray:
+    if how == "max":
+        # every ngram scaled to its own peak: 1.0 = most popular year of that ngram
+        scale = matrix.max(axis=1, keepdims=True)
+        return np.divide(matrix, scale, out=np.zeros_like(matrix), where=scale > 0)
+
+    if how == "zscore":
+        std = matrix.std(axis=1, keepdims=True)
+        return np.divide(matrix - matrix.mean(axis=1, keepdims=True), std, out=np.zeros_like(matrix), where=std > 0)
+
+    raise ValueError(f"Unsupported normalization: {how}. Use max or zscore.")
+
+
+def rank_ngrams(ngrams: list[str], years: np.ndarray, matrix: np.ndarray, year_from: int = None, year_to: int = None, top: int = 20) -> list[tuple[str, float]]:
+    # by mean frequency in [year_from, year_to]
+    in_range = (years >= (year_from or years[0])) & (years <= (year_to or years[-1]))
+    means = matrix[:, in_range].mean(axis=1)
+    order = np.argsort(-means)[:top]
+    return [(ngrams[index], float(means[index])) for index in order]
+
+
+def yearly_ranks(matrix: np.ndarray) -> np.ndarray:
+    # rank of every ngram in every year, 1 = most frequent that year
+    return np.argsort(np.argsort(-matrix, axis=0), axis=0) + 1
+
+
+def peaks(ngrams: list[str], years: np.ndarray, matrix: np.ndarray) -> pd.DataFrame:
+    peak_index = matrix.argmax(axis=1)
+    return pd.DataFrame({
+        "ngram": ngrams,
+        "peak_year": years[peak_index],
+        "peak_value": matrix[np.arange(len(ngrams)), peak_index]
+    })
+
+
+def benchmark_ngrams_client_locally(ngrams_count: int = 2000, latency: float = 0.05, max_workers: int = 8):
+    # local stand-in for books.google.com/ngrams/json, answers after `latency` seconds
+    class NgramsStubHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            query = parse_qs(urlsplit(self.path).query)
+            year_start, year_end = int(query["year_start"][0]), int(query["year_end"][0])
+            time.sleep(latency)
+
+            body = json.dumps([{
+                "ngram": ngram,
+                "parent": "",
+                "type": "NGRAM",
+                "timeseries": [((hash(ngram) + year) % 1000) * 1e-9 for year in range(year_start, year_end + 1)]
+            } for ngram in query["content"][0].split(",")]).encode()
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), NgramsStubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}/ngrams/json"
+
+    ngrams = [f"term {index}" for index in range(ngrams_count)]
+    cache_dir = ".ngrams_benchmark_cache"
+
+    for name, workers in [("serial", 1), (f"{max_workers} workers", max_workers)]:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+        start = time.perf_counter()
+        ngrams_result, years, matrix = fetch_ngrams(ngrams, max_workers=workers, cache_dir=cache_dir, base_url=base_url)
+        print(f"{name}: {time.perf_counter() - start:.2f}s for {len(ngrams)} ngrams, matrix {matrix.shape}")
+
+    start = time.perf_counter()
+    fetch_ngrams(ngrams, cache_dir=cache_dir, base_url=base_url)
+    print(f"from cache: {time.perf_counter() - start:.2f}s")
+
+    server.shutdown()
+    shutil.rmtree(cache_dir)
+
+    start = time.perf_counter()
+    normalized = normalize(matrix)
+    top = rank_ngrams(ngrams_result, years, matrix, year_from=1900, year_to=2000, top=5)
+    ranks = yearly_ranks(matrix)
+    peak_years = peaks(ngrams_result, years, matrix)
+    print(f"normalize + rank + yearly ranks + peaks: {(time.perf_counter() - start) * 1000:.1f} ms")
+    print(top, peak_years.head(3), normalized.max(), ranks[:, 0].min(), sep="\n")
+
+
+def plot_ngrams(ngrams: list[str], years: np.ndarray, matrix: np.ndarray):
+    # one plot call for the whole matrix, every column of matrix.T is a line
+    lines = plt.plot(years, matrix.T)
+    for line, ngram in zip(lines, ngrams):
+        line.set_label(ngram)
+
+    plt.title("Google Books Ngram Viewer", pad=10)
+    matplotx.line_labels()  # https://stackoverflow.com/a/70200546/15164646
 
-year_values = list(range(int(params['year_start']), int(params['year_end']) + 1))
+    plt.xticks(list(range(years[0], years[-1] + 1, 20)))
+    plt.grid(axis="y", alpha=0.3)
 
-for series in time_series:
-    plt.plot(year_values, series["timeseries"], label=series["ngram"])
+    plt.ylabel("%", labelpad=5)
+    plt.xlabel(f"Year: {years[0]}-{years[-1]}", labelpad=5)
+    plt.show()
 
-plt.title("Google Books Ngram Viewer", pad=10)
-matplotx.line_labels()  # https://stackoverflow.com/a/70200546/15164646
 
-plt.xticks(list(range(int(params['year_start']), int(params['year_end']) + 1, 20)))
-plt.grid(axis="y", alpha=0.3)
+ngrams, years, matrix = fetch_ngrams(["Albert Einstein", "Sherlock Holmes", "Bear Grylls", "Frankenstein", "Elon Musk", "Richard Branson"], year_start=1800, year_end=2019)
+plot_ngrams(ngrams, years, matrix)
 
-plt.ylabel("%", labelpad=5)
-plt.xlabel(f"Year: {params['year_start']}-{params['year_end']}", labelpad=5)
-plt.show()
+# print(peaks(ngrams, years, matrix))
+# print(rank_ngrams(ngrams, years, matrix, year_from=1950, year_to=2019))
+# benchmark_ngrams_client_locally()
@@ -1,5 +1,68 @@
 from parsel import Selector
-import requests, json, re
+import requests, json, os, sys
+
+# scraper_kit/ with helpers shared between scrapers is at the repository root
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from scraper_kit.schema import compile_css, compile_schema, extract_fields, benchmark_schema_extraction
+from scraper_kit.thumbnails import ThumbnailIndex, ThumbnailStore, fake_escaped_thumbnail
+
+
+BOOK_RESULT = compile_css(".Yr5TG")
+SCRIPT_TEXT = compile_css("script::text")
+BOOK_THUMBNAIL_PREFIX = "data:image/jpg;base64,"
+
+BOOK_FIELDS = {
+    "title": ".DKV0Md::text",
+    "link": ".bHexk a::attr(href)",
+    "displayed_link": ".tjvcx::text",
+    "snippet": ".cmlJmd span::text",
+    "author": ".fl span::text",
+    "author_link": ".N96wpd .fl::attr(href)",
+    "date_published": ".fl+ span::text",
+    "preview_link": ".R1n8Q a.yKioRe:nth-child(1)::attr(href)",
+    "more_editions_link": ".R1n8Q a.yKioRe:nth-child(2)::attr(href)"
+}
+BOOK_SCHEMA = compile_schema(BOOK_FIELDS)
+
+
+def parse_books_results(selector, thumbnail_store: ThumbnailStore = None) -> list[dict]:
+    books_results = []
+
+    thumbnail_index = ThumbnailIndex(SCRIPT_TEXT(selector.root), thumbnail_store=thumbnail_store)
+
+    # book results don't reference thumbnail ids, thumbnails follow the results order
+    book_thumbnails = (
+        thumbnail_index.decode(escaped) for escaped in thumbnail_index.escaped if escaped.startswith(BOOK_THUMBNAIL_PREFIX)
+    )
+
+    for book_thumbnail, book_result in zip(book_thumbnails, BOOK_RESULT(selector.root)):
+        book = extract_fields(BOOK_SCHEMA, book_result)
+        book["author_link"] = f'https://www.google.com/search{book["author_link"]}'
+        book["more_editions_link"] = f"https://www.google.com{book['more_editions_link']}" if book["more_editions_link"] is not None else None
+        # a file path with the store, the base64 part of the data URI without it
+        book["thumbnail"] = book_thumbnail if thumbnail_store else book_thumbnail[len(BOOK_THUMBNAIL_PREFIX):]
+
+        books_results.append(book)
+
+    return books_results
+
+
+def fake_books_page(results_count: int = 100) -> str:
+    # books SERP markup with a base64 thumbnail in an inline script for every result
+    results = "".join(f"""
+        <div class="Yr5TG">
+            <div class="bHexk"><a href="https://books.google.com/books?id={index}"><h3 class="DKV0Md">Book title {index}</h3></a></div>
+            <cite class="tjvcx">books.google.com</cite>
+            <div class="cmlJmd"><span>Snippet of the book number {index}.</span></div>
+            <div class="N96wpd"><a class="fl" href="?tbm=bks&q=inauthor:author{index}"><span>Author {index}</span></a><span>20{index % 23:02}</span></div>
+            <div class="R1n8Q"><a class="yKioRe" href="https://books.google.com/books?id={index}&printsec=frontcover">Preview</a><a class="yKioRe" href="/search?tbm=bks&q=editions:{index}">More editions</a></div>
+        </div>""" for index in range(results_count))
+    scripts = "".join(
+        f"<script nonce=\"0\">(function(){{var s='data:image/jpg;base64,{fake_escaped_thumbnail(index)}';var ii=['dimg_{index}'];_setImagesSrc(ii,s);}})();</script>"
+        for index in range(results_count)
+    )
+    return f"<html><body>{results}{scripts}</body></html>"
+
 
 params = {
     "q": "richard branson",
@@ -15,31 +78,7 @@ headers = {
 html = requests.get("https://www.google.com/search", params=params, headers=headers, timeout=30)
 selector = Selector(text=html.text)
 
-books_results = []
-
-# https://regex101.com/r/mapBs4/1
-book_thumbnails = re.findall(r"s=\\'data:image/jpg;base64,(.*?)\\'", str(selector.css("script").getall()), re.DOTALL)
-
-for book_thumbnail, book_result in zip(book_thumbnails, selector.css(".Yr5TG")):
-    title = book_result.css(".DKV0Md::text").get()
-    link = book_result.css(".bHexk a::attr(href)").get()
-    displayed_link = book_result.css(".tjvcx::text").get()
-    snippet = book_result.css(".cmlJmd span::text").get()
-    author = book_result.css(".fl span::text").get()
-    author_link = f'https://www.google.com/search{book_result.css(".N96wpd .fl::attr(href)").get()}'
-    date_published = book_result.css(".fl+ span::text").get()
-    preview_link = book_result.css(".R1n8Q a.yKioRe:nth-child(1)::attr(href)").get()
-    more_editions_link = book_result.css(".R1n8Q a.yKioRe:nth-child(2)::attr(href)").get()
-
-    books_results.append({
-        "title": title,
-        "link": link,
-        "displayed_link": displayed_link,
-        "snippet": snippet,
-        "author": author,
-        "author_link": author_link,
-        "date_published": date_published,
-        "preview_link": preview_link,
-        "more_editions_link": f"https://www.google.com{more_editions_link}" if more_editions_link is not None else None,
-        "thumbnail": bytes(bytes(book_thumbnail, "ascii").decode("unicode-escape"), "ascii").decode("unicode-escape")
-    })
+# ThumbnailStore("books_thumbnails") writes base64 thumbnails to files and keeps only their paths in the results
+books_results = parse_books_results(selector, thumbnail_store=None)
+
+# benchmark_schema_extraction(fake_books_page(100), ".Yr5TG", BOOK_FIELDS)
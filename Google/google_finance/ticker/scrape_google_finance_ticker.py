@@ -1,7 +1,14 @@
 from itertools import zip_longest   # https://docs.python.org/3/library/itertools.html#itertools.zip_longest
 import nasdaqdatalink               # https://docs.data.nasdaq.com/docs/python-installation
-import requests, json, re
+import requests, json, re, time, os, sys
 from parsel import Selector
+from lxml import etree
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# scraper_kit/ with helpers shared between scrapers is at the repository root
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+from scraper_kit.schema import compile_css
 
 
 def nasdaq_get_timeseries_data():
@@ -13,7 +20,53 @@ def nasdaq_get_timeseries_data():
 
 # nasdaq_get_timeseries_data()
 
-def scrape_google_finance(ticker: str):
+SELECTORS = {
+    # current price, quote, title
+    "quote": compile_css(".PdOqHc::text"),
+    "title": compile_css(".zzDege::text"),
+    "current_price": compile_css(".AHmHk .fxKbKc::text"),
+    "after_hours_price": compile_css(".DnMTof .fxKbKc::text"),
+    "after_hours_price_change": compile_css(".dHlEwc+ .tO2BSb .DnMTof::text"),
+    "after_hours_price_percent_change": compile_css(".JwB6zf.DnMTof::text"),
+    "price_change": compile_css(".NydbP.nZQ6l.tnNmPe::attr(aria-label)"),
+    "closed_at": compile_css("[jsname=Vebqub]::text"),
+    "price_change_aria_label": compile_css("[jsname=Fe7oBc]::attr(aria-label)"),
+    # about panel
+    "about_panel_keys": compile_css(".gyFHrc .mfs7Fc::text"),
+    "about_panel_values": compile_css(".gyFHrc .P6K39c"),
+    "normalize_space": etree.XPath("normalize-space()", smart_strings=False),
+    "description": compile_css(".bLLb2d::text"),
+    "extensions": compile_css(".w2tnNd::text"),
+    # news
+    "news": compile_css(".yY3Lee"),
+    "news_title": compile_css(".Yfwt5::text"),
+    "news_link": compile_css(".z4rs2b a::attr(href)"),
+    "news_source": compile_css(".sfyJob::text"),
+    "news_published": compile_css(".Adak::text"),
+    "news_thumbnail": compile_css("img.Z4idke::attr(src)"),
+    # finance perfomance table
+    "fin_perf_rows": compile_css(".slpEwd .roXhBd"),
+    "fin_perf_col_2": compile_css(".PFjsMe+ .yNnsfe::text"),
+    "fin_perf_col_3": compile_css(".PFjsMe~ .yNnsfe+ .yNnsfe::text"),
+    "fin_perf_key": compile_css(".J9Jhg::text , .jU4VAc::text"),
+    "fin_perf_value_col_1": compile_css(".QXDnM::text"),
+    "fin_perf_value_col_2": compile_css(".gEUVJe .JwB6zf::text"),
+    # "you may be interested in" and "people also search for"
+    "interested_in": compile_css(".HDXgAf .tOzDHb"),
+    "people_also_search_for": compile_css(".HDXgAf+ div .tOzDHb"),
+    "other_ticker": compile_css(".COaKTb::text"),
+    "other_title": compile_css(".RwFyvf::text"),
+    "other_price": compile_css(".YMlKec::text"),
+}
+
+
+def first(node, name: str):
+    # same as parsel .get(): first match or None
+    result = SELECTORS[name](node)
+    return result[0] if result else None
+
+
+def scrape_google_finance(ticker: str, session: requests.Session = None):
     # https://docs.python-requests.org/en/master/user/quickstart/#passing-parameters-in-urls
     params = {
         "hl": "en" # language
@@ -25,72 +78,81 @@ def scrape_google_finance(ticker: str):
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/100.0.4896.60 Safari/537.36",
         }
 
-    html = requests.get(f"https://www.google.com/finance/quote/{ticker}", params=params, headers=headers, timeout=30)
-    selector = Selector(text=html.text)
-    
+    html = (session or requests).get(f"https://www.google.com/finance/quote/{ticker}", params=params, headers=headers, timeout=30)
+
+    return parse_google_finance(ticker, html.text)
+
+
+def parse_google_finance(ticker: str, html_text: str):
+    root = Selector(text=html_text).root
+
     # was trying to scrape % change of the price: up by 21%/down by 2%
     # print(selector.css("[jsname=Fe7oBc]").get())
-    
+
     # where all extracted data will be temporary located
     ticker_data = {
         "ticker_data": {},
         "about_panel": {},
         "news": {"items": []},
-        "finance_perfomance": {"table": []}, 
+        "finance_perfomance": {"table": []},
         "people_also_search_for": {"items": []},
         "interested_in": {"items": []}
     }
-    
+
     # current price, quote, title extraction
-    ticker_data["ticker_data"]["quote"] = selector.css(".PdOqHc::text").get().replace(" • ",":")
-    ticker_data["ticker_data"]["title"] = selector.css(".zzDege::text").get()
-    ticker_data["ticker_data"]["current_price"] = selector.css(".AHmHk .fxKbKc::text").get()
-    ticker_data["ticker_data"]["after_hours_price"] = selector.css(".DnMTof .fxKbKc::text").get()
-    ticker_data["ticker_data"]["after_hours_price_change"] = selector.css(".dHlEwc+ .tO2BSb .DnMTof::text").get()
-    ticker_data["ticker_data"]["after_hours_price_percent_change"] = selector.css(".JwB6zf.DnMTof::text").get()
-    ticker_data["ticker_data"]["price_change"] = selector.css(".NydbP.nZQ6l.tnNmPe::attr(aria-label)").get()
-    ticker_data["ticker_data"]["closed_at"] = selector.css("[jsname=Vebqub]::text").get()
+    ticker_data["ticker_data"]["quote"] = first(root, "quote").replace(" • ",":")
+    ticker_data["ticker_data"]["title"] = first(root, "title")
+    ticker_data["ticker_data"]["current_price"] = first(root, "current_price")
+    ticker_data["ticker_data"]["after_hours_price"] = first(root, "after_hours_price")
+    ticker_data["ticker_data"]["after_hours_price_change"] = first(root, "after_hours_price_change")
+    ticker_data["ticker_data"]["after_hours_price_percent_change"] = first(root, "after_hours_price_percent_change")
+    ticker_data["ticker_data"]["price_change"] = first(root, "price_change")
+    ticker_data["ticker_data"]["closed_at"] = first(root, "closed_at")
     # 0.65% or 0.0021% or 1201.12123%
     # https://regex101.com/r/8R84Vw/1
-    ticker_data["ticker_data"]["price_change_formatted"] = re.search(r"\d{0,100}\.\d{0,100}%", selector.css("[jsname=Fe7oBc]::attr(aria-label)").get()).group()
-    
+    ticker_data["ticker_data"]["price_change_formatted"] = re.search(r"\d{0,100}\.\d{0,100}%", first(root, "price_change_aria_label")).group()
+
     # about panel extraction
-    about_panel_keys = selector.css(".gyFHrc .mfs7Fc::text").getall()
-    about_panel_values = selector.css(".gyFHrc .P6K39c").xpath("normalize-space()").getall()
-    
+    about_panel_keys = SELECTORS["about_panel_keys"](root)
+    about_panel_values = [SELECTORS["normalize_space"](value) for value in SELECTORS["about_panel_values"](root)]
+
     for key, value in zip_longest(about_panel_keys, about_panel_values):
         key_value = key.lower().replace(" ", "_")
         ticker_data["about_panel"][key_value] = value
-    
+
     # description "about" extraction
-    ticker_data["about_panel"]["description"] = selector.css(".bLLb2d::text").get()
-    ticker_data["about_panel"]["extensions"] = selector.css(".w2tnNd::text").getall()
-    
+    ticker_data["about_panel"]["description"] = first(root, "description")
+    ticker_data["about_panel"]["extensions"] = SELECTORS["extensions"](root)
+
     # news extarction
-    if selector.css(".yY3Lee").get():
-        for index, news in enumerate(selector.css(".yY3Lee"), start=1):
+    news_results = SELECTORS["news"](root)
+    if news_results:
+        for index, news in enumerate(news_results, start=1):
             ticker_data["news"]["items"].append({
                 "position": index,
-                "title": news.css(".Yfwt5::text").get(),
-                "link": news.css(".z4rs2b a::attr(href)").get(),
-                "source": news.css(".sfyJob::text").get(),
-                "published": news.css(".Adak::text").get(),
-                "thumbnail": news.css("img.Z4idke::attr(src)").get()
+                "title": first(news, "news_title"),
+                "link": first(news, "news_link"),
+                "source": first(news, "news_source"),
+                "published": first(news, "news_published"),
+                "thumbnail": first(news, "news_thumbnail")
             })
-    else: 
+    else:
         ticker_data["news"]["error"] = f"No news result from a {ticker}."
 
     # finance perfomance table
-    if selector.css(".slpEwd .roXhBd").get():
-        fin_perf_col_2 = selector.css(".PFjsMe+ .yNnsfe::text").get()           # e.g. Dec 2021
-        fin_perf_col_3 = selector.css(".PFjsMe~ .yNnsfe+ .yNnsfe::text").get()  # e.g. Year/year change
-        
-        for fin_perf in selector.css(".slpEwd .roXhBd"):
-            if fin_perf.css(".J9Jhg::text , .jU4VAc::text").get():
-                
+    fin_perf_rows = SELECTORS["fin_perf_rows"](root)
+    if fin_perf_rows:
+        fin_perf_col_2 = first(root, "fin_perf_col_2")  # e.g. Dec 2021
+        fin_perf_col_3 = first(root, "fin_perf_col_3")  # e.g. Year/year change
+
+        for fin_perf in fin_perf_rows:
+            perf_key = first(fin_perf, "fin_perf_key")  # e.g. Revenue, Net Income, Operating Income..
+
+            if perf_key:
+
                 """
-                if fin_perf.css().get() statement is needed, otherwise first value in a dict would be None:
-                
+                if perf_key statement is needed, otherwise first value in a dict would be None:
+
                 "finance_perfomance": {
                 "table": [
                     {
@@ -99,12 +161,11 @@ def scrape_google_finance(ticker: str):
                         "Year/year change": null
                     }
                 }
-                """             
-                
-                perf_key = fin_perf.css(".J9Jhg::text , .jU4VAc::text").get()   # e.g. Revenue, Net Income, Operating Income..
-                perf_value_col_1 = fin_perf.css(".QXDnM::text").get()           # 60.3B, 26.40%..   
-                perf_value_col_2 = fin_perf.css(".gEUVJe .JwB6zf::text").get()  # 2.39%, -21.22%..
-                
+                """
+
+                perf_value_col_1 = first(fin_perf, "fin_perf_value_col_1")  # 60.3B, 26.40%..
+                perf_value_col_2 = first(fin_perf, "fin_perf_value_col_2")  # 2.39%, -21.22%..
+
                 ticker_data["finance_perfomance"]["table"].append({
                     perf_key: {
                         fin_perf_col_2: perf_value_col_1, # dynamically add key and value from the second (2) column
@@ -113,45 +174,89 @@ def scrape_google_finance(ticker: str):
                 })
     else:
         ticker_data["finance_perfomance"]["error"] = f"No 'finence perfomance table' for {ticker}."
-    
+
     # "you may be interested in" results
-    if selector.css(".HDXgAf .tOzDHb").get():
-        for index, other_interests in enumerate(selector.css(".HDXgAf .tOzDHb"), start=1):
+    interested_in = SELECTORS["interested_in"](root)
+    if interested_in:
+        for index, other_interests in enumerate(interested_in, start=1):
             ticker_data["interested_in"]["items"].append(discover_more_tickers(index, other_interests))
     else:
         ticker_data["interested_in"]["error"] = f"No 'you may be interested in` results for {ticker}"
-    
-    
+
+
     # "people also search for" results
-    if selector.css(".HDXgAf+ div .tOzDHb").get():
-        for index, other_tickers in enumerate(selector.css(".HDXgAf+ div .tOzDHb"), start=1):
+    people_also_search_for = SELECTORS["people_also_search_for"](root)
+    if people_also_search_for:
+        for index, other_tickers in enumerate(people_also_search_for, start=1):
             ticker_data["people_also_search_for"]["items"].append(discover_more_tickers(index, other_tickers))
     else:
         ticker_data["people_also_search_for"]["error"] = f"No 'people_also_search_for` in results for {ticker}"
-        
 
-    # return ticker_data
+    return ticker_data
 
 
-def discover_more_tickers(index: int, other_data: str):
+def discover_more_tickers(index: int, other_data: etree.ElementBase):
     """
     if price_change_formatted will start complaining,
     check beforehand for None values with try/except and set it to 0, in this function.
-    
+
     however, re.search(r"\d{1}%|\d{1,10}\.\d{1,2}%" should make the job done.
     """
+    price_change = first(other_data, "price_change_aria_label")  # evaluated once, used twice
+
     return {
             "position": index,
-            "ticker": other_data.css(".COaKTb::text").get(),
-            "ticker_link": f'https://www.google.com/finance{other_data.attrib["href"].replace("./", "/")}',
-            "title": other_data.css(".RwFyvf::text").get(),
-            "price": other_data.css(".YMlKec::text").get(),
-            "price_change": other_data.css("[jsname=Fe7oBc]::attr(aria-label)").get(),
+            "ticker": first(other_data, "other_ticker"),
+            "ticker_link": f'https://www.google.com/finance{other_data.get("href").replace("./", "/")}',
+            "title": first(other_data, "other_title"),
+            "price": first(other_data, "other_price"),
+            "price_change": price_change,
             # https://regex101.com/r/BOFBlt/1
             # Up by 100.99% -> 100.99%
-            "price_change_formatted": re.search(r"\d{1}%|\d{1,10}\.\d{1,2}%", other_data.css("[jsname=Fe7oBc]::attr(aria-label)").get()).group()
+            "price_change_formatted": re.search(r"\d{1}%|\d{1,10}\.\d{1,2}%", price_change).group()
         }
-    
+
+
+def scrape_google_finance_tickers(tickers: list[str], max_workers: int = 16):
+    """
+    Yields (ticker, ticker_data, stats) as soon as each ticker page is scraped, not in the order of `tickers`.
+    All requests share one pooled keep-alive session.
+    """
+
+    # https://requests.readthedocs.io/en/latest/user/advanced/#transport-adapters
+    session = requests.Session()
+    session.headers.update({
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/100.0.4896.60 Safari/537.36",
+        })
+    session.mount("https://", HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers))
+
+    def scrape(ticker: str):
+        start = time.perf_counter()
+        html = session.get(f"https://www.google.com/finance/quote/{ticker}", params={"hl": "en"}, timeout=30)
+        fetched = time.perf_counter()
+
+        ticker_data = parse_google_finance(ticker, html.text)
+        parsed = time.perf_counter()
+
+        return ticker_data, {
+            "fetch_seconds": round(fetched - start, 4),
+            "parse_seconds": round(parsed - fetched, 4),
+            "bytes": len(html.content),
+        }
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(scrape, ticker): ticker for ticker in tickers}
+
+        # https://docs.python.org/3/library/concurrent.futures.html#concurrent.futures.as_completed
+        for future in as_completed(futures):
+            ticker = futures[future]
+            try:
+                ticker_data, stats = future.result()
+            except Exception as error:  # one bad ticker page shouldn't stop the whole batch
+                yield ticker, {"error": str(error)}, {}
+            else:
+                yield ticker, ticker_data, stats
+
 
 data = scrape_google_finance(ticker="GOOGL:NASDAQ")
 print(data)
@@ -163,6 +268,12 @@ print(data)
 #     print(json.dumps(data["ticker_data"], indent=2, ensure_ascii=False))
     
     
+# batch of tickers, results and per ticker throughput are printed as they arrive
+# for ticker, data, stats in scrape_google_finance_tickers(["DAX:INDEXDB", "GOOGL:NASDAQ", "MSFT:NASDAQ"]):
+#     print(ticker, stats)
+#     print(json.dumps(data, indent=2, ensure_ascii=False))
+
+
 # scrape_google_finance(ticker="DAX:INDEXDB")
 # scrape_google_finance(ticker="GOOGL:NASDAQ")
 # data_1 = scrape_google_finance(ticker="GOOGL:NASDAQ")
@@ -1,6 +1,10 @@
-import os, requests, lxml, re, json, urllib.request
+import os, requests, lxml, re, json, time, tracemalloc, hashlib, threading, shutil
 from bs4 import BeautifulSoup
 from serpapi import GoogleSearch
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 
 headers = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/103.0.5060.114 Safari/537.36"
@@ -14,9 +18,209 @@ params = {
     "ijn": "0"                    # page number
 }
 
+# https://regex101.com/r/48UZhY/4
+AF_INIT_DATA_CALLBACK = re.compile(r"AF_initDataCallback\(([^<]+)\);")
+AF_INIT_DATA_KEY = re.compile(r"{key: '(.*?)'")
+
+# https://regex101.com/r/pdZOnW/3
+GRID_STATE = re.compile(r'\[\"GRID_STATE0\",null,\[\[1,\[0,\".*?\",(.*),\"All\",')
+# https://regex101.com/r/NnRg27/1
+GRID_THUMBNAIL = re.compile(r'\[\"(https\:\/\/encrypted-tbn0\.gstatic\.com\/images\?.*?)\",\d+,\d+\]')
+# https://regex101.com/r/fXjfb1/4
+# ^ instead of ': the grid state isn't inside str() of a list anymore, so the first original has no quote before it
+GRID_ORIGINAL = re.compile(r"(?:^|,),\[\"(https:|http.*?)\",\d+,\d+\]")
+
+
+def extract_af_init_data(soup: BeautifulSoup) -> dict[str, str]:
+    """
+    Scans <script> tags once and returns every AF_initDataCallback payload by its key: {"ds:1": "{key: 'ds:1', ...}"}.
+
+    Each script is matched on its own text instead of str() of all script tags,
+    so multi-megabyte pages are never copied into one big string.
+    """
+
+    af_init_data = {}
+
+    for script in soup.find_all("script"):
+        script_text = script.string
+
+        # most script tags are not data callbacks, skip them before running a regex
+        if not script_text or "AF_initDataCallback" not in script_text:
+            continue
+
+        for payload in AF_INIT_DATA_CALLBACK.findall(script_text):
+            key = AF_INIT_DATA_KEY.match(payload)
+            key = key.group(1) if key else "unknown"
+
+            # payloads with the same key are joined the same way "".join(re.findall(...)) did before
+            af_init_data[key] = af_init_data.get(key, "") + payload
+
+    return af_init_data
+
+
+def decode_url(url: str) -> str:
+    # URLs are ASCII, only the ones with escapes like \u003d need decoding
+    # https://stackoverflow.com/a/4004439/15164646 comment by Frédéric Hamidi
+    return bytes(url, "ascii").decode("unicode-escape") if "\\" in url else url
+
+
+def parse_grid_images(af_init_data: dict[str, str]) -> tuple[list[str], list[str]]:
+    thumbnails, originals = [], []
+
+    for payload in af_init_data.values():
+        for grid_state in GRID_STATE.findall(payload):
+            thumbnails.extend(decode_url(thumbnail) for thumbnail in GRID_THUMBNAIL.findall(grid_state))
+
+            # removing previously matched thumbnails for easier full resolution image matches.
+            # https://stackoverflow.com/a/19821774/15164646
+            originals.extend(decode_url(original) for original in GRID_ORIGINAL.findall(GRID_THUMBNAIL.sub("", grid_state)))
+
+    return thumbnails, originals
+
+
+def url_digest(url: str) -> bytes:
+    # 16 bytes per URL instead of the whole string, keeps millions of seen URLs small in memory and on disk
+    return hashlib.blake2b(url.encode(), digest_size=16).digest()
+
+
+def download_image(session: requests.Session, url: str, path: str, chunk_size: int = 64 * 1024) -> tuple[int, str]:
+    """
+    Streams one image to disk in chunks and returns (downloaded bytes, sha256 of the file).
+    Unfinished downloads are kept as "<path>.part" next to "<path>.part.url" with the URL they came from,
+    and resumed with a Range request on the next run only if that URL is the same.
+    """
+
+    part_path = f"{path}.part"
+    source_path = f"{part_path}.url"
+    sha256 = hashlib.sha256()
+    downloaded_bytes = 0
+
+    request_headers = {}
+    if os.path.exists(part_path):
+        same_url = False
+        if os.path.exists(source_path):
+            with open(source_path, encoding="utf-8") as source_file:
+                same_url = source_file.read() == url
+
+        if same_url:
+            with open(part_path, "rb") as part_file:
+                for chunk in iter(lambda: part_file.read(chunk_size), b""):
+                    sha256.update(chunk)
+            request_headers["Range"] = f"bytes={os.path.getsize(part_path)}-"
+        else:
+            # left over by another URL, resuming it would splice two images into one file
+            os.remove(part_path)
+
+    with session.get(url, headers=request_headers, stream=True, timeout=30) as response:
+        if response.status_code == 416 and request_headers:
+            # nothing left after the .part file: it is complete unless the server reports another size
+            total_size = re.search(r"/(\d+)$", response.headers.get("Content-Range", ""))
+            if total_size and int(total_size.group(1)) != os.path.getsize(part_path):
+                os.remove(part_path)
+                return download_image(session, url, path, chunk_size)
+
+            os.replace(part_path, path)
+            os.remove(source_path)
+            return downloaded_bytes, sha256.hexdigest()
+
+        response.raise_for_status()
+
+        # 206 -> server continues where the .part file stopped, 200 -> Range is not supported, start over
+        if response.status_code != 206:
+            sha256 = hashlib.sha256()
+
+        with open(source_path, "w", encoding="utf-8") as source_file:
+            source_file.write(url)
+
+        with open(part_path, "ab" if response.status_code == 206 else "wb") as image_file:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                image_file.write(chunk)
+                sha256.update(chunk)
+                downloaded_bytes += len(chunk)
+
+    os.replace(part_path, path)
+    os.remove(source_path)
+
+    return downloaded_bytes, sha256.hexdigest()
+
+
+def make_download_session(max_workers: int = 8) -> requests.Session:
+    # https://requests.readthedocs.io/en/latest/user/advanced/#transport-adapters
+    session = requests.Session()
+    session.headers.update(headers)
+    session.mount("http://", HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers))
+    session.mount("https://", HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers))
+    return session
+
+
+def download_images(urls: list[str], folder: str, max_workers: int = 8, session: requests.Session = None) -> dict[str, str]:
+    """
+    Downloads images concurrently over keep-alive connections, skipping repeated URLs and identical files.
+    Files are named after the URL digest, so a URL downloaded by an earlier run is found again by name.
+    Pass the same `session` to every call to keep its connections open between pages.
+    Returns {url: path} and prints throughput per host.
+    """
+
+    os.makedirs(folder, exist_ok=True)
+
+    session = session or make_download_session(max_workers)
+
+    lock = threading.Lock()
+    downloaded_images = {}  # url -> path
+    paths_by_hash = {}      # sha256 -> path of the first file with that content
+    host_stats = {}         # host -> {"bytes": ..., "seconds": ..., "images": ...}
+
+    def download(url: str):
+        path = os.path.join(folder, f"original_size_img_{url_digest(url).hex()}.jpg")
+        print(f"Downloading {url}...")
+
+        if os.path.exists(path):
+            with lock:
+                downloaded_images[url] = path
+            return
+
+        start = time.perf_counter()
+        try:
+            downloaded_bytes, content_hash = download_image(session, url, path)
+        except requests.exceptions.RequestException as error:
+            print(f"Failed to download {url}: {error}")
+            return
+        elapsed = time.perf_counter() - start
+
+        with lock:
+            # same picture from a different URL -> keep only the first file
+            if content_hash in paths_by_hash:
+                os.remove(path)
+                path = paths_by_hash[content_hash]
+            else:
+                paths_by_hash[content_hash] = path
+
+            downloaded_images[url] = path
+
+            stats = host_stats.setdefault(urlsplit(url).netloc, {"bytes": 0, "seconds": 0.0, "images": 0})
+            stats["bytes"] += downloaded_bytes
+            stats["seconds"] += elapsed
+            stats["images"] += 1
+
+    # dict.fromkeys() drops repeated URLs and keeps the original order
+    unique_urls = list(dict.fromkeys(urls))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(download, unique_urls))
+
+    for host, stats in host_stats.items():
+        print(f"{host}: {stats['images']} images, {stats['bytes'] / 1024 / 1024:.2f} MB, "
+              f"{stats['bytes'] / 1024 / 1024 / max(stats['seconds'], 1e-9):.2f} MB/s")
+
+    return downloaded_images
+
+
 html = requests.get("https://www.google.com/search", params=params, headers=headers, timeout=30)
 soup = BeautifulSoup(html.text, "lxml")
 
+# parsed once, shared by get_suggested_search_data() and get_original_images()
+af_init_data = extract_af_init_data(soup)
+
 def get_images_with_request_headers():
     params["content-type"] = "image/png" # parameter that indicate the original media type 
 
@@ -25,20 +229,9 @@ def get_images_with_request_headers():
 def get_suggested_search_data():
     suggested_searches = []
 
-    all_script_tags = soup.select("script")
-
-    # https://regex101.com/r/48UZhY/6
-    matched_images = "".join(re.findall(r"AF_initDataCallback\(({key: 'ds:1'.*?)\);</script>", str(all_script_tags)))
-    
-    # https://kodlogs.com/34776/json-decoder-jsondecodeerror-expecting-property-name-enclosed-in-double-quotes
-    # if you try to json.loads() without json.dumps it will throw an error:
-    # "Expecting property name enclosed in double quotes"
-    matched_images_data_fix = json.dumps(matched_images)
-    matched_images_data_json = json.loads(matched_images_data_fix)
-
     # search for only suggested search thumbnails related
     # https://regex101.com/r/ITluak/2
-    suggested_search_thumbnails = ",".join(re.findall(r'{key(.*?)\[null,\"Size\"', matched_images_data_json))
+    suggested_search_thumbnails = ",".join(re.findall(r'{key(.*?)\[null,\"Size\"', af_init_data.get("ds:1", "")))
 
     # https://regex101.com/r/MyNLUk/1
     suggested_search_thumbnail_encoded = re.findall(r'\"(https:\/\/encrypted.*?)\"', suggested_search_thumbnails)
@@ -56,110 +249,227 @@ def get_suggested_search_data():
     return suggested_searches
 
 def get_original_images():
+    google_images = []
+
+    thumbnails, full_res_images = parse_grid_images(af_init_data)
 
+    for index, (metadata, thumbnail, original) in enumerate(zip(soup.select(".isv-r.PNCib.MSM1fd.BUooTd"), thumbnails, full_res_images), start=1):
+        google_images.append({
+            "title": metadata.select_one(".VFACy.kGQAp.sMi44c.lNHeqe.WGvvNb")["title"],
+            "link": metadata.select_one(".VFACy.kGQAp.sMi44c.lNHeqe.WGvvNb")["href"],
+            "source": metadata.select_one(".fxgdke").text,
+            "thumbnail": thumbnail,
+            "original": original
+        })
+
+    # Download original images
+    download_images([image["original"] for image in google_images], folder="Bs4_Images")
+
+    return google_images
+
+def load_seen_urls(seen_urls_path: str) -> set[bytes]:
+    if not os.path.exists(seen_urls_path):
+        return set()
+
+    with open(seen_urls_path, "rb") as seen_urls_file:
+        seen_urls_data = seen_urls_file.read()
+
+    return {seen_urls_data[index:index + 16] for index in range(0, len(seen_urls_data), 16)}
+
+
+def serpapi_get_google_images(queries: tuple[str] = ("Coffee", "boat", "skyrim", "minecraft"),
+                              jsonl_path: str = "serpapi_google_images.jsonl",
+                              seen_urls_path: str = "serpapi_google_images_seen.bin"):
     """
-    https://kodlogs.com/34776/json-decoder-jsondecodeerror-expecting-property-name-enclosed-in-double-quotes
-    if you try to json.loads() without json.dumps() it will throw an error:
-    "Expecting property name enclosed in double quotes"
+    Writes every new original image URL to a JSONL file as soon as its image is downloaded.
+    URLs downloaded by a previous run are remembered in `seen_urls_path` and skipped.
     """
 
-    google_images = []
+    seen_urls = load_seen_urls(seen_urls_path)
+    images_count = 0
 
-    all_script_tags = soup.select("script")
+    # one connection pool for the downloads of every page
+    download_session = make_download_session()
 
-    # # https://regex101.com/r/48UZhY/4
-    matched_images_data = "".join(re.findall(r"AF_initDataCallback\(([^<]+)\);", str(all_script_tags)))
-    
-    matched_images_data_fix = json.dumps(matched_images_data)
-    matched_images_data_json = json.loads(matched_images_data_fix)
+    with open(jsonl_path, "a", encoding="utf-8") as jsonl_file, open(seen_urls_path, "ab") as seen_urls_file:
+        for query in queries:
+            params = {
+                "engine": "google",               # search engine. Google, Bing, Yahoo, Naver, Baidu...
+                "q": query,                       # search query
+                "tbm": "isch",                    # image results
+                "num": "100",                     # number of images per page
+                "ijn": 0,                         # page number: 0 -> first page, 1 -> second...
+                "api_key": os.getenv("API_KEY")   # your serpapi api key
+                # other query parameters: hl (lang), gl (country), etc
+            }
 
-    # https://regex101.com/r/pdZOnW/3
-    matched_google_image_data = re.findall(r'\[\"GRID_STATE0\",null,\[\[1,\[0,\".*?\",(.*),\"All\",', matched_images_data_json)
+            search = GoogleSearch(params)         # where data extraction happens
 
-    # https://regex101.com/r/NnRg27/1
-    matched_google_images_thumbnails = ", ".join(
-        re.findall(r'\[\"(https\:\/\/encrypted-tbn0\.gstatic\.com\/images\?.*?)\",\d+,\d+\]',
-                   str(matched_google_image_data))).split(", ")
+            images_is_present = True
+            while images_is_present:
+                results = search.get_dict()       # JSON -> Python dictionary
 
-    thumbnails = [
-        bytes(bytes(thumbnail, "ascii").decode("unicode-escape"), "ascii").decode("unicode-escape") for thumbnail in matched_google_images_thumbnails
-    ]
+                # checks for "Google hasn't returned any results for this query."
+                if "error" not in results:
+                    # set lookup is O(1), "not in list" rescanned every collected URL
+                    new_images = list(dict.fromkeys(image["original"] for image in results["images_results"] if url_digest(image["original"]) not in seen_urls))
 
-    # removing previously matched thumbnails for easier full resolution image matches.
-    removed_matched_google_images_thumbnails = re.sub(
-        r'\[\"(https\:\/\/encrypted-tbn0\.gstatic\.com\/images\?.*?)\",\d+,\d+\]', "", str(matched_google_image_data))
+                    # -----------------------
+                    # Downloading images of the current page
+                    downloaded_images = download_images(new_images, folder="SerpApi_Images", session=download_session)
 
-    # https://regex101.com/r/fXjfb1/4
-    # https://stackoverflow.com/a/19821774/15164646
-    matched_google_full_resolution_images = re.findall(r"(?:'|,),\[\"(https:|http.*?)\",\d+,\d+\]", removed_matched_google_images_thumbnails)
+                    # a URL is remembered only once its file is complete, failed downloads are retried by the next run
+                    for original in new_images:
+                        if original in downloaded_images:
+                            digest = url_digest(original)
+                            seen_urls.add(digest)
+                            seen_urls_file.write(digest)
+                            jsonl_file.write(json.dumps({"query": query, "page": params["ijn"], "original": original}) + "\n")
+                            images_count += 1
 
-    full_res_images = [
-        bytes(bytes(img, "ascii").decode("unicode-escape"), "ascii").decode("unicode-escape") for img in matched_google_full_resolution_images
-    ]
-    
-    for index, (metadata, thumbnail, original) in enumerate(zip(soup.select(".isv-r.PNCib.MSM1fd.BUooTd"), thumbnails, full_res_images), start=1):
-        google_images.append({
-            "title": metadata.select_one(".VFACy.kGQAp.sMi44c.lNHeqe.WGvvNb")["title"],
-            "link": metadata.select_one(".VFACy.kGQAp.sMi44c.lNHeqe.WGvvNb")["href"],
-            "source": metadata.select_one(".fxgdke").text,
-            "thumbnail": thumbnail,
-            "original": original
-        })
+                    jsonl_file.flush()
+                    seen_urls_file.flush()
 
-        # Download original images
-        print(f"Downloading {index} image...")
-        
-        opener=urllib.request.build_opener()
-        opener.addheaders=[("User-Agent","Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/103.0.5060.114 Safari/537.36")]
-        urllib.request.install_opener(opener)
+                    # update to the next page
+                    params["ijn"] += 1
+                else:
+                    images_is_present = False
+                    print(results["error"])
 
-        urllib.request.urlretrieve(original, f"Bs4_Images/original_size_img_{index}.jpg")
+    print(f"{images_count} new images written to {jsonl_path}")
 
-    return google_images
 
-def serpapi_get_google_images():
-    image_results = []
-    
-    for query in ["Coffee", "boat", "skyrim", "minecraft"]:
-        params = {
-            "engine": "google",               # search engine. Google, Bing, Yahoo, Naver, Baidu...
-            "q": query,                       # search query
-            "tbm": "isch",                    # image results
-            "num": "100",                     # number of images per page
-            "ijn": 0,                         # page number: 0 -> first page, 1 -> second...
-            "api_key": os.getenv("API_KEY")   # your serpapi api key
-            # other query parameters: hl (lang), gl (country), etc  
-        }
-    
-        search = GoogleSearch(params)         # where data extraction happens
-    
-        images_is_present = True
-        while images_is_present:
-            results = search.get_dict()       # JSON -> Python dictionary
-    
-            # checks for "Google hasn't returned any results for this query."
-            if "error" not in results:
-                for image in results["images_results"]:
-                    if image["original"] not in image_results:
-                        image_results.append(image["original"])
-                
-                # update to the next page
-                params["ijn"] += 1
-            else:
-                images_is_present = False
-                print(results["error"])
-    
-    # -----------------------
-    # Downloading images
-
-    for index, image in enumerate(results["images_results"], start=1):
-        print(f"Downloading {index} image...")
-        
-        opener=urllib.request.build_opener()
-        opener.addheaders=[("User-Agent","Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/103.0.5060.114 Safari/537.36")]
-        urllib.request.install_opener(opener)
-
-        urllib.request.urlretrieve(image["original"], f"SerpApi_Images/original_size_img_{index}.jpg")
-
-    print(json.dumps(image_results, indent=2))
-    print(len(image_results))
+def benchmark_af_init_data_extractor(html_fixture_path: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), "google_images_serp.html"), iterations: int = 20):
+    """
+    Compares the old str(all_script_tags) + regex passes against extract_af_init_data() on a saved image SERP.
+    google_images_serp.html next to this script is one, a fresh page can be saved with:
+    with open("google_images_serp.html", "w") as f: f.write(html.text)
+    """
+
+    with open(html_fixture_path, encoding="utf-8") as f:
+        fixture_soup = BeautifulSoup(f.read(), "lxml")
+
+    def str_all_script_tags_images():
+        all_script_tags = fixture_soup.select("script")
+        matched_images_data = "".join(re.findall(r"AF_initDataCallback\(([^<]+)\);", str(all_script_tags)))
+        matched_google_image_data = re.findall(r'\[\"GRID_STATE0\",null,\[\[1,\[0,\".*?\",(.*),\"All\",', matched_images_data)
+
+        matched_google_images_thumbnails = ", ".join(
+            re.findall(r'\[\"(https\:\/\/encrypted-tbn0\.gstatic\.com\/images\?.*?)\",\d+,\d+\]',
+                       str(matched_google_image_data))).split(", ")
+        thumbnails = [
+            bytes(bytes(thumbnail, "ascii").decode("unicode-escape"), "ascii").decode("unicode-escape") for thumbnail in matched_google_images_thumbnails
+        ]
+
+        removed_matched_google_images_thumbnails = re.sub(
+            r'\[\"(https\:\/\/encrypted-tbn0\.gstatic\.com\/images\?.*?)\",\d+,\d+\]', "", str(matched_google_image_data))
+        matched_google_full_resolution_images = re.findall(r"(?:'|,),\[\"(https:|http.*?)\",\d+,\d+\]", removed_matched_google_images_thumbnails)
+        full_res_images = [
+            bytes(bytes(img, "ascii").decode("unicode-escape"), "ascii").decode("unicode-escape") for img in matched_google_full_resolution_images
+        ]
+
+        return thumbnails, full_res_images
+
+    def single_pass_images():
+        return parse_grid_images(extract_af_init_data(fixture_soup))
+
+    results = {}
+    for name, extract in [("str(all_script_tags)", str_all_script_tags_images), ("single pass", single_pass_images)]:
+        tracemalloc.start()
+        start = time.perf_counter()
+        for _ in range(iterations):
+            results[name] = extract()
+        elapsed = (time.perf_counter() - start) / iterations
+        _, peak_memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        print(f"{name}: {elapsed * 1000:.2f} ms per page, peak memory {peak_memory / 1024 / 1024:.2f} MB")
+
+    thumbnails, originals = results["single pass"]
+    print(f"{len(thumbnails)} thumbnails, {len(originals)} originals, identical: {results['str(all_script_tags)'] == results['single pass']}")
+
+
+# benchmark_af_init_data_extractor()
+
+
+def check_download_images_locally():
+    """
+    Runs download_images() against a local HTTP server that supports Range requests:
+    repeated URLs, identical content under different URLs, and a resumed .part file.
+    """
+
+    images = {
+        "/a.jpg": os.urandom(300 * 1024),
+        "/b.jpg": os.urandom(100 * 1024),
+    }
+    images["/a-copy.jpg"] = images["/a.jpg"]
+
+    class ImageHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive
+
+        def do_GET(self):
+            body = images.get(self.path)
+            if body is None:
+                self.send_error(404)
+                return
+
+            start = 0
+            if "Range" in self.headers:
+                start = int(re.search(r"bytes=(\d+)-", self.headers["Range"]).group(1))
+
+            if start >= len(body):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(body)}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+            self.send_response(206 if start else 200)
+            self.send_header("Content-Length", str(len(body) - start))
+            self.end_headers()
+            self.wfile.write(body[start:])
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ImageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    folder = "Local_Images"
+    os.makedirs(folder, exist_ok=True)
+
+    urls = [f"{base_url}/a.jpg", f"{base_url}/b.jpg", f"{base_url}/a.jpg", f"{base_url}/a-copy.jpg"]
+
+    # left over from a "crashed" run: a .part of another URL where a.jpg goes, and a complete .part of b.jpg (answered with 416)
+    leftovers = {f"original_size_img_{url_digest(urls[0]).hex()}.jpg": (urls[1], images["/b.jpg"][:1000]),
+                 f"original_size_img_{url_digest(urls[1]).hex()}.jpg": (urls[1], images["/b.jpg"])}
+    for file_name, (url, data) in leftovers.items():
+        with open(os.path.join(folder, f"{file_name}.part"), "wb") as part_file:
+            part_file.write(data)
+        with open(os.path.join(folder, f"{file_name}.part.url"), "w", encoding="utf-8") as source_file:
+            source_file.write(url)
+
+    downloaded_images = download_images(urls, folder=folder, max_workers=4)
+
+    assert len(downloaded_images) == 3                                                       # repeated URL skipped
+    assert downloaded_images[f"{base_url}/a-copy.jpg"] == downloaded_images[f"{base_url}/a.jpg"]  # same content, one file
+    for url, path in downloaded_images.items():
+        with open(path, "rb") as image_file:
+            assert image_file.read() == images[urlsplit(url).path]                           # no spliced or partial file
+    assert not [file_name for file_name in os.listdir(folder) if ".part" in file_name]
+
+    # next run: a new URL gets its own file instead of an index already used by the first run, a failed one isn't returned
+    images["/c.jpg"] = os.urandom(50 * 1024)
+    next_run_images = download_images([f"{base_url}/c.jpg", f"{base_url}/missing.jpg"], folder=folder, max_workers=4)
+    server.shutdown()
+
+    assert list(next_run_images) == [f"{base_url}/c.jpg"]
+    with open(next_run_images[f"{base_url}/c.jpg"], "rb") as image_file:
+        assert image_file.read() == images["/c.jpg"]
+
+    shutil.rmtree(folder)
+    print("download_images() works against the local server")
+
+
+# check_download_images_locally()
@@ -1,6 +1,112 @@
-import requests, json, re
+import requests, json, re, time, os, sys, tempfile, tracemalloc
 from parsel import Selector
 
+# scraper_kit/ with helpers shared between scrapers is at the repository root
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+from scraper_kit.schema import compile_css, compile_schema, extract_fields, benchmark_schema_extraction
+from scraper_kit.thumbnails import ThumbnailIndex, ThumbnailStore, fake_escaped_thumbnail
+
+
+NEWS_RESULT = compile_css(".xuvV6b")
+THUMBNAIL_ID = compile_css(".FAkayc img::attr(id)")
+SCRIPT_TEXT = compile_css("script::text")
+NEXT_PAGE = compile_css(".d6cvqb a[id=pnnext]")
+
+NEWS_FIELDS = {
+    "title": ".MBeuO::text",
+    "link": "a.WlydOe::attr(href)",
+    "source": ".NUnG9d span::text",
+    "snippet": ".GI74Re::text",
+    "date_published": ".ZE0LJd span::text"
+}
+NEWS_SCHEMA = compile_schema(NEWS_FIELDS)
+
+
+def parse_news_page(selector, thumbnail_store: ThumbnailStore = None) -> list[dict]:
+    news_results = []
+
+    # extract thumbnails
+    thumbnail_index = ThumbnailIndex(SCRIPT_TEXT(selector.root), thumbnail_store=thumbnail_store)
+
+    for result, thumbnail_id in zip(NEWS_RESULT(selector.root), THUMBNAIL_ID(selector.root)):
+        news_results.append({
+            **extract_fields(NEWS_SCHEMA, result),
+            "thumbnail": thumbnail_index.get(thumbnail_id)
+        })
+
+    return news_results
+
+
+def fake_news_page(results_count: int = 100) -> str:
+    # news SERP markup with a base64 thumbnail in an inline script for every result
+    results = "".join(f"""
+        <div class="xuvV6b"><a class="WlydOe" href="https://news{index}.example.com/gta">
+            <div class="FAkayc"><img id="dimg_{index}"></div>
+            <div class="NUnG9d"><span>News source {index}</span></div>
+            <div class="MBeuO">GTA San Andreas news {index}</div>
+            <div class="GI74Re">Snippet of the news article number {index}.</div>
+            <div class="ZE0LJd"><span>{index} hours ago</span></div>
+        </a></div>""" for index in range(results_count))
+    scripts = "".join(
+        f"<script>(function(){{var s='data:image/jpeg;base64,{fake_escaped_thumbnail(index)}';var ii=['dimg_{index}'];_setImagesSrc(ii,s);}})();</script>"
+        for index in range(results_count)
+    )
+    return f"<html><body>{results}{scripts}</body></html>"
+
+
+def benchmark_thumbnail_index(results_count: int = 100, iterations: int = 20):
+    selector = Selector(text=fake_news_page(results_count))
+    script_texts = SCRIPT_TEXT(selector.root)
+    thumbnail_ids = THUMBNAIL_ID(selector.root)
+
+    def regex_per_result():
+        # previous approach: a new regex for every result id over str() of all scripts, O(results x script bytes)
+        decoded_thumbnails = []
+        for thumbnail_id in thumbnail_ids:
+            thumbnails = re.findall(r"s=\'([^']+)\'\;var\s?ii\=\['{_id}'\];".format(_id=thumbnail_id), str(script_texts))
+            decoded_thumbnail = "".join([
+                bytes(bytes(img, "ascii").decode("unicode-escape"), "ascii").decode("unicode-escape") for img in thumbnails
+            ])
+            decoded_thumbnails.append(None if decoded_thumbnail == "" else decoded_thumbnail)
+        return decoded_thumbnails
+
+    def thumbnail_index():
+        index = ThumbnailIndex(script_texts)
+        return [index.get(thumbnail_id) for thumbnail_id in thumbnail_ids]
+
+    results = {}
+    for name, lookup in [("regex per result", regex_per_result), ("ThumbnailIndex", thumbnail_index)]:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            results[name] = lookup()
+        print(f"{name}: {(time.perf_counter() - start) / iterations * 1000:.2f} ms per {results_count}-result page")
+
+    print(f"same thumbnails: {results['regex per result'] == results['ThumbnailIndex']}")
+
+
+def benchmark_thumbnail_store(results_count: int = 100, pages_count: int = 10):
+    html = fake_news_page(results_count)
+
+    with tempfile.TemporaryDirectory() as folder:
+        for name, thumbnail_store in [("inline base64", None), ("ThumbnailStore", ThumbnailStore(folder))]:
+            tracemalloc.start()
+            start = time.perf_counter()
+
+            # a bulk run keeps every page's results until the end
+            news_results = []
+            for _ in range(pages_count):
+                news_results.extend(parse_news_page(Selector(text=html), thumbnail_store=thumbnail_store))
+            output = json.dumps(news_results, indent=2, ensure_ascii=False)
+
+            elapsed = time.perf_counter() - start
+            _, peak_memory = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            print(f"{name}: {elapsed:.2f}s, JSON {len(output) / 1024:.0f} KB, peak allocations {peak_memory / 1024 / 1024:.1f} MB")
+
+        print(f"files written: {len(os.listdir(folder))} for {results_count * pages_count} results")
+
+
 headers = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/103.0.5060.114 Safari/537.36"
 }
@@ -14,6 +120,9 @@ params = {
     "start": 0               # page nubmer
 }
 
+# ThumbnailStore("news_thumbnails") writes base64 thumbnails to files and keeps only their paths in the results
+thumbnail_store = None
+
 news_results = []
 page_num = 0
 
@@ -24,30 +133,15 @@ while True:
     html = requests.get("https://www.google.com/search", headers=headers, params=params, timeout=30)
     selector = Selector(text=html.text)
 
-    # extract thumbnails
-    all_script_tags = selector.css("script::text").getall()
-
-    for result, thumbnail_id in zip(selector.css(".xuvV6b"), selector.css(".FAkayc img::attr(id)")):
-        thumbnails = re.findall(r"s=\'([^']+)\'\;var\s?ii\=\['{_id}'\];".format(_id=thumbnail_id.get()), str(all_script_tags))
-
-        decoded_thumbnail = "".join([
-            bytes(bytes(img, "ascii").decode("unicode-escape"), "ascii").decode("unicode-escape") for img in thumbnails
-        ])
-
-        news_results.append(
-            {
-                "title": result.css(".MBeuO::text").get(),
-                "link": result.css("a.WlydOe::attr(href)").get(),
-                "source": result.css(".NUnG9d span::text").get(),
-                "snippet": result.css(".GI74Re::text").get(),
-                "date_published": result.css(".ZE0LJd span::text").get(),
-                "thumbnail": None if decoded_thumbnail == "" else decoded_thumbnail
-            }
-        )
-
-    if selector.css(".d6cvqb a[id=pnnext]").get():
+    news_results.extend(parse_news_page(selector, thumbnail_store=thumbnail_store))
+
+    if NEXT_PAGE(selector.root):
         params["start"] += 10
     else:
         break 
 
 print(json.dumps(news_results, indent=2, ensure_ascii=False))
+
+# benchmark_schema_extraction(fake_news_page(100), ".xuvV6b", NEWS_FIELDS)
+# benchmark_thumbnail_index()
+# benchmark_thumbnail_store()
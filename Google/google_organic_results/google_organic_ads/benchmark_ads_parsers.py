@@ -0,0 +1,231 @@
+"""
+Offline benchmark of the bs4 and parsel versions of the same scraper plus a raw lxml baseline.
+
+Every variant parses the same real Google SERP `iterations` times in its own process
+and reports parse time (HTML -> tree), extraction time (tree -> list of dicts), peak RSS and
+whether its output matches the parsel version. Empty values ([], "", None) count as the same.
+
+SERPs come from the record/replay server in Python-General/http_fixture_server. recorded_serps/ holds one page
+for every query below in its fixture format, so the benchmark runs offline; to re-record them while the scripts run (from this folder):
+
+python ../../../Python-General/http_fixture_server/http_fixture_server.py record --port 8765 --fixtures-dir recorded_serps
+python ../../../Python-General/http_fixture_server/http_fixture_server.py run --base-url http://127.0.0.1:8765 google_regular_ads/parsel_scrape_google_ads.py
+python ../../../Python-General/http_fixture_server/http_fixture_server.py run --base-url http://127.0.0.1:8765 google_shopping_ads/bs4_scrape_google_shopping_ads.py
+python ../../../Python-General/http_fixture_server/http_fixture_server.py run --base-url http://127.0.0.1:8765 google_shopping_ads/parsel_scrape_google_shopping_ads.py
+"""
+
+from bs4 import BeautifulSoup
+from parsel import Selector
+from lxml import html as lxml_html
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qsl
+from requests.utils import get_encoding_from_headers
+from requests.structures import CaseInsensitiveDict
+import time, os, sys, ast, resource, multiprocessing
+
+ADS_DIR = os.path.dirname(os.path.abspath(__file__))
+RECORDED_SERPS_DIR = os.path.join(ADS_DIR, "recorded_serps")
+
+# scraper_kit/ with helpers shared between scrapers is at the repository root
+sys.path.insert(0, os.path.abspath(os.path.join(ADS_DIR, "..", "..", "..")))
+from scraper_kit.schema import compile_css
+
+sys.path.insert(0, os.path.abspath(os.path.join(ADS_DIR, "..", "..", "..", "Python-General", "http_fixture_server")))
+from http_fixture_server import FixtureStore, fixture_body
+
+
+def load_definitions(path: str) -> dict:
+    # the scripts make a live request at the top level, so only imports, sys.path setup, functions and UPPER_CASE constants are executed
+    with open(path, encoding="utf-8") as script_file:
+        tree = ast.parse(script_file.read(), filename=path)
+
+    def is_definition(node) -> bool:
+        if isinstance(node, ast.Assign):
+            return all(isinstance(target, ast.Name) and target.id.isupper() for target in node.targets)
+        if isinstance(node, ast.Expr):
+            return ast.unparse(node).startswith("sys.path.insert(")
+        return isinstance(node, (ast.Import, ast.ImportFrom, ast.FunctionDef))
+
+    tree.body = [node for node in tree.body if is_definition(node)]
+
+    namespace = {"__file__": path}
+    exec(compile(tree, path, "exec"), namespace)
+    return namespace
+
+
+AD_RESULT = compile_css(".uEierd")
+AD_TITLE = compile_css(".v0nnCb span::text")
+AD_WEBSITE_LINK = compile_css("a.sVXRqc::attr(data-pcu)")
+AD_LINK = compile_css("a.sVXRqc::attr(href)")
+AD_DISPLAYED_LINK = compile_css(".qzEoUe::text")
+AD_TRACKING_LINK = compile_css(".v5yQqb a.sVXRqc::attr(data-rw)")
+AD_SNIPPET = compile_css(".MUxGbd div span")
+AD_PHONE = compile_css("span.fUamLb span::text")
+AD_SITELINK_TEXT = compile_css("div.bOeY0b .XUpIGb a::text")
+AD_SITELINK = compile_css("div.bOeY0b .XUpIGb a::attr(href)")
+
+
+def lxml_parse_ad_results(root) -> list[dict]:
+    def first(values):
+        return values[0] if values else None
+
+    ad_results = []
+
+    for index, ad_result in enumerate(AD_RESULT(root), start=1):
+        snippet = first(AD_SNIPPET(ad_result))
+
+        ad_results.append({
+            "position": index,
+            "title": first(AD_TITLE(ad_result)),
+            "phone": first(AD_PHONE(ad_result)),
+            "website_link": first(AD_WEBSITE_LINK(ad_result)),
+            "displayed_link": first(AD_DISPLAYED_LINK(ad_result)),
+            "ad_link": first(AD_LINK(ad_result)),
+            "tracking_link": first(AD_TRACKING_LINK(ad_result)),
+            "snippet": None if snippet is None else snippet.xpath("normalize-space()"),
+            "sitelinks": [{"titles": AD_SITELINK_TEXT(ad_result) or None, "links": AD_SITELINK(ad_result) or None}]
+        })
+
+    return ad_results
+
+
+SHOPPING_TOP_BLOCK = compile_css(".commercial-unit-desktop-top")
+SHOPPING_RIGHT_BLOCK = compile_css(".commercial-unit-desktop-rhs")
+SHOPPING_AD = compile_css(".mnr-c.pla-unit")
+SHOPPING_TITLE = compile_css(".pymv4e::text")
+SHOPPING_LINK = compile_css(".pla-unit-title-link::attr(href)")
+SHOPPING_PRICE = compile_css(".e10twf::text")
+SHOPPING_TOP_SOURCE = compile_css(".LbUacb .zPEcBd::text")
+SHOPPING_RIGHT_SOURCE = compile_css(".LbUacb::text, .zPEcBd::text")
+
+
+def lxml_parse_shopping_ads(root) -> list[dict]:
+    def first(values):
+        return values[0] if values else None
+
+    if SHOPPING_TOP_BLOCK(root):
+        block_position, source_xpath = "top_block", SHOPPING_TOP_SOURCE
+    elif SHOPPING_RIGHT_BLOCK(root):
+        block_position, source_xpath = "right_block", SHOPPING_RIGHT_SOURCE
+    else:
+        return []
+
+    return [{
+        "position": index,
+        "block_position": block_position,
+        "title": first(SHOPPING_TITLE(shopping_ad)),
+        "link": first(SHOPPING_LINK(shopping_ad)),
+        "price": first(SHOPPING_PRICE(shopping_ad)),
+        "source": first(source_xpath(shopping_ad))
+    } for index, shopping_ad in enumerate(SHOPPING_AD(root), start=1)]
+
+
+PARSERS = {
+    "bs4": lambda html: BeautifulSoup(html, "lxml"),
+    "parsel": lambda html: Selector(text=html),
+    "lxml": lambda html: lxml_html.fromstring(html)
+}
+
+# scraper -> queries its scripts search for and the extraction function of every variant
+SCRAPERS = {
+    "google_ads": {
+        "queries": ["coffee beans buy"],
+        "bs4": ("google_regular_ads/bs4_scrape_google_ads.py", "parse_ad_results"),
+        "parsel": ("google_regular_ads/parsel_scrape_google_ads.py", "parse_ad_results"),
+        "lxml": lxml_parse_ad_results
+    },
+    "google_shopping_ads": {
+        "queries": ["rtx 3080 buy", "graphics card buy"],
+        "bs4": ("google_shopping_ads/bs4_scrape_google_shopping_ads.py", "parse_shopping_ads"),
+        "parsel": ("google_shopping_ads/parsel_scrape_google_shopping_ads.py", "parse_shopping_ads"),
+        "lxml": lxml_parse_shopping_ads
+    }
+}
+
+
+def recorded_serps(fixtures_dir: str = RECORDED_SERPS_DIR) -> dict:
+    # query -> HTML of every Google search page the recorder saved with a 200
+    serps = {}
+
+    for fixture in FixtureStore(fixtures_dir).load().fixtures.values():
+        if fixture["host"] == "www.google.com" and fixture["path"] == "/search" and fixture["status"] == 200:
+            query = dict(parse_qsl(fixture["query"])).get("q")
+            # decoded the way requests' .text does it for the scripts
+            encoding = get_encoding_from_headers(CaseInsensitiveDict(fixture["headers"])) or "utf-8"
+            serps[query] = fixture_body(fixture).decode(encoding, errors="replace")
+
+    return serps
+
+
+def run_variant(scraper: str, variant: str, html: str, iterations: int) -> dict:
+    # runs in a fresh process so ru_maxrss belongs to this variant only
+    extract = SCRAPERS[scraper][variant]
+    if isinstance(extract, tuple):
+        script_path, function_name = extract
+        extract = load_definitions(os.path.join(ADS_DIR, script_path))[function_name]
+
+    parse = PARSERS[variant]
+
+    parse_time = extraction_time = 0
+    for _ in range(iterations):
+        start = time.perf_counter()
+        tree = parse(html)
+        parse_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = extract(tree)
+        extraction_time += time.perf_counter() - start
+
+    return {
+        "parse_ms": parse_time / iterations * 1000,
+        "extraction_ms": extraction_time / iterations * 1000,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,  # KB on Linux
+        "results": results
+    }
+
+
+def normalized(value):
+    # bs4 returns [] where parsel returns None (empty sitelinks, missing text), only a real difference should count
+    if isinstance(value, dict):
+        value = {key: normalized(item) for key, item in value.items()}
+        return value if any(item is not None for item in value.values()) else None
+    if isinstance(value, list):
+        value = [normalized(item) for item in value]
+        return value if any(item is not None for item in value) else None
+    if isinstance(value, str):
+        value = value.strip()
+    return None if value == "" else value
+
+
+def differing_fields(results: list[dict], expected: list[dict]) -> list[str]:
+    if len(results) != len(expected):
+        return [f"{len(results)} results instead of {len(expected)}"]
+
+    return sorted({key for result, expected_result in zip(results, expected) for key in expected_result
+                   if normalized(result.get(key)) != normalized(expected_result[key])})
+
+
+def benchmark_ads_parsers(iterations: int = 50, fixtures_dir: str = RECORDED_SERPS_DIR):
+    serps = recorded_serps(fixtures_dir)
+
+    # spawn: each variant starts from a clean interpreter, nothing inherited from the other variants
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"), max_tasks_per_child=1) as executor:
+        for scraper, config in SCRAPERS.items():
+            for query in config["queries"]:
+                if query not in serps:
+                    print(f"{scraper}: no recorded SERP for {query!r} in {fixtures_dir}, record it first (see the docstring at the top)")
+                    continue
+
+                html = serps[query]
+                print(f"{scraper}: {query!r} ({len(html.encode()) / 1024:.0f} KB), {iterations} iterations")
+
+                reports = {variant: executor.submit(run_variant, scraper, variant, html, iterations).result() for variant in PARSERS}
+
+                for variant, report in reports.items():
+                    differences = differing_fields(report["results"], reports["parsel"]["results"])
+                    print(f"  {variant:>6}: parse {report['parse_ms']:.2f} ms, extraction {report['extraction_ms']:.2f} ms, "
+                          f"peak RSS {report['peak_rss_mb']:.0f} MB, {len(report['results'])} results, "
+                          f"same as parsel: {not differences}{'' if not differences else f' (differs: {differences})'}")
+
+
+# benchmark_ads_parsers()
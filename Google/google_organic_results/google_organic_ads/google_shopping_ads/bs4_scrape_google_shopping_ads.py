@@ -1,6 +1,47 @@
 from bs4 import BeautifulSoup
 import requests, lxml, json
 
+
+def parse_shopping_ads(soup) -> list[dict]:
+    data = []
+
+    # if top block shopping ads appears
+    if soup.select_one(".commercial-unit-desktop-top"):
+        for index, shopping_ad in enumerate(soup.select(".mnr-c.pla-unit"), start=1):
+            title = shopping_ad.select_one(".pymv4e").text
+            link = shopping_ad.select_one(".pla-unit-title-link")["href"]
+            price = shopping_ad.select_one(".e10twf").text
+            source = shopping_ad.select_one(".LbUacb .zPEcBd").text
+
+            data.append({
+                "position": index,
+                "block_position": "top_block",
+                "title": title,
+                "link": link,
+                "price": price,
+                "source": source
+                })
+
+    # if right block shopping ads appears
+    elif soup.select_one(".commercial-unit-desktop-rhs"):
+        for index, shopping_ad in enumerate(soup.select(".mnr-c.pla-unit"), start=1):
+            title = shopping_ad.select_one(".pymv4e").text
+            link = shopping_ad.select_one(".pla-unit-title-link")["href"]
+            price = shopping_ad.select_one(".e10twf").text
+            source = shopping_ad.select_one(".LbUacb, .zPEcBd").text
+
+            data.append({
+                "position": index,
+                "block_position": "right_block",
+                "title": title,
+                "link": link,
+                "price": price,
+                "source": source
+                })
+
+    return data
+
+
 # https://docs.python-requests.org/en/master/user/quickstart/#passing-parameters-in-urls
 params = {
     "q": "rtx 3080 buy",
@@ -16,41 +57,7 @@ headers = {
 html = requests.get("https://www.google.com/search", params=params, headers=headers, timeout=30)
 soup = BeautifulSoup(html.text, "lxml")
 
-data = []
-
-# if top block shopping ads appears
-if soup.select_one(".commercial-unit-desktop-top"):
-    for index, shopping_ad in enumerate(soup.select(".mnr-c.pla-unit"), start=1):
-        title = shopping_ad.select_one(".pymv4e").text
-        link = shopping_ad.select_one(".pla-unit-title-link")["href"]
-        price = shopping_ad.select_one(".e10twf").text
-        source = shopping_ad.select_one(".LbUacb .zPEcBd").text
-
-        data.append({
-            "position": index,
-            "block_position": "top_block",
-            "title": title,
-            "link": link,
-            "price": price,
-            "source": source
-            })
-
-# if right block shopping ads appears
-elif soup.select_one(".commercial-unit-desktop-rhs"):
-    for index, shopping_ad in enumerate(soup.select(".mnr-c.pla-unit"), start=1):
-        title = shopping_ad.select_one(".pymv4e").text
-        link = shopping_ad.select_one(".pla-unit-title-link")["href"]
-        price = shopping_ad.select_one(".e10twf").text
-        source = shopping_ad.select_one(".LbUacb, .zPEcBd").text
-
-        data.append({
-            "position": index,
-            "block_position": "right_block",
-            "title": title,
-            "link": link,
-            "price": price,
-            "source": source
-            })
+data = parse_shopping_ads(soup)
 
 print(json.dumps(data, indent=2, ensure_ascii=False))
 
@@ -1,5 +1,64 @@
 from parsel import Selector
-import requests, json
+import requests, json, os, sys
+
+# scraper_kit/ with helpers shared between scrapers is at the repository root
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "..")))
+from scraper_kit.schema import compile_css, compile_schema, extract_fields, benchmark_schema_extraction
+
+
+TOP_BLOCK = compile_css(".commercial-unit-desktop-top")
+RIGHT_BLOCK = compile_css(".commercial-unit-desktop-rhs")
+SHOPPING_AD = compile_css(".mnr-c.pla-unit")
+
+TOP_BLOCK_FIELDS = {
+    "title": ".pymv4e::text",
+    "link": ".pla-unit-title-link::attr(href)",
+    "price": ".e10twf::text",
+    "source": ".LbUacb .zPEcBd::text"
+}
+TOP_BLOCK_SCHEMA = compile_schema(TOP_BLOCK_FIELDS)
+
+RIGHT_BLOCK_FIELDS = {
+    "title": ".pymv4e::text",
+    "link": ".pla-unit-title-link::attr(href)",
+    "price": ".e10twf::text",
+    "source": ".LbUacb::text, .zPEcBd::text"
+}
+RIGHT_BLOCK_SCHEMA = compile_schema(RIGHT_BLOCK_FIELDS)
+
+
+def parse_shopping_ads(selector) -> list[dict]:
+    data = []
+
+    # if top block shopping ads appears
+    if TOP_BLOCK(selector.root):
+        block_position, schema = "top_block", TOP_BLOCK_SCHEMA
+    # if right block shopping ads appears
+    elif RIGHT_BLOCK(selector.root):
+        block_position, schema = "right_block", RIGHT_BLOCK_SCHEMA
+    else:
+        return data
+
+    for index, shopping_ad in enumerate(SHOPPING_AD(selector.root), start=1):
+        data.append({
+            "position": index,
+            "block_position": block_position,
+            **extract_fields(schema, shopping_ad)
+            })
+
+    return data
+
+
+def fake_shopping_ads_page(ads_count: int = 100) -> str:
+    # top block shopping ads markup
+    products = "".join(f"""
+        <div class="mnr-c pla-unit">
+            <a class="pla-unit-title-link" href="https://store{index}.example.com/rtx-3080-{index}"><div class="pymv4e">GeForce RTX 3080 {index}</div></a>
+            <div class="e10twf">${699 + index}.99</div>
+            <div class="LbUacb"><span class="zPEcBd">Store {index}</span></div>
+        </div>""" for index in range(ads_count))
+    return f'<html><body><div class="commercial-unit-desktop-top">{products}</div></body></html>'
+
 
 # https://docs.python-requests.org/en/master/user/quickstart/#passing-parameters-in-urls
 params = {
@@ -16,44 +75,12 @@ headers = {
 html = requests.get("https://www.google.com/search", params=params, headers=headers, timeout=30)
 selector = Selector(html.text)
 
-data = []
-
-# if top block shopping ads appears
-if selector.css(".commercial-unit-desktop-top").get():
-    for index, shopping_ad in enumerate(selector.css(".mnr-c.pla-unit"), start=1):
-        title = shopping_ad.css(".pymv4e::text").get()
-        link = shopping_ad.css(".pla-unit-title-link::attr(href)").get()
-        price = shopping_ad.css(".e10twf::text").get()
-        source = shopping_ad.css(".LbUacb .zPEcBd::text").get()
-
-        data.append({
-            "position": index,
-            "block_position": "top_block",
-            "title": title,
-            "link": link,
-            "price": price,
-            "source": source
-            })
-
-# if right block shopping ads appears
-elif selector.css(".commercial-unit-desktop-rhs").get():
-    for index, shopping_ad in enumerate(selector.css(".mnr-c.pla-unit"), start=1):
-        title = shopping_ad.css(".pymv4e::text").get()
-        link = shopping_ad.css(".pla-unit-title-link::attr(href)").get()
-        price = shopping_ad.css(".e10twf::text").get()
-        source = shopping_ad.css(".LbUacb::text, .zPEcBd::text").get()
-
-        data.append({
-            "position": index,
-            "block_position": "right_block",
-            "title": title,
-            "link": link,
-            "price": price,
-            "source": source
-            })
+data = parse_shopping_ads(selector)
 
 print(json.dumps(data, indent=2, ensure_ascii=False))
 
+# benchmark_schema_extraction(fake_shopping_ads_page(100), ".mnr-c.pla-unit", TOP_BLOCK_FIELDS, iterations=200)
+
 """
 Top block:
 [
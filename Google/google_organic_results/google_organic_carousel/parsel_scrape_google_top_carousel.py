@@ -1,6 +1,11 @@
-import requests, re, json
+import requests, json, os, sys
 from parsel import Selector
 
+# scraper_kit/ with helpers shared between scrapers is at the repository root
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+from scraper_kit.schema import compile_css, compile_schema, extract_fields, benchmark_schema_extraction
+from scraper_kit.thumbnails import ThumbnailIndex, ThumbnailStore, fake_escaped_thumbnail
+
 # https://docs.python-requests.org/en/master/user/quickstart/#custom-headers
 headers = {
     "User-agent":
@@ -13,40 +18,72 @@ params = {
     }
 
 
-def parsel_get_top_carousel():
-    html = requests.get('https://www.google.com/search', headers=headers, params=params)
-    selector = Selector(text=html.text)
+CAROUSEL_NAME = compile_css(".yKMVIe::text")
+SCRIPT_TEXT = compile_css("script::text")
+THUMBNAIL_ID = compile_css("img.d7ENZc::attr(id)")
+CAROUSEL_RESULT = compile_css(".QjXCXd.X8kvh")
 
-    carousel_name = selector.css(".yKMVIe::text").get()
-    all_script_tags = selector.css("script::text").getall()
+CAROUSEL_FIELDS = {
+    "title": ".JjtOHd::text",
+    "link": ".QjXCXd div a::attr(href)",
+    "extensions": [".ellip.AqEFvb::text"]
+}
+CAROUSEL_SCHEMA = compile_schema(CAROUSEL_FIELDS)
 
-    data = {f"{carousel_name}": []}
 
-    decoded_thumbnails = []
+def parse_top_carousel(selector, thumbnail_store: ThumbnailStore = None) -> dict:
+    carousel_name = CAROUSEL_NAME(selector.root)
+    carousel_name = carousel_name[0] if carousel_name else None
+    thumbnail_index = ThumbnailIndex(SCRIPT_TEXT(selector.root), thumbnail_store=thumbnail_store)
 
-    for _id in selector.css("img.d7ENZc::attr(id)").getall():
-        # https://regex101.com/r/YGtoJn/1
-        thumbnails = re.findall(r"var\s?s=\'([^']+)\';var\s?ii=\['{_id}'];".format(_id=_id), str(all_script_tags))
-        thumbnail = [
-            bytes(bytes(img, "ascii").decode("unicode-escape"), "ascii").decode("unicode-escape") for img in thumbnails
-            ]
-        decoded_thumbnails.append("".join(thumbnail))
+    data = {f"{carousel_name}": []}
+
+    # looked up while zip() asks for the next one, decoded (or written to the store) only for results that are kept
+    escaped_thumbnails = (thumbnail_index.escaped_by_id.get(_id) for _id in THUMBNAIL_ID(selector.root))
 
-    for result, image in zip(selector.css('.QjXCXd.X8kvh'), decoded_thumbnails):
+    for result, escaped_thumbnail in zip(CAROUSEL_RESULT(selector.root), escaped_thumbnails):
+        carousel_result = extract_fields(CAROUSEL_SCHEMA, result)
 
-        title = result.css(".JjtOHd::text").get()
-        link = f"https://www.google.com{result.css('.QjXCXd div a::attr(href)').get()}"
-        extensions = result.css(".ellip.AqEFvb::text").getall()
+        title = carousel_result["title"]
+        link = f"https://www.google.com{carousel_result['link']}"
+        extensions = carousel_result["extensions"]
 
         if title and link and extensions is not None:
             data[carousel_name].append({
                 "title": title,
                 "link": link,
                 "extensions": extensions,
-                "thumbnail": image
+                "thumbnail": thumbnail_index.decode(escaped_thumbnail) or ""
                 })
 
+    return data
+
+
+def parsel_get_top_carousel(thumbnail_store: ThumbnailStore = None):
+    html = requests.get('https://www.google.com/search', headers=headers, params=params)
+    selector = Selector(text=html.text)
+
+    data = parse_top_carousel(selector, thumbnail_store=thumbnail_store)
+
     print(json.dumps(data, indent=2, ensure_ascii=False))
 
 
-parsel_get_top_carousel()
\ No newline at end of file
+def fake_top_carousel_page(results_count: int = 100) -> str:
+    # top carousel markup with a base64 thumbnail in an inline script for every result
+    results = "".join(f"""
+        <div class="QjXCXd X8kvh"><div><a href="/search?q=actor+{index}">
+            <img class="d7ENZc" id="dimg_{index}">
+            <div class="JjtOHd">Actor {index}</div>
+            <div class="ellip AqEFvb">Character {index}</div>
+        </a></div></div>""" for index in range(results_count))
+    scripts = "".join(
+        f"<script>(function(){{var s='data:image/jpeg;base64,{fake_escaped_thumbnail(index)}';var ii=['dimg_{index}'];_setImagesSrc(ii,s);}})();</script>"
+        for index in range(results_count)
+    )
+    return f'<html><body><span class="yKMVIe">Dune</span>{results}{scripts}</body></html>'
+
+
+parsel_get_top_carousel()
+# parsel_get_top_carousel(thumbnail_store=ThumbnailStore("carousel_thumbnails"))
+
+# benchmark_schema_extraction(fake_top_carousel_page(100), ".QjXCXd.X8kvh", CAROUSEL_FIELDS)
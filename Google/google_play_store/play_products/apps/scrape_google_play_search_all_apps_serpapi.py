@@ -1,5 +1,9 @@
 from serpapi import GoogleSearch
-import json, os
+import json, os, sys
+
+# scraper_kit/ with helpers shared between scrapers is at the repository root
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "..")))
+from scraper_kit.serpapi_cache import CachedSearch
 
 
 def serpapi_scrape_all_google_play_store_apps():
@@ -12,8 +16,8 @@ def serpapi_scrape_all_google_play_store_apps():
         "q": "maps"                       # search qeury
     }
 
-    search = GoogleSearch(params)  # where data extracts
-    results = search.get_dict()    # JSON -> Python dictionary
+    search = CachedSearch(GoogleSearch(params))  # where data extracts, repeated queries are served from cache
+    results = search.get_dict()                  # JSON -> Python dictionary
 
     apps_data = []
 
@@ -29,5 +33,7 @@ def serpapi_scrape_all_google_play_store_apps():
                 })
 
     print(json.dumps(apps_data, indent=2, ensure_ascii=False))
-    
+    print(f"cache: {CachedSearch.stats}")
+
+
 serpapi_scrape_all_google_play_store_apps()
\ No newline at end of file
@@ -1,65 +1,263 @@
-import time, json
-from playwright.sync_api import sync_playwright
+import time, json, os, sys
+from datetime import datetime, timezone
+from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
 
+# scraper_kit/ with helpers shared between scrapers is at the repository root
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "..")))
+from scraper_kit.playwright_dom import extract_records, scroll_to_end
 
-def run(playwright):
-    # currently runs only with headful mode. 
-    page = playwright.chromium.launch(headless=True).new_page()
-    page.goto("https://play.google.com/store/apps/details?id=com.instantbrands.app&gl=US&showAllReviews=true")
 
-    page.mouse.wheel(deltaY=50)
-    last_height = page.evaluate("() => document.body.scrollHeight")  # scrollHeight: 5879
+# every "load more" returns the next reviews batch from this RPC
+# https://play.google.com/_/PlayStoreUi/data/batchexecute?rpcids=UsvDTd&...
+REVIEWS_RPC_ID = "UsvDTd"
 
-    reached_end = False
-    while not reached_end:
-        if page.query_selector('[jsname=i3y3Ic]'):
-            page.query_selector('[jsname=i3y3Ic]').click(force=True)
-            time.sleep(4)
-        else:
-            page.keyboard.press("End")
-            time.sleep(4)
+REPLAY_FIXTURE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "google_play_reviews_replay_fixture.json")
+
+# stand-in for the app page during replay: one server-rendered review that the first batch returns again
+# and a "Show More" button that requests the next batch
+REPLAY_PAGE = """
+<html><body>
+  <div class="zc7KVe" data-review-id="gp:AOqpTOFakeReview0000">
+    <span class="X43Kjb">Fake User 0</span>
+    <span class="vDSMeb bAhLNe"><img src="https://play-lh.googleusercontent.com/a/fake-avatar-0"></span>
+    <span jsname="fbQN7e">Fake review text number 0.</span>
+    <div class="jUL89d y92BAb">0</div>
+    <div class="pf5lIe"><div role="img" aria-label="Rated 1 stars out of five stars"></div></div>
+    <span class="p2TkOb">June 12, 2022</span>
+  </div>
+  <div jsname="i3y3Ic" onclick="fetch('/_/PlayStoreUi/data/batchexecute?rpcids=UsvDTd', {method: 'POST'})">Show More</div>
+</body></html>
+"""
+
+
+# field: (CSS selector inside the item, "text" or attribute name), missing elements become None
+REVIEW_SCHEMA = {
+    "user_name": (".X43Kjb", "text"),
+    "user_avatar": (".vDSMeb.bAhLNe img", "src"),
+    "user_comment": ("[jsname=fbQN7e]", "text"),
+    "comment_likes": (".jUL89d.y92BAb", "text"),
+    "app_rating": (".pf5lIe div[role=img]", "aria-label"),
+    "comment_date": (".p2TkOb", "text")
+}
+
+# the review id isn't a part of the results, it only tells a rendered review apart from the same one in a batch
+RENDERED_REVIEW_SCHEMA = {"review_id": ("", "data-review-id"), **REVIEW_SCHEMA}
+
+
+def extract_reviews_from_dom(page, schema: dict = REVIEW_SCHEMA):
+    app_user_comments = []
+
+    # all reviews in one page.evaluate instead of 6+ query_selector/inner_text round trips per review
+    for comment in extract_records(page, ".zc7KVe", schema):
+        # "Rated 4 stars out of five stars" -> "4"
+        comment["app_rating"] = comment["app_rating"].split(" ")[1] if comment["app_rating"] else None
+
+        if comment["user_name"] and comment["user_avatar"] and comment["user_comment"] and comment["comment_likes"] and comment["app_rating"]:
+            app_user_comments.append(comment)
+
+    return app_user_comments
+
+
+def is_reviews_batch(response) -> bool:
+    return "batchexecute" in response.url and REVIEWS_RPC_ID in response.url
 
-        new_height = page.evaluate("() => document.body.scrollHeight")
-        if new_height == last_height:
-            reached_end = True
+
+def decode_reviews_batch(body: str) -> tuple[list[dict], str]:
+    """
+    batchexecute answer looks like:
+    )]}'
+    <length>
+    [["wrb.fr","UsvDTd","<reviews JSON as a string>",null,null,null,"generic"],["di",42],...]
+    <length>
+    [["e",4,null,null,988]]
+
+    Reviews JSON is [[review, ...], null, [null, ..., "<next page token>"]], the last batch has null instead of the token list.
+    Returns the reviews and the next page token, None when there are no more reviews.
+    """
+
+    reviews = []
+    next_page_token = None
+
+    for line in body.splitlines():
+        # lengths and the )]}' anti-XSSI prefix are skipped
+        if not line.startswith("[["):
+            continue
+
+        for envelope in json.loads(line):
+            if envelope[0] != "wrb.fr" or envelope[1] != REVIEWS_RPC_ID or not envelope[2]:
+                continue
+
+            reviews_data = json.loads(envelope[2])
+            next_page_token = reviews_data[-1][-1] if reviews_data[-1] else None
+
+            for review in reviews_data[0] or []:
+                review_date = datetime.fromtimestamp(review[5][0], tz=timezone.utc)
+
+                reviews.append({
+                    "review_id": review[0],
+                    "user_name": review[1][0],
+                    "user_avatar": review[1][1][3][2],
+                    "user_comment": review[4],
+                    "comment_likes": str(review[6]) if review[6] is not None else None,  # a missing count stays None, not "None"
+                    "app_rating": str(review[2]),
+                    "comment_date": f"{review_date:%B} {review_date.day}, {review_date.year}"  # same format as on the page: June 13, 2022
+                })
+
+    return reviews, next_page_token
+
+
+def load_more_reviews(page):
+    if page.query_selector('[jsname=i3y3Ic]'):
+        page.query_selector('[jsname=i3y3Ic]').click(force=True)
+    else:
+        page.keyboard.press("End")
+
+
+def replay_reviews_batches(page, fixture_path: str = REPLAY_FIXTURE_PATH):
+    # serves the app page and the recorded batches locally, nothing leaves the browser
+    # https://playwright.dev/python/docs/network#modify-responses
+    with open(fixture_path, encoding="utf-8") as fixture_file:
+        batches = iter(json.load(fixture_file)["batches"])
+
+    def fulfill_batch(route):
+        body = next(batches, None)
+        if body is None:
+            route.abort()  # no more recorded batches -> no response, same as the end of the reviews
         else:
-            last_height = new_height
+            route.fulfill(status=200, content_type="application/json; charset=utf-8", body=body)
+
+    page.route("https://play.google.com/store/apps/details*", lambda route: route.fulfill(status=200, content_type="text/html", body=REPLAY_PAGE))
+    page.route("**/batchexecute*", fulfill_batch)
+
+
+def run_intercept(playwright, app_id: str = "com.instantbrands.app", batch_timeout: float = 10, record_path: str = None, replay_path: str = None):
+    """
+    Reads reviews from the batchexecute responses instead of the rendered DOM.
+
+    The next batch is requested as soon as the previous one arrives, so there is no fixed time.sleep(4) per step,
+    and the crawl stops at the batch without a next page token. A batch that doesn't come within `batch_timeout` seconds
+    also stops it, with a warning that the reviews may be incomplete.
+    Reviews have the same fields as the ones read from the DOM, "review_id" is only used to skip duplicates,
+    including rendered reviews that a batch returns again.
+    `record_path` saves raw batches in the replay fixture format, `replay_path` plays such a fixture back without network.
+    """
+
+    browser = playwright.chromium.launch(headless=True)
+    page = browser.new_page()
+
+    if replay_path:
+        replay_reviews_batches(page, replay_path)
+
+    page.goto(f"https://play.google.com/store/apps/details?id={app_id}&gl=US&showAllReviews=true")
 
     app_user_comments = []
+    seen_review_ids = set()
+    batches = []
 
-    for comment in page.query_selector_all(".zc7KVe"):
-        user_name = comment.query_selector(".X43Kjb").inner_text()
-        print(user_name)
+    def add_review(review: dict):
+        review_id = review.pop("review_id")
+        if review_id is not None:
+            if review_id in seen_review_ids:
+                return
+            seen_review_ids.add(review_id)
+        app_user_comments.append(review)
 
-        try:
-            user_avatar = comment.query_selector(".vDSMeb.bAhLNe img").get_attribute("src")
-        except: user_avatar = None
+    # first reviews are rendered with the page, the rest come in batches
+    for review in extract_reviews_from_dom(page, RENDERED_REVIEW_SCHEMA):
+        add_review(review)
 
-        try:
-            user_comment = comment.query_selector("[jsname=fbQN7e]").inner_text()
-        except: user_comment = None
+    start = time.perf_counter()
 
+    reviews_is_present = True
+    while reviews_is_present:
         try:
-            comment_likes = comment.query_selector(".jUL89d.y92BAb").inner_text()
-        except: comment_likes = None
+            # https://playwright.dev/python/docs/api/class-page#page-wait-for-response
+            with page.expect_response(is_reviews_batch, timeout=batch_timeout * 1000) as response_info:
+                load_more_reviews(page)
+            body = response_info.value.text()
+        except PlaywrightTimeoutError:
+            print(f"no reviews batch within {batch_timeout}s before the last one, reviews may be incomplete")
+            break
 
-        try:
-            app_rating = comment.query_selector(".pf5lIe div[role=img]").get_attribute("aria-label").split(" ")[1]
-        except: app_rating = None
+        batches.append(body)
+        reviews, next_page_token = decode_reviews_batch(body)
 
-        try:
-            comment_date = comment.query_selector(".p2TkOb").inner_text()
-        except: comment_date = None
-
-        if user_name and user_avatar and user_comment and comment_likes and app_rating and comment_date not in app_user_comments and not None:
-            app_user_comments.append({
-                "user_name": user_name,
-                "user_avatar": user_avatar,
-                "user_comment": user_comment,
-                "comment_likes": comment_likes,
-                "app_rating": app_rating,
-                "comment_date": comment_date
-            })
+        for review in reviews:
+            add_review(review)
+
+        print(f"batch {len(batches)}: {len(app_user_comments)} reviews")
+
+        # the last batch comes without a next page token
+        reviews_is_present = next_page_token is not None
+
+    print(f"{len(batches)} batches in {time.perf_counter() - start:.2f}s")
+
+    if record_path:
+        with open(record_path, "w", encoding="utf-8") as fixture_file:
+            json.dump({"batches": batches}, fixture_file, indent=2)
+
+    browser.close()
+
+    return app_user_comments
+
+
+def check_run_intercept_locally():
+    # replays google_play_reviews_replay_fixture.json: 1 rendered review + 3 batches of 4 reviews, the last one without a next page token;
+    # the first batch returns the rendered review again and one review in the second batch has no likes count
+    with sync_playwright() as playwright:
+        app_user_comments = run_intercept(playwright, batch_timeout=2, replay_path=REPLAY_FIXTURE_PATH)
+
+    print(json.dumps(app_user_comments, indent=2))
+    assert len(app_user_comments) == 12, len(app_user_comments)
+    assert all(comment.keys() == REVIEW_SCHEMA.keys() for comment in app_user_comments)
+    assert [comment["comment_likes"] for comment in app_user_comments].count(None) == 1
+
+
+def benchmark_dom_extraction_locally(reviews_count: int = 2000):
+    # static page with `reviews_count` copies of the rendered review markup
+    review_html = REPLAY_PAGE[REPLAY_PAGE.index('<div class="zc7KVe">'):REPLAY_PAGE.index('<div jsname="i3y3Ic"')]
+
+    with sync_playwright() as playwright:
+        browser = playwright.chromium.launch(headless=True)
+        page = browser.new_page()
+        page.set_content(f"<html><body>{review_html * reviews_count}</body></html>")
+
+        def per_element():
+            # previous approach: a browser round trip for every query_selector, inner_text and get_attribute
+            app_user_comments = []
+            for comment in page.query_selector_all(".zc7KVe"):
+                app_user_comments.append({
+                    "user_name": comment.query_selector(".X43Kjb").inner_text(),
+                    "user_avatar": comment.query_selector(".vDSMeb.bAhLNe img").get_attribute("src"),
+                    "user_comment": comment.query_selector("[jsname=fbQN7e]").inner_text(),
+                    "comment_likes": comment.query_selector(".jUL89d.y92BAb").inner_text(),
+                    "app_rating": comment.query_selector(".pf5lIe div[role=img]").get_attribute("aria-label").split(" ")[1],
+                    "comment_date": comment.query_selector(".p2TkOb").inner_text()
+                })
+            return app_user_comments
+
+        results = {}
+        for name, extract in [("query_selector per field", per_element), ("one page.evaluate", lambda: extract_reviews_from_dom(page))]:
+            start = time.perf_counter()
+            results[name] = extract()
+            print(f"{name}: {time.perf_counter() - start:.2f}s for {len(results[name])} reviews")
+
+        browser.close()
+
+    print(f"same reviews: {results['query_selector per field'] == results['one page.evaluate']}")
+
+
+def run(playwright):
+    # currently runs only with headful mode. 
+    page = playwright.chromium.launch(headless=True).new_page()
+    page.goto("https://play.google.com/store/apps/details?id=com.instantbrands.app&gl=US&showAllReviews=true")
+
+    page.mouse.wheel(deltaY=50)
+
+    # next step starts as soon as new reviews are rendered instead of after time.sleep(4)
+    scroll_to_end(page, load_more_selector="[jsname=i3y3Ic]", idle_timeout=10)
+
+    app_user_comments = extract_reviews_from_dom(page)
 
     print(json.dumps(app_user_comments, indent=2))
 
@@ -67,4 +265,9 @@ def run(playwright):
 
 
 with sync_playwright() as playwright:
-    run(playwright)
\ No newline at end of file
+    run(playwright)
+    # print(json.dumps(run_intercept(playwright), indent=2))
+    # print(json.dumps(run_intercept(playwright, record_path="google_play_reviews_replay_fixture.json"), indent=2))
+
+# check_run_intercept_locally()
+# benchmark_dom_extraction_locally()
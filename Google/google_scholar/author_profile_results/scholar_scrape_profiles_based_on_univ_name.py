@@ -1,65 +1,21 @@
-from parsel import Selector
-import requests, re, json, os
+import json, os, sys
 from serpapi import GoogleSearch
 from urllib.parse import urlsplit, parse_qsl
 
-
-def scrape_all_profiles_from_university(label: str, university_name: str) -> list[dict[str]]:
-    # https://docs.python-requests.org/en/master/user/quickstart/#passing-parameters-in-urls
-    params = {
-        "view_op": "search_authors",                       # author results
-        "mauthors": f'label:{label} "{university_name}"',  # search query
-        "hl": "en",                                        # language
-        "astart": 0,                                       # page number
-    }
-
-    # https://docs.python-requests.org/en/master/user/quickstart/#custom-headers
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/98.0.4758.87 Safari/537.36",
-        }
-
-    profile_results = []
-
-    profiles_is_present = True
-    while profiles_is_present:
-
-        html = requests.get("https://scholar.google.com/citations", params=params, headers=headers, timeout=30)
-        select = Selector(html.text)
-
-        print(f"extracting authors at page #{params['astart']}.")
-
-        for profile in select.css(".gs_ai_chpr"):
-            name = profile.css(".gs_ai_name a::text").get()
-            link = f'https://scholar.google.com{profile.css(".gs_ai_name a::attr(href)").get()}'
-            affiliations = profile.css(".gs_ai_aff").xpath("normalize-space()").get()
-            email = profile.css(".gs_ai_eml::text").get()
-            cited_by = re.search(r"\d+", profile.xpath('//div[@class="gs_ai_cby"]').get()).group()  # Cited by 17143 -> 17143
-            interests = profile.css(".gs_ai_one_int::text").getall()
-
-            profile_results.append({
-                "profile_name": name,
-                "profile_link": link,
-                "profile_affiliations": affiliations,
-                "profile_email": email,
-                "profile_city_by_count": cited_by,
-                "profile_interests": interests,
-                })
-
-        # if next page token is present -> update next page token and increment 10 to get the next page
-        if select.css("button.gs_btnPR::attr(onclick)").get():
-            # https://regex101.com/r/e0mq0C/1
-            params["after_author"] = re.search(r"after_author\\x3d(.*)\\x26",
-                                               select.css("button.gs_btnPR::attr(onclick)").get()).group(1)  # -> XB0HAMS9__8J
-            params["astart"] += 10
-        else:
-            profiles_is_present = False
-
-    return profile_results
+# scraper_kit/ with helpers shared between scrapers is at the repository root
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+from scraper_kit.scholar_profiles import (scrape_all_profiles_from_university, scrape_all_profiles_from_universities,
+                                          benchmark_serial_vs_pipelined, benchmark_serial_vs_pipelined_locally)
+from scraper_kit.serpapi_cache import CachedSearch, check_cached_search_locally
 
 
 # print(scrape_all_profiles_from_university(label="Deep_Learning", university_name="Harvard University"))
 print(json.dumps(scrape_all_profiles_from_university(label="Deep_Learning", university_name="Harvard University"), indent=2))
 
+# print(json.dumps(scrape_all_profiles_from_universities([("Deep_Learning", "Harvard University"), ("Deep_Learning", "Stanford University")]), indent=2))
+# benchmark_serial_vs_pipelined([("Deep_Learning", "Harvard University"), ("Deep_Learning", "Stanford University"), ("biology", "Harvard University")])
+# benchmark_serial_vs_pipelined_locally()
+
 
 def serpapi_scrape_all_profiles_from_university(label: str, university_name: str) -> list[dict[str]]:
     params = {
@@ -67,7 +23,7 @@ def serpapi_scrape_all_profiles_from_university(label: str, university_name: str
         "engine": "google_scholar_profiles",                # profile results search engine
         "mauthors": f'label:{label} "{university_name}"',   # search query
     }
-    search = GoogleSearch(params)
+    search = CachedSearch(GoogleSearch(params))  # repeated queries are served from cache
 
     profile_results_data = []
 
@@ -105,6 +61,11 @@ def serpapi_scrape_all_profiles_from_university(label: str, university_name: str
         else:
             profiles_is_present = False
 
+    print(f"cache: {CachedSearch.stats}")
+
     return profile_results_data
 
 # print(json.dumps(serpapi_scrape_all_profiles_from_university(label="Deep_Learning", university_name="Harvard University"), indent=2))
+
+
+# check_cached_search_locally()
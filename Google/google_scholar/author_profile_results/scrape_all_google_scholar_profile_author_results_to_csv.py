@@ -1,17 +1,28 @@
 import os, json
 from serpapi import GoogleSearch
 from urllib.parse import urlsplit, parse_qsl
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 
 
-def profile_results():
-    print("Extracting profile results..")
+# profile results for every query that was already crawled: {cache key: profiles}
+profile_results_cache = {}
+
 
+def profile_results(query: str = "blizzard"):
     params = {
         "api_key": os.getenv("API_KEY"),      # SerpApi API key
         "engine": "google_scholar_profiles",  # profile results search engine
-        "mauthors": "blizzard",               # search query
+        "mauthors": query,                    # search query
     }
+
+    # api_key doesn't change the results, so it's left out of the key
+    cache_key = tuple(sorted((key, value) for key, value in params.items() if key != "api_key"))
+    if cache_key in profile_results_cache:
+        return profile_results_cache[cache_key]
+
+    print("Extracting profile results..")
+
     search = GoogleSearch(params)
 
     profile_results_data = []
@@ -49,121 +60,130 @@ def profile_results():
         else:
             profiles_is_present = False
 
+    profile_results_cache[cache_key] = profile_results_data
+
     return profile_results_data
 
 
-def author_results():
-    print("extracting author results..")
+def author_result(author_id: str):
+    print(f"Parsing {author_id} author ID.")
 
-    author_results_data = []
+    params = {
+        "api_key": os.getenv("API_KEY"),      # SerpApi API key
+        "engine": "google_scholar_author",    # author results search engine
+        "author_id": author_id,               # search query
+        "hl": "en"
+    }
+    search = GoogleSearch(params)
+    results = search.get_dict()
+
+    thumbnail = results.get("author").get("thumbnail")
+    name = results.get("author").get("name")
+    affiliations = results.get("author").get("affiliations")
+    email = results.get("author").get("email")
+    website = results.get("author").get("website")
+    interests = results.get("author").get("interests")
+
+    cited_by_table = results.get("cited_by", {}).get("table")
+    cited_by_graph = results.get("cited_by", {}).get("graph")
+
+    public_access_link = results.get("public_access", {}).get("link")
+    available_public_access = results.get("public_access", {}).get("available")
+    not_available_public_access = results.get("public_access", {}).get("not_available")
+    co_authors = results.get("co_authors")
+
+    return {
+        "thumbnail": thumbnail,
+        "name": name,
+        "affiliations": affiliations,
+        "email": email,
+        "website": website,
+        "interests": interests,
+        "cited_by_table": cited_by_table,
+        "cited_by_graph": cited_by_graph,
+        "public_access_link": public_access_link,
+        "available_public_access": available_public_access,
+        "not_available_public_access": not_available_public_access,
+        "co_authors": co_authors
+    }
 
-    for author_id in profile_results():
 
-        print(f"Parsing {author_id['author_id']} author ID.")
+def author_articles(author_id: str):
+    print(f"Parsing articles of {author_id} author ID.")
+
+    author_article_results_data = []
+
+    params = {
+        "api_key": os.getenv("API_KEY"),     # SerpApi API key
+        "engine": "google_scholar_author",   # author results search engine
+        "hl": "en",                          # language
+        "sort": "pubdate",                   # sort by year
+        "author_id": author_id               # search query
+    }
+    search = GoogleSearch(params)
 
-        params = {
-            "api_key": os.getenv("API_KEY"),      # SerpApi API key
-            "engine": "google_scholar_author",    # author results search engine
-            "author_id": author_id["author_id"],  # search query
-            "hl": "en"
-        }
-        search = GoogleSearch(params)
+    articles_is_present = True
+    while articles_is_present:
         results = search.get_dict()
 
-        thumbnail = results.get("author").get("thumbnail")
-        name = results.get("author").get("name")
-        affiliations = results.get("author").get("affiliations")
-        email = results.get("author").get("email")
-        website = results.get("author").get("website")
-        interests = results.get("author").get("interests")
-
-        cited_by_table = results.get("cited_by", {}).get("table")
-        cited_by_graph = results.get("cited_by", {}).get("graph")
-
-        public_access_link = results.get("public_access", {}).get("link")
-        available_public_access = results.get("public_access", {}).get("available")
-        not_available_public_access = results.get("public_access", {}).get("not_available")
-        co_authors = results.get("co_authors")
-
-        author_results_data.append({
-            "thumbnail": thumbnail,
-            "name": name,
-            "affiliations": affiliations,
-            "email": email,
-            "website": website,
-            "interests": interests,
-            "cited_by_table": cited_by_table,
-            "cited_by_graph": cited_by_graph,
-            "public_access_link": public_access_link,
-            "available_public_access": available_public_access,
-            "not_available_public_access": not_available_public_access,
-            "co_authors": co_authors
-        })
-
-    return author_results_data
-
-
-def all_author_articles():
-    author_article_results_data = []
+        for article in results.get("articles", []):
+            title = article.get("title")
+            link = article.get("link")
+            citation_id = article.get("citation_id")
+            authors = article.get("authors")
+            publication = article.get("publication")
+            cited_by_value = article.get("cited_by", {}).get("value")
+            cited_by_link = article.get("cited_by", {}).get("link")
+            cited_by_cites_id = article.get("cited_by", {}).get("cites_id")
+            year = article.get("year")
+
+            author_article_results_data.append({
+                "article_title": title,
+                "article_link": link,
+                "article_year": year,
+                "article_citation_id": citation_id,
+                "article_authors": authors,
+                "article_publication": publication,
+                "article_cited_by_value": cited_by_value,
+                "article_cited_by_link": cited_by_link,
+                "article_cited_by_cites_id": cited_by_cites_id,
+            })
 
-    for index, author_id in enumerate(profile_results(), start=1):
-
-        print(f"Parsing author #{index} with {author_id['author_id']} author ID.")
-
-        params = {
-            "api_key": os.getenv("API_KEY"),     # SerpApi API key
-            "engine": "google_scholar_author",   # author results search engine
-            "hl": "en",                          # language
-            "sort": "pubdate",                   # sort by year
-            "author_id": author_id["author_id"]  # search query
-        }
-        search = GoogleSearch(params)
-
-        articles_is_present = True
-        while articles_is_present:
-            results = search.get_dict()
-
-            for article in results.get("articles", []):
-                title = article.get("title")
-                link = article.get("link")
-                citation_id = article.get("citation_id")
-                authors = article.get("authors")
-                publication = article.get("publication")
-                cited_by_value = article.get("cited_by", {}).get("value")
-                cited_by_link = article.get("cited_by", {}).get("link")
-                cited_by_cites_id = article.get("cited_by", {}).get("cites_id")
-                year = article.get("year")
-
-                author_article_results_data.append({
-                    "article_title": title,
-                    "article_link": link,
-                    "article_year": year,
-                    "article_citation_id": citation_id,
-                    "article_authors": authors,
-                    "article_publication": publication,
-                    "article_cited_by_value": cited_by_value,
-                    "article_cited_by_link": cited_by_link,
-                    "article_cited_by_cites_id": cited_by_cites_id,
-                })
-
-            if "next" in results.get("serpapi_pagination", []):
-                search.params_dict.update(dict(parse_qsl(urlsplit(results.get("serpapi_pagination").get("next")).query)))
-            else:
-                articles_is_present = False
+        if "next" in results.get("serpapi_pagination", []):
+            search.params_dict.update(dict(parse_qsl(urlsplit(results.get("serpapi_pagination").get("next")).query)))
+        else:
+            articles_is_present = False
 
     return author_article_results_data
 
 
+def author_results(query: str = "blizzard", max_workers: int = 8):
+    print("extracting author results..")
+
+    author_ids = [profile["author_id"] for profile in profile_results(query)]
+
+    # map() runs up to max_workers authors at once and keeps the profile order
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(author_result, author_ids))
+
+
+def all_author_articles(query: str = "blizzard", max_workers: int = 8):
+    author_ids = [profile["author_id"] for profile in profile_results(query)]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return [article for articles in executor.map(author_articles, author_ids) for article in articles]
+
+
 def save_author_result_to_csv():
     print("Waiting for author results to save..")
-    pd.DataFrame(data=profile_results()).to_csv("google_scholar_author_results.csv", encoding="utf-8", index=False)
+    pd.DataFrame(data=author_results()).to_csv("google_scholar_author_results.csv", encoding="utf-8", index=False)
 
     print("Author Results Saved.")
 
 
 def save_author_articles_to_csv():
     print("Waiting for author articles to save..")
-    pd.DataFrame(data=profile_results()).to_csv("google_scholar_author_articles.csv", encoding="utf-8", index=False)
+    pd.DataFrame(data=all_author_articles()).to_csv("google_scholar_author_articles.csv", encoding="utf-8", index=False)
 
     print("Author Articles Saved.")
 
@@ -173,3 +193,26 @@ def save_profile_results_to_csv():
     pd.DataFrame(data=profile_results()).to_csv("google_scholar_profile_results.csv", encoding="utf-8", index=False)
 
     print("Profile Results Saved.")
+
+
+def save_all_results_to_csv(query: str = "blizzard", max_workers: int = 8):
+    """
+    Crawls profiles once, then author details and articles of every author concurrently,
+    and saves profile, author and article CSVs from that single pass.
+    """
+
+    profiles = profile_results(query)
+    pd.DataFrame(data=profiles).to_csv("google_scholar_profile_results.csv", encoding="utf-8", index=False)
+    print("Profile Results Saved.")
+
+    author_ids = [profile["author_id"] for profile in profiles]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        authors = executor.map(author_result, author_ids)
+        articles = executor.map(author_articles, author_ids)
+
+        pd.DataFrame(data=list(authors)).to_csv("google_scholar_author_results.csv", encoding="utf-8", index=False)
+        print("Author Results Saved.")
+
+        pd.DataFrame(data=[article for author_articles_data in articles for article in author_articles_data]).to_csv("google_scholar_author_articles.csv", encoding="utf-8", index=False)
+        print("Author Articles Saved.")
@@ -1,56 +1,178 @@
 from bs4 import BeautifulSoup
-import requests, lxml
+import requests, lxml, os, csv, json, time, shutil
 import pandas as pd
 
-# https://docs.python-requests.org/en/master/user/quickstart/#passing-parameters-in-urls
-params = {
-    "user": "VjJm3zYAAAAJ",  # user-id
-    "hl": "en",              # language
-    "gl": "us",              # country to search from
-    "cstart": 0,             # articles page. 0 is the first page
-    "pagesize": "100"        # articles per page
-    }
-
-# https://docs.python-requests.org/en/master/user/quickstart/#custom-headers
-headers = {
-    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/72.0.3538.102 Safari/537.36 Edge/18.19582",
-    }
-
-articles = []
-
-articles_is_present = True
-while articles_is_present:
-    # timeout to stop waiting for response after 30 sec
-    html = requests.post("https://scholar.google.com/citations", params=params, headers=headers, timeout=30)
-    soup = BeautifulSoup(html.text, "lxml")
-
-    for index, article in enumerate(soup.select("#gsc_a_b .gsc_a_t"), start=1):
-        article_title = article.select_one(".gsc_a_at").text
-        article_link = f'https://scholar.google.com{article.select_one(".gsc_a_at")["href"]}'
-        article_authors = article.select_one(".gsc_a_at+ .gs_gray").text
-        article_publication = article.select_one(".gs_gray+ .gs_gray").text
-
-        articles.append({
-            "position": f"{int(params['cstart']) + index}",
-            "title": article_title,
-            "link": article_link,
-            "authors": article_authors,
-            "publications": article_publication
-        })
-
-        print(article_title)
-
-        # print(f"article #{int(params['cstart']) + index}",
-        #       article_title,
-        #       article_link,
-        #       article_authors,
-        #       article_publication, sep="\n")
-
-    # this selector is checking for the .class that contains: "There are no articles in this profile."
-    # example link: https://scholar.google.com/citations?user=VjJm3zYAAAAJ&hl=en&cstart=500&pagesize=100
-    if soup.select_one(".gsc_a_e"):
-        articles_is_present = False
-    else:
-        params["cstart"] += 100  # paginate to the next page
-
-    pd.DataFrame(data=articles).to_csv(f"google_scholar_author_{params['user']}_articles.csv", encoding="utf-8", index=False)
+
+class ArticlesSink:
+    """
+    Append-only writer for article pages: CSV, JSONL or Parquet.
+
+    Rows are buffered and written every `batch_size` rows, so every page is written once
+    instead of rewriting the whole CSV after each page. After every write the next `cstart`
+    is saved to "<path>.cstart", which lets a crashed crawl continue from that page.
+    The checkpoint is removed once the crawl finishes, so the next run starts over.
+    Parquet is written as a directory of part files since a closed Parquet file can't be appended to.
+    """
+
+    def __init__(self, path: str, output_format: str = "csv", batch_size: int = 500):
+        if output_format not in ("csv", "jsonl", "parquet"):
+            raise ValueError(f"Unsupported output format: {output_format}. Use csv, jsonl or parquet.")
+
+        self.path = path
+        self.output_format = output_format
+        self.batch_size = batch_size
+        self.checkpoint_path = f"{path}.cstart"
+        self.buffer = []
+        self.next_cstart = self.resume_cstart()
+
+        # nothing to resume -> start over like the old full rewrite did
+        if self.next_cstart == 0 and os.path.isdir(path):
+            shutil.rmtree(path)
+        elif self.next_cstart == 0 and os.path.exists(path):
+            os.remove(path)
+
+    def resume_cstart(self) -> int:
+        # 0 if nothing was written yet, otherwise the first page that wasn't written
+        if not os.path.exists(self.checkpoint_path):
+            return 0
+
+        with open(self.checkpoint_path, encoding="utf-8") as checkpoint_file:
+            return int(checkpoint_file.read() or 0)
+
+    def write_page(self, articles: list[dict], next_cstart: int):
+        self.buffer.extend(articles)
+        self.next_cstart = next_cstart
+
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            if self.output_format == "csv":
+                write_header = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+
+                with open(self.path, "a", newline="", encoding="utf-8") as csv_file:
+                    writer = csv.DictWriter(csv_file, fieldnames=list(self.buffer[0].keys()))
+                    if write_header:
+                        writer.writeheader()
+                    writer.writerows(self.buffer)
+
+            elif self.output_format == "jsonl":
+                with open(self.path, "a", encoding="utf-8") as jsonl_file:
+                    jsonl_file.writelines(json.dumps(article, ensure_ascii=False) + "\n" for article in self.buffer)
+
+            else:
+                os.makedirs(self.path, exist_ok=True)
+                part_number = len([file for file in os.listdir(self.path) if file.endswith(".parquet")])
+                # https://pandas.pydata.org/docs/reference/api/pandas.DataFrame.to_parquet.html
+                pd.DataFrame(data=self.buffer).to_parquet(os.path.join(self.path, f"part-{part_number:05}.parquet"), index=False)
+
+            self.buffer = []
+
+        # checkpoint goes after the rows so a crash can't skip a page, at worst the last batch is written twice
+        with open(self.checkpoint_path, "w", encoding="utf-8") as checkpoint_file:
+            checkpoint_file.write(str(self.next_cstart))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.flush()
+
+        # finished without an error -> nothing to resume
+        if exc_type is None:
+            os.remove(self.checkpoint_path)
+
+
+def scrape_all_author_articles(user_id: str, output_format: str = "csv", batch_size: int = 500):
+    # https://docs.python-requests.org/en/master/user/quickstart/#passing-parameters-in-urls
+    params = {
+        "user": user_id,         # user-id
+        "hl": "en",              # language
+        "gl": "us",              # country to search from
+        "cstart": 0,             # articles page. 0 is the first page
+        "pagesize": "100"        # articles per page
+        }
+
+    # https://docs.python-requests.org/en/master/user/quickstart/#custom-headers
+    headers = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/72.0.3538.102 Safari/537.36 Edge/18.19582",
+        }
+
+    output_path = f"google_scholar_author_{user_id}_articles.{output_format}"
+
+    with ArticlesSink(output_path, output_format=output_format, batch_size=batch_size) as sink:
+        params["cstart"] = sink.next_cstart  # continue after the last written page if the previous run crashed
+
+        articles_is_present = True
+        while articles_is_present:
+            # timeout to stop waiting for response after 30 sec
+            html = requests.post("https://scholar.google.com/citations", params=params, headers=headers, timeout=30)
+            soup = BeautifulSoup(html.text, "lxml")
+
+            articles = []
+
+            for index, article in enumerate(soup.select("#gsc_a_b .gsc_a_t"), start=1):
+                article_title = article.select_one(".gsc_a_at").text
+                article_link = f'https://scholar.google.com{article.select_one(".gsc_a_at")["href"]}'
+                article_authors = article.select_one(".gsc_a_at+ .gs_gray").text
+                article_publication = article.select_one(".gs_gray+ .gs_gray").text
+
+                articles.append({
+                    "position": f"{int(params['cstart']) + index}",
+                    "title": article_title,
+                    "link": article_link,
+                    "authors": article_authors,
+                    "publications": article_publication
+                })
+
+                print(article_title)
+
+                # print(f"article #{int(params['cstart']) + index}",
+                #       article_title,
+                #       article_link,
+                #       article_authors,
+                #       article_publication, sep="\n")
+
+            # this selector is checking for the .class that contains: "There are no articles in this profile."
+            # example link: https://scholar.google.com/citations?user=VjJm3zYAAAAJ&hl=en&cstart=500&pagesize=100
+            if soup.select_one(".gsc_a_e"):
+                articles_is_present = False
+            else:
+                params["cstart"] += 100  # paginate to the next page
+
+            sink.write_page(articles, next_cstart=params["cstart"])
+
+
+def benchmark_articles_sink(articles_count: int = 50_000, page_size: int = 100):
+    # synthetic author: same columns as the scraped articles, no network involved
+    pages = [
+        [{
+            "position": f"{cstart + index}",
+            "title": f"Article title {cstart + index}",
+            "link": f"https://scholar.google.com/citations?view_op=view_citation&citation_for_view=VjJm3zYAAAAJ:{cstart + index}",
+            "authors": "A Author, B Author, C Author",
+            "publications": f"Journal of Benchmarks {(cstart + index) % 50}, 2022"
+        } for index in range(1, page_size + 1)]
+        for cstart in range(0, articles_count, page_size)
+    ]
+
+    # previous approach: whole DataFrame rewritten after every page
+    start = time.perf_counter()
+    articles = []
+    for page in pages:
+        articles.extend(page)
+        pd.DataFrame(data=articles).to_csv("benchmark_rewrite.csv", encoding="utf-8", index=False)
+    print(f"DataFrame rewrite per page: {time.perf_counter() - start:.2f}s, {os.path.getsize('benchmark_rewrite.csv') / 1024 / 1024:.2f} MB")
+
+    for output_format in ("csv", "jsonl", "parquet"):
+        start = time.perf_counter()
+        with ArticlesSink(f"benchmark_sink.{output_format}", output_format=output_format) as sink:
+            for cstart, page in zip(range(page_size, articles_count + page_size, page_size), pages):
+                sink.write_page(page, next_cstart=cstart)
+        print(f"ArticlesSink {output_format}: {time.perf_counter() - start:.2f}s")
+
+
+scrape_all_author_articles(user_id="VjJm3zYAAAAJ")
+# scrape_all_author_articles(user_id="VjJm3zYAAAAJ", output_format="parquet")
+# benchmark_articles_sink()
@@ -1,7 +1,59 @@
-import requests, lxml
+import requests, lxml, time, threading, shutil, io
 from bs4 import BeautifulSoup
+from lxml import etree, html as lxml_html
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 import pandas as pd
 
+SCHOLAR_CITATIONS_URL = "https://scholar.google.com/citations"
+
+# https://docs.python-requests.org/en/master/user/quickstart/#custom-headers
+# whatismybrowser.com/detect/what-is-my-user-agent
+headers = {
+    "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/99.0.4844.88 Safari/537.36"
+    }
+
+# `vq` picks the list: a language, or an English category
+LANGUAGES = ["en", "zh", "pt", "es", "de", "ru", "fr", "ja", "ko", "pl", "uk", "id"]
+ENGLISH_CATEGORIES = {
+    "bus": "Business, Economics & Management",
+    "chm": "Chemical & Material Sciences",
+    "eng": "Engineering & Computer Science",
+    "hea": "Health & Medical Sciences",
+    "hum": "Humanities, Literature & Arts",
+    "lif": "Life Sciences & Earth Sciences",
+    "phy": "Physics & Mathematics",
+    "soc": "Social Sciences"
+}
+
+# table rows compiled once, every cell is read from the same lxml tree
+VENUE_ROWS = etree.XPath("(//table)[1]//tr[td]")
+VENUE_RANK = etree.XPath("string(td[contains(@class, 'gsc_mvt_p')])", smart_strings=False)
+VENUE_TITLE = etree.XPath("string(td[contains(@class, 'gsc_mvt_t')])", smart_strings=False)
+VENUE_H5_INDEX = etree.XPath("string(td[contains(@class, 'gsc_mvt_t')]/following-sibling::td[1])", smart_strings=False)
+VENUE_H5_INDEX_LINK = etree.XPath("td[contains(@class, 'gsc_mvt_t')]/following-sibling::td[1]//a/@href", smart_strings=False)
+VENUE_H5_MEDIAN = etree.XPath("string(td[contains(@class, 'gsc_mvt_t')]/following-sibling::td[2])", smart_strings=False)
+
+
+def parse_top_venues(html: str) -> list[dict]:
+    root = lxml_html.fromstring(html)
+
+    venues = []
+    for row in VENUE_ROWS(root):
+        h5_index_link = VENUE_H5_INDEX_LINK(row)
+
+        venues.append({
+            "rank": int(VENUE_RANK(row).strip().rstrip(".")),
+            "publication": VENUE_TITLE(row).strip(),
+            "h5_index": int(VENUE_H5_INDEX(row)),
+            "h5_index_link": f"https://scholar.google.com/{h5_index_link[0]}" if h5_index_link else None,
+            "h5_median": int(VENUE_H5_MEDIAN(row))
+        })
+
+    return venues
+
 
 def scrape_all_metrics_top_publications():
 
@@ -10,24 +62,138 @@ def scrape_all_metrics_top_publications():
         "hl": "en"  # or other lang: pt, sp, de, ru, fr, ja, ko, pl, uk, id
         }
 
-    # https://docs.python-requests.org/en/master/user/quickstart/#custom-headers
-    # whatismybrowser.com/detect/what-is-my-user-agent
-    headers = {
-        "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/99.0.4844.88 Safari/537.36"
-        }
-
-    html = requests.get("https://scholar.google.com/citations", params=params, headers=headers, timeout=30)
-    soup = BeautifulSoup(html.text, "lxml").find("table")
+    html = requests.get(SCHOLAR_CITATIONS_URL, params=params, headers=headers, timeout=30)
 
-    df = pd.DataFrame(pd.read_html(str(soup))[0])
-    df.drop(df.columns[0], axis=1, inplace=True)
-    df.insert(loc=2,
-              column="h5-index link",
-              value=[f'https://scholar.google.com/{link.a["href"]}' for link in soup.select(".gsc_mvt_t+ td")])
+    # one lxml parse instead of BeautifulSoup + pd.read_html(str(table))
+    df = pd.DataFrame(data=parse_top_venues(html.text)).drop(columns="rank")
+    df.columns = ["Publication", "h5-index", "h5-index link", "h5-median"]
 
     df.to_csv("google_scholar_metrics_top_publications.csv", index=False)
 
     # save to csv for specific language
     # df.to_csv(f"google_scholar_metrics_top_publications_lang_{params['hl']}.csv", index=False)
 
-scrape_all_metrics_top_publications()
\ No newline at end of file
+
+def scrape_top_venues_list(session: requests.Session, language: str, category: str = None, base_url: str = SCHOLAR_CITATIONS_URL) -> list[dict]:
+    params = {
+        "view_op": "top_venues",
+        "hl": "en",
+        "vq": category or language
+        }
+
+    html = session.get(base_url, params=params, headers=headers, timeout=30)
+    html.raise_for_status()
+
+    return [{"language": language, "category": category or "all", **venue} for venue in parse_top_venues(html.text)]
+
+
+def scrape_all_metrics_top_publications_datasets(output_path: str = "google_scholar_metrics_top_publications", output_format: str = "parquet",
+                                                  max_workers: int = 8, base_url: str = SCHOLAR_CITATIONS_URL) -> pd.DataFrame:
+    """
+    Every language list plus every English category, fetched concurrently into one dataset.
+    Parquet is partitioned by language and category: <output_path>/language=en/category=eng/....parquet
+    """
+
+    if output_format not in ("parquet", "csv"):
+        raise ValueError(f"Unsupported output format: {output_format}. Use parquet or csv.")
+
+    venue_lists = [(language, None) for language in LANGUAGES] + [("en", category) for category in ENGLISH_CATEGORIES]
+
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers))
+    session.mount("http://", HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        venues = [venue for venues in executor.map(lambda venue_list: scrape_top_venues_list(session, *venue_list, base_url=base_url), venue_lists) for venue in venues]
+
+    df = pd.DataFrame(data=venues).astype({"rank": "int16", "h5_index": "int32", "h5_median": "int32"})
+
+    if output_format == "parquet":
+        # https://pandas.pydata.org/docs/reference/api/pandas.DataFrame.to_parquet.html
+        shutil.rmtree(output_path, ignore_errors=True)
+        df.to_parquet(output_path, partition_cols=["language", "category"], index=False)
+    else:
+        df.to_csv(f"{output_path}.csv", index=False)
+
+    return df
+
+
+def fake_top_venues_page(vq: str = "en", rows_count: int = 100) -> str:
+    # same table markup as scholar.google.com/citations?view_op=top_venues
+    rows = "".join(f"""
+        <tr><td class="gsc_mvt_p">{rank}.</td><td class="gsc_mvt_t">Journal {vq} {rank}</td>
+        <td class="gsc_mvt_n"><a href="/citations?hl=en&amp;vq={vq}&amp;view_op=list_hcore&amp;venue=venue{rank}.2021" class="gs_ibl gsc_mp_anchor">{500 - rank}</a></td>
+        <td class="gsc_mvt_n"><span class="gs_ibl gsc_mp_anchor">{700 - rank}</span></td></tr>""" for rank in range(1, rows_count + 1))
+
+    return f"""<html><body><div id="gsc_mvt_table_wrapper"><table id="gsc_mvt_table">
+        <tr><th></th><th class="gsc_mvt_t">Publication</th><th class="gsc_mvt_n">h5-index</th><th class="gsc_mvt_n">h5-median</th></tr>
+        {rows}</table></div></body></html>"""
+
+
+def benchmark_top_venues_parsing(iterations: int = 100):
+    html = fake_top_venues_page()
+
+    def bs4_and_read_html():
+        # previous approach: BeautifulSoup parse, then str(table) parsed again by pd.read_html
+        soup = BeautifulSoup(html, "lxml").find("table")
+
+        # StringIO: newer pandas no longer accepts literal HTML in read_html
+        df = pd.DataFrame(pd.read_html(io.StringIO(str(soup)))[0])
+        df.drop(df.columns[0], axis=1, inplace=True)
+        df.insert(loc=2,
+                  column="h5-index link",
+                  value=[f'https://scholar.google.com/{link.a["href"]}' for link in soup.select(".gsc_mvt_t+ td")])
+        return df
+
+    def lxml_once():
+        df = pd.DataFrame(data=parse_top_venues(html)).drop(columns="rank")
+        df.columns = ["Publication", "h5-index", "h5-index link", "h5-median"]
+        return df
+
+    results = {}
+    for name, parse in [("BeautifulSoup + pd.read_html", bs4_and_read_html), ("lxml once", lxml_once)]:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            results[name] = parse()
+        print(f"{name}: {(time.perf_counter() - start) / iterations * 1000:.2f} ms per page")
+
+    print(f"same table: {results['BeautifulSoup + pd.read_html'].astype(str).equals(results['lxml once'].astype(str))}")
+
+
+def benchmark_top_venues_crawl_locally(latency: float = 0.3, max_workers: int = 8):
+    # local stand-in for scholar.google.com/citations that answers after `latency` seconds
+    class TopVenuesStubHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(latency)
+            body = fake_top_venues_page(parse_qs(urlsplit(self.path).query)["vq"][0]).encode()
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), TopVenuesStubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}/citations"
+
+    for workers in (1, max_workers):
+        start = time.perf_counter()
+        df = scrape_all_metrics_top_publications_datasets(output_path="benchmark_top_publications", max_workers=workers, base_url=base_url)
+        print(f"{workers} workers: {time.perf_counter() - start:.2f}s, {len(df)} venues from {df.groupby(['language', 'category']).ngroups} lists")
+
+    server.shutdown()
+
+    print(pd.read_parquet("benchmark_top_publications").dtypes)
+    shutil.rmtree("benchmark_top_publications")
+
+
+scrape_all_metrics_top_publications()
+
+# scrape_all_metrics_top_publications_datasets()
+# scrape_all_metrics_top_publications_datasets(output_format="csv")
+# benchmark_top_venues_parsing()
+# benchmark_top_venues_crawl_locally()
@@ -1,58 +1,31 @@
-import requests, re, json
-from parsel import Selector
+import json, os, sys
 
-def scrape_all_authors_from_university(label: str, university_name: str):
+# scraper_kit/ with helpers shared between scrapers is at the repository root
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "..")))
+from scraper_kit.scholar_profiles import scrape_all_profiles_from_university
 
-    params = {
-        "view_op": "search_authors",                       # author results
-        "mauthors": f'label:{label} "{university_name}"',  # search query
-        "hl": "en",                                        # language
-        "astart": 0                                        # page number
-    }
-
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/98.0.4758.87 Safari/537.36",
-    }
-
-    profile_results = []
 
-    profiles_is_present = True
-    while profiles_is_present:
+def scrape_all_authors_from_university(label: str, university_name: str) -> list[dict]:
+    # every page of author profiles, the pagination lives in scraper_kit/scholar_profiles.py now
+    return scrape_all_profiles_from_university(label=label, university_name=university_name)
 
-        html = requests.get("https://scholar.google.com/citations", params=params, headers=headers, timeout=30)
-        select = Selector(html.text)
-
-        print(f"extracting authors at page #{params['astart']}.")
-
-        for profile in select.css(".gs_ai_chpr"):
-            name = profile.css(".gs_ai_name a::text").get()
-            link = f'https://scholar.google.com{profile.css(".gs_ai_name a::attr(href)").get()}'
-            affiliations = profile.css(".gs_ai_aff").xpath('normalize-space()').get()
-            email = profile.css(".gs_ai_eml::text").get()
-            cited_by = re.search(r"\d+", profile.css(".gs_ai_cby::text").get()).group()  # Cited by 17143 -> 17143
-            interests = profile.css(".gs_ai_one_int::text").getall()
-
-            profile_results.append({
-                "profile_name": name,
-                "profile_link": link,
-                "profile_affiliations": affiliations,
-                "profile_email": email,
-                "profile_city_by_count": cited_by,
-                "profile_interests": interests
-            })
 
-        # if next page token is present -> update next page token and increment 10 to get the next page
-        if select.css("button.gs_btnPR::attr(onclick)").get():
-            # https://regex101.com/r/e0mq0C/1
-            params["after_author"] = re.search(r"after_author\\x3d(.*)\\x26", select.css("button.gs_btnPR::attr(onclick)").get()).group(1)  # -> XB0HAMS9__8J
-            params["astart"] += 10
-        else:
-            profiles_is_present = False
+print(json.dumps(scrape_all_authors_from_university(label="biology", university_name="Stanford University"), indent=2))
 
-    return profile_results
 
+# Pipelined solution: many label/university queries at once over one pooled session, see scraper_kit/scholar_profiles.py
 
-print(json.dumps(scrape_all_authors_from_university(label="biology", university_name="Stanford University"), indent=2))
+# from scraper_kit.scholar_profiles import scrape_all_profiles_from_universities, benchmark_serial_vs_pipelined, benchmark_serial_vs_pipelined_locally
+# from scraper_kit.results_index import ScholarResultsIndex
+# print(json.dumps(scrape_all_profiles_from_universities([("biology", "Stanford University"), ("physics", "Stanford University")]), indent=2))
+# author results have no data-cid, profile links carry the stable user id
+# index = ScholarResultsIndex(key="profile_link")
+# print(json.dumps(scrape_all_profiles_from_university(label="biology", university_name="Stanford University", index=index), indent=2))
+# index.commit()
+# from scraper_kit.rate_limiter import HostRateLimiter, RateLimitedSession
+# print(json.dumps(scrape_all_profiles_from_universities([("biology", "Stanford University"), ("physics", "Stanford University")], session=RateLimitedSession(HostRateLimiter(rates={"scholar.google.com": 0.5}))), indent=2))
+# benchmark_serial_vs_pipelined([("biology", "Stanford University"), ("physics", "Stanford University"), ("biology", "Harvard University")])
+# benchmark_serial_vs_pipelined_locally()
 
 
 
@@ -1,5 +1,26 @@
 from parsel import Selector
-import requests, json, os
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import requests, json, os, sys, threading, time, tempfile, shutil
+
+# scraper_kit/ with helpers shared between scrapers is at the repository root
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "..")))
+from scraper_kit.results_index import ScholarResultsIndex
+
+SCHOLAR_URL = "https://scholar.google.com/scholar"
+
+# https://docs.python-requests.org/en/master/user/quickstart/#custom-headers
+headers = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/100.0.4896.127 Safari/537.36"
+}
+
+# Scholar cuts queries that are longer than this
+MAX_QUERY_LENGTH = 256
+
+# requests to one host in flight at once when no rate limiter is passed, however many workers there are
+MAX_REQUESTS_PER_HOST = 2
 
 
 def check_websites(website: list or str):
@@ -9,35 +30,9 @@ def check_websites(website: list or str):
         return " OR ".join([f'site:{site}' for site in website]) # site:cabdirect.org OR site:cab.com
 
 
-def scrape_website_publications(query: str, website: list or str):
-    
-    """
-    Add a search query and site or multiple websites.
-
-    Following will work:
-    ["cabdirect.org", "lololo.com", "brabus.org"] -> list[str]
-    ["cabdirect.org"]                             -> list[str]
-    "cabdirect.org"                               -> str
-    """
-    
-    # https://docs.python-requests.org/en/master/user/quickstart/#passing-parameters-in-urls
-    params = {
-        "q": f'{query.lower()} {check_websites(website=website)}',  # search query
-        "hl": "en",                                                 # language of the search
-        "gl": "us"                                                  # country of the search
-    }
-    
-    # https://docs.python-requests.org/en/master/user/quickstart/#custom-headers
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/100.0.4896.127 Safari/537.36"
-    }
-
-    html = requests.get("https://scholar.google.com/scholar", params=params, headers=headers, timeout=30)
-    selector = Selector(html.text)
-    
+def parse_publications(selector: Selector) -> list[dict]:
     publications = []
-    
-    # iterate over every element from organic results from the first page and extract the data
+
     for result in selector.css(".gs_r.gs_scl"):
         title = result.css(".gs_rt").xpath("normalize-space()").get()
         link = result.css(".gs_rt a::attr(href)").get()
@@ -47,7 +42,7 @@ def scrape_website_publications(query: str, website: list or str):
         cite_by_link = f'https://scholar.google.com/scholar{result.css(".gs_or_btn.gs_nph+ a::attr(href)").get()}'
         all_versions_link = f'https://scholar.google.com/scholar{result.css("a~ a+ .gs_nph::attr(href)").get()}'
         related_articles_link = f'https://scholar.google.com/scholar{result.css("a:nth-child(4)::attr(href)").get()}'
-    
+
         publications.append({
             "result_id": result_id,
             "title": title,
@@ -58,11 +53,285 @@ def scrape_website_publications(query: str, website: list or str):
             "all_versions_link": all_versions_link,
             "related_articles_link": related_articles_link,
         })
+
+    return publications
+
+
+def scrape_website_publications(query: str, website: list or str):
+    
+    """
+    Add a search query and site or multiple websites.
+
+    Following will work:
+    ["cabdirect.org", "lololo.com", "brabus.org"] -> list[str]
+    ["cabdirect.org"]                             -> list[str]
+    "cabdirect.org"                               -> str
+    """
     
+    # https://docs.python-requests.org/en/master/user/quickstart/#passing-parameters-in-urls
+    params = {
+        "q": f'{query.lower()} {check_websites(website=website)}',  # search query
+        "hl": "en",                                                 # language of the search
+        "gl": "us"                                                  # country of the search
+    }
+    
+    html = requests.get(SCHOLAR_URL, params=params, headers=headers, timeout=30)
+
+    # iterate over every element from organic results from the first page and extract the data
+    publications = parse_publications(Selector(html.text))
+
     # print or return the results
     # return publications
 
     print(json.dumps(publications, indent=2, ensure_ascii=False))
     
 
+def shard_websites(query: str, websites: list[str], max_query_length: int = MAX_QUERY_LENGTH) -> list[list[str]]:
+    """
+    Groups websites so that every "query site:a OR site:b ..." stays under `max_query_length` characters.
+    A website that doesn't fit even alone gets its own shard.
+    """
+
+    shards, shard = [], []
+
+    for website in dict.fromkeys(websites):
+        if shard and len(f"{query.lower()} {check_websites(shard + [website])}") > max_query_length:
+            shards.append(shard)
+            shard = []
+        shard.append(website)
+
+    if shard:
+        shards.append(shard)
+
+    return shards
+
+
+def scrape_shard_publications(session: requests.Session, query: str, shard: list[str], base_url: str = SCHOLAR_URL,
+                              index: ScholarResultsIndex = None) -> list[dict]:
+    params = {
+        "q": f"{query.lower()} {check_websites(website=shard)}",
+        "hl": "en",
+        "gl": "us",
+        "start": 0
+    }
+
+    publications = []
+
+    # paginate the shard to the end, "Next" is a link only while there are more pages
+    while True:
+        html = session.get(base_url, params=params, headers=headers, timeout=30)
+        html.raise_for_status()
+        selector = Selector(html.text)
+
+        page_publications = parse_publications(selector)
+
+        if index:
+            # incremental run: keep only new or changed results, stop once a whole page was already known;
+            # scoped by the query without the sites, so regrouping the websites into other shards doesn't make every result new again
+            fresh_publications, page_known = index.refresh(page_publications, scope=query.lower())
+            publications.extend(fresh_publications)
+
+            if page_known:
+                break
+        else:
+            publications.extend(page_publications)
+
+        if not page_publications or not selector.css("a .gs_ico_nav_next"):
+            break
+
+        params["start"] += 10
+
+    return publications
+
+
+class HostConcurrencySession(requests.Session):
+    """requests.Session that lets at most `max_per_host` requests to the same host run at once, the rest of the threads wait for a slot."""
+
+    def __init__(self, max_per_host: int = MAX_REQUESTS_PER_HOST):
+        super().__init__()
+        self.max_per_host = max_per_host
+        self.semaphores = {}
+        self.lock = threading.Lock()
+
+    def request(self, method, url, *args, **kwargs):
+        host = urlsplit(url).netloc
+        with self.lock:
+            semaphore = self.semaphores.setdefault(host, threading.BoundedSemaphore(self.max_per_host))
+
+        # the body is read inside request() (no stream=True), so the slot is held until the response is complete
+        with semaphore:
+            return super().request(method, url, *args, **kwargs)
+
+
+def scrape_websites_publications(query: str, websites: list[str], max_workers: int = 8, max_query_length: int = MAX_QUERY_LENGTH,
+                                 base_url: str = SCHOLAR_URL, index: ScholarResultsIndex = None, rate_limiter=None,
+                                 max_per_host: int = MAX_REQUESTS_PER_HOST) -> list[dict]:
+    """
+    Hundreds of websites: sharded into length-bounded "site:a OR site:b" queries,
+    every shard paginated to the end concurrently and results merged without duplicate data-cid.
+    With an `index`, only results that are new or changed since the previous run are returned,
+    call index.commit() once they are saved so the next run doesn't return them again.
+    With a `rate_limiter` (scraper_kit.rate_limiter.HostRateLimiter), requests wait for a token of the Scholar bucket
+    shared with other scrapers, otherwise at most `max_per_host` of the `max_workers` requests hit Scholar at once.
+    """
+
+    shards = shard_websites(query, websites, max_query_length)
+
+    if rate_limiter:
+        # imported only when it's used: the shared buckets need fcntl, which Windows doesn't have
+        from scraper_kit.rate_limiter import RateLimitedSession
+        session = RateLimitedSession(rate_limiter)
+    else:
+        session = HostConcurrencySession(max_per_host)
+
+    session.mount("https://", HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers))
+    session.mount("http://", HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers))
+
+    publications = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # map() keeps shard order, so the merged order is the same on every run
+        for shard_publications in executor.map(lambda shard: scrape_shard_publications(session, query, shard, base_url, index), shards):
+            for publication in shard_publications:
+                publications.setdefault(publication["result_id"], publication)
+
+    print(f"{len(shards)} shards, {len(publications)} unique publications")
+
+    return list(publications.values())
+
+
+def fake_scholar_page(websites: list[str], start: int, results_per_site: int = 25, shared_per_site: int = 3, changed: set = frozenset()) -> str:
+    # results of every website in the query, 10 per page; the last `shared_per_site` results of every website
+    # are the same papers indexed on all of them -> duplicate data-cid across shards
+    results = [(website, index) for website in websites for index in range(results_per_site)]
+
+    def cid(website: str, index: int) -> str:
+        shared_index = index - (results_per_site - shared_per_site)
+        return f"shared-{shared_index}" if shared_index >= 0 else f"{website}-{index}"
+
+    items = "".join(f"""
+        <div class="gs_r gs_or gs_scl" data-cid="{cid(website, index)}">
+            <h3 class="gs_rt"><a href="https://{website}/paper/{index}">Paper {index} from {website}</a></h3>
+            <div class="gs_a">Author - Journal, 2022 - {website}</div>
+            <div class="gs_rs">Snippet {index}{" (updated)" if cid(website, index) in changed else ""}</div>
+            <div class="gs_fl"><a href="#">Save</a><a class="gs_or_cit gs_or_btn gs_nph" href="#">Cite</a><a href="?cites={index}">Cited by {index}</a><a href="?q=related:{index}">Related articles</a><a class="gs_nph" href="?cluster={index}">All versions</a></div>
+        </div>""" for website, index in results[start:start + 10])
+
+    # the "Next" icon is wrapped in a link only when there is a next page
+    next_page = '<a href="#"><span class="gs_ico gs_ico_nav_next"></span><b>Next</b></a>' if start + 10 < len(results) else '<span class="gs_ico gs_ico_nav_next"></span>'
+    return f'<html><body><div id="gs_res_ccl_mid">{items}</div><div id="gs_n">{next_page}</div></body></html>'
+
+
+def start_scholar_stub(latency: float = 0.1, changed: set = frozenset()) -> tuple[ThreadingHTTPServer, str, dict]:
+    # local stand-in for scholar.google.com/scholar, answers after `latency` seconds and counts requests
+    stats = {"requests": 0}
+    stats_lock = threading.Lock()
+
+    class ScholarStubHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            query = parse_qs(urlsplit(self.path).query)
+            shard = [part[len("site:"):] for part in query["q"][0].split() if part.startswith("site:")]
+            time.sleep(latency)
+
+            with stats_lock:
+                stats["requests"] += 1
+
+            body = fake_scholar_page(shard, int(query["start"][0]), changed=changed).encode()
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ScholarStubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    return server, f"http://127.0.0.1:{server.server_port}/scholar", stats
+
+
+def benchmark_sharded_search_locally(websites_count: int = 200, latency: float = 0.1, max_workers: int = 8, rate: float = 20):
+    from scraper_kit.rate_limiter import HostRateLimiter
+
+    websites = [f"publisher{index}.org" for index in range(websites_count)]
+    server, base_url, stats = start_scholar_stub(latency)
+
+    start = time.perf_counter()
+    serial_publications = scrape_websites_publications("biology", websites, max_workers=1, base_url=base_url)
+    serial_time = time.perf_counter() - start
+
+    # the local stub doesn't need the default per-host cap, every worker gets a slot
+    start = time.perf_counter()
+    concurrent_publications = scrape_websites_publications("biology", websites, max_workers=max_workers, base_url=base_url, max_per_host=max_workers)
+    concurrent_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    capped_publications = scrape_websites_publications("biology", websites, max_workers=max_workers, base_url=base_url)
+    capped_time = time.perf_counter() - start
+
+    # the same workers held to `rate` requests per second by the shared per-host bucket, in a fresh state folder
+    state_dir = tempfile.mkdtemp(prefix="host_rate_limits_benchmark_")
+    requests_before = stats["requests"]
+    start = time.perf_counter()
+    limited_publications = scrape_websites_publications("biology", websites, max_workers=max_workers, base_url=base_url,
+                                                        rate_limiter=HostRateLimiter(default_rate=rate, state_dir=state_dir))
+    limited_time = time.perf_counter() - start
+    shutil.rmtree(state_dir)
+
+    server.shutdown()
+
+    print(f"serial: {serial_time:.2f}s, {max_workers} workers: {concurrent_time:.2f}s, speedup: {serial_time / concurrent_time:.2f}x")
+    print(f"{max_workers} workers with the default {MAX_REQUESTS_PER_HOST} requests per host: {capped_time:.2f}s")
+    print(f"{max_workers} workers limited to {rate}/s: {limited_time:.2f}s, {(stats['requests'] - requests_before) / limited_time:.1f} requests/s")
+    print(f"same publications: {serial_publications == concurrent_publications == capped_publications == limited_publications}, {len(concurrent_publications)} unique of {websites_count * 25} results")
+
+
+def benchmark_incremental_refresh_locally(websites_count: int = 200, latency: float = 0.02, index_path: str = "benchmark_scholar_results_index.db"):
+    websites = [f"publisher{index}.org" for index in range(websites_count)]
+    # second run: a few results got a new snippet since the first one
+    changed = {f"publisher{index}.org-{index % 5}" for index in range(0, websites_count, 10)}
+
+    for file_path in (index_path, f"{index_path}-wal", f"{index_path}-shm"):
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+    emitted = {}
+
+    # third run: nothing changed since the second one, but shorter queries group the same websites into other shards
+    for name, changed_results, max_query_length in [("full crawl", frozenset(), MAX_QUERY_LENGTH), ("incremental refresh", changed, MAX_QUERY_LENGTH),
+                                                    ("regrouped shards", changed, MAX_QUERY_LENGTH // 2)]:
+        server, base_url, stats = start_scholar_stub(latency, changed_results)
+        index = ScholarResultsIndex(index_path)
+
+        start = time.perf_counter()
+        emitted[name] = scrape_websites_publications("biology", websites, max_query_length=max_query_length, base_url=base_url, index=index)
+        print(f"{name}: {time.perf_counter() - start:.2f}s, {stats['requests']} requests, {len(emitted[name])} publications emitted")
+
+        # emitted -> only now they count as known
+        index.commit()
+        index.close()
+        server.shutdown()
+
+    print(f"changed results emitted: {sorted(publication['result_id'] for publication in emitted['incremental refresh']) == sorted(changed)}")
+    print(f"nothing emitted again after regrouping: {emitted['regrouped shards'] == []}")
+
+    for file_path in (index_path, f"{index_path}-wal", f"{index_path}-shm"):
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+
 scrape_website_publications(query="biology", website="cabdirect.org")
+
+# print(json.dumps(scrape_websites_publications(query="biology", websites=["cabdirect.org", "nature.com", "sciencedirect.com"]), indent=2, ensure_ascii=False))
+# benchmark_sharded_search_locally()
+
+# index = ScholarResultsIndex()
+# print(json.dumps(scrape_websites_publications(query="biology", websites=["cabdirect.org", "nature.com"], index=index), indent=2, ensure_ascii=False))
+# index.commit()
+# benchmark_incremental_refresh_locally()
+
+# from scraper_kit.rate_limiter import HostRateLimiter
+# print(json.dumps(scrape_websites_publications(query="biology", websites=["cabdirect.org", "nature.com"], rate_limiter=HostRateLimiter(rates={"scholar.google.com": 0.5})), indent=2, ensure_ascii=False))
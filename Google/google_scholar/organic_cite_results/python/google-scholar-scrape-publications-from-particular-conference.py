@@ -1,5 +1,16 @@
 from parsel import Selector
-import requests, json, os
+import requests, json, os, sys
+
+# scraper_kit/ with helpers shared between scrapers is at the repository root
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "..")))
+from scraper_kit.results_index import ScholarResultsIndex
+
+SCHOLAR_URL = "https://scholar.google.com/scholar"
+
+# https://docs.python-requests.org/en/master/user/quickstart/#custom-headers
+headers = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/100.0.4896.127 Safari/537.36"
+}
 
 
 def check_sources(source: list or str):
@@ -19,16 +30,17 @@ def scrape_conference_publications(query: str, source: list or str):
         "gl": "us"                          # country of the search
     }
 
-    # https://docs.python-requests.org/en/master/user/quickstart/#custom-headers
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/100.0.4896.127 Safari/537.36"
-    }
+    html = requests.get(SCHOLAR_URL, params=params, headers=headers, timeout=30)
+    publications = parse_publications(Selector(html.text))
+        
+    # return publications
 
-    html = requests.get("https://scholar.google.com/scholar", params=params, headers=headers, timeout=30)
-    selector = Selector(html.text)
+    print(json.dumps(publications, indent=2, ensure_ascii=False))
     
+
+def parse_publications(selector: Selector) -> list[dict]:
     publications = []
-    
+
     for result in selector.css(".gs_r.gs_scl"):
         title = result.css(".gs_rt").xpath("normalize-space()").get()
         link = result.css(".gs_rt a::attr(href)").get()
@@ -55,10 +67,55 @@ def scrape_conference_publications(query: str, source: list or str):
                 "link": pdf_file_link
             }
         })
-        
-    # return publications
 
-    print(json.dumps(publications, indent=2, ensure_ascii=False))
-    
+    return publications
+
+
+def scrape_all_conference_publications(query: str, source: list or str, index: ScholarResultsIndex = None) -> list[dict]:
+    """
+    Every page of the conference results.
+    With an `index`, only new or changed results are returned and pagination stops at the first page that was already known,
+    call index.commit() once they are saved so the next run doesn't return them again.
+    """
+
+    params = {
+        "q": f'{query.lower()} {check_sources(source=source)}',
+        "hl": "en",
+        "gl": "us",
+        "start": 0
+    }
+
+    publications = []
+
+    while True:
+        html = requests.get(SCHOLAR_URL, params=params, headers=headers, timeout=30)
+        selector = Selector(html.text)
+
+        print(f"extracting publications at page #{params['start']}.")
+
+        page_publications = parse_publications(selector)
+
+        if index:
+            # scoped by the query without the sources, so adding or removing a source doesn't make every result new again
+            fresh_publications, page_known = index.refresh(page_publications, scope=query.lower())
+            publications.extend(fresh_publications)
+
+            if page_known:
+                break
+        else:
+            publications.extend(page_publications)
+
+        # "Next" icon is wrapped in a link only while there are more pages
+        if not page_publications or not selector.css("a .gs_ico_nav_next"):
+            break
+
+        params["start"] += 10
+
+    return publications
+
 
 scrape_conference_publications(query="anatomy", source="NIPS")
+
+# index = ScholarResultsIndex()
+# print(json.dumps(scrape_all_conference_publications(query="anatomy", source=["NIPS", "Neural Information"], index=index), indent=2, ensure_ascii=False))
+# index.commit()
@@ -1,7 +1,11 @@
-import requests, os, json
+import requests, os, sys, json
 from parsel import Selector  # https://parsel.readthedocs.io/
 from serpapi import NaverSearch
 
+# scraper_kit/ with helpers shared between scrapers is at the repository root
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from scraper_kit.serpapi_cache import CachedSearch
+
 
 def parsel_naver_related_results():
     # https://docs.python-requests.org/en/master/user/quickstart/#passing-parameters-in-urls
@@ -40,6 +44,7 @@ def parsel_naver_related_results():
 
 parsel_naver_related_results()
 
+
 def serpapi_naver_related_results():
     params = {
         # https://docs.python.org/3/library/os.html#os.getenv
@@ -49,8 +54,8 @@ def serpapi_naver_related_results():
         "where": "web"                    # web results
     }
 
-    search = NaverSearch(params)          # where data extraction happens
-    results = search.get_dict()           # JSON -> Python dictionary
+    search = CachedSearch(NaverSearch(params))  # where data extraction happens, repeated queries are served from cache
+    results = search.get_dict()                 # JSON -> Python dictionary
 
     related_results = []
 
@@ -62,4 +67,4 @@ def serpapi_naver_related_results():
         })
 
     print(json.dumps(related_results, indent=2, ensure_ascii=False))
-
+    print(f"cache: {CachedSearch.stats}")
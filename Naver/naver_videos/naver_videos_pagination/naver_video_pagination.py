@@ -1,6 +1,30 @@
-import requests, json
+import requests, json, os, sys, time, threading, tracemalloc
 from parsel import Selector
+from parsel.csstranslator import css2xpath
+from lxml import etree
 from playwright.sync_api import sync_playwright
+from urllib.parse import urlsplit, parse_qs
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# scraper_kit/ with helpers shared between scrapers is at the repository root
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+from scraper_kit.playwright_dom import extract_records, scroll_to_end
+from scraper_kit.schema import compile_css, compile_schema, extract_fields
+
+
+# field: (CSS selector inside the item, "text" or attribute name), missing elements become None
+VIDEO_SCHEMA = {
+    "title": (".text", "text"),
+    "link": (".info_title", "href"),
+    "thumbnail": (".thumb_area img", "src"),
+    "channel": (".channel", "text"),
+    "origin": (".origin", "text"),
+    "video_duration": (".time", "text"),
+    "views": (".desc_group .desc:nth-child(1)", "text"),
+    "date_published": (".desc_group .desc:nth-child(2)", "text")
+}
 
 
 def playwright_scrape_all_naver_videos():
@@ -11,37 +35,12 @@ def playwright_scrape_all_naver_videos():
 
         video_results = []
 
-        not_reached_end = True
-        while not_reached_end:
-            # scroll to the bottom of the page
-            page.evaluate("""let scrollingElement = (document.scrollingElement || document.body);
-                                 scrollingElement.scrollTop = scrollingElement scrollHeight;""")
-
-            if page.locator("#video_max_display").is_visible():
-                not_reached_end = False
-
-        for index, video in enumerate(page.query_selector_all(".video_bx"), start=1):
-            title = video.query_selector(".text").inner_text()
-            link = video.query_selector(".info_title").get_attribute("href")
-            thumbnail = video.query_selector(".thumb_area img").get_attribute("src")
-            channel = None if video.query_selector(".channel") is None else video.query_selector(".channel").inner_text()
-            origin = video.query_selector(".origin").inner_text()
-            video_duration = video.query_selector(".time").inner_text()
-            views = video.query_selector(".desc_group .desc:nth-child(1)").inner_text()
-            date_published = None if video.query_selector(".desc_group .desc:nth-child(2)") is None else \
-                video.query_selector(".desc_group .desc:nth-child(2)").inner_text()
-
-            video_results.append({
-                "position": index,
-                "title": title,
-                "link": link,
-                "thumbnail": thumbnail,
-                "channel": channel,
-                "origin": origin,
-                "video_duration": video_duration,
-                "views": views,
-                "date_published": date_published
-            })
+        # waits for new videos instead of spinning, stops when "#video_max_display" shows up
+        scroll_to_end(page, sentinel_selector="#video_max_display")
+
+        # all videos in one page.evaluate instead of up to 8 query_selector/inner_text round trips per video
+        for index, video in enumerate(extract_records(page, ".video_bx", VIDEO_SCHEMA), start=1):
+            video_results.append({"position": index, **video})
 
         print(json.dumps(video_results, indent=2, ensure_ascii=False))
 
@@ -50,11 +49,67 @@ def playwright_scrape_all_naver_videos():
 # playwright_scrape_all_naver_videos()
 
 
-def parsel_scrape_all_video_results():
+NAVER_VIDEO_URL = "https://s.search.naver.com/p/video/search.naver"
+
+
+JSON_DECODER = json.JSONDecoder()
+
+
+def decode_video_page(text: str) -> dict:
+    """
+    Response is JSONP: ( {"maxCount": "1008", "aData": [...]})
+    raw_decode() starts parsing right after "(" and stops at the end of the JSON object,
+    so the body isn't copied by slicing or .replace() and "( {" or "]})" inside the data can't break it.
+    """
+
+    # https://docs.python.org/3/library/json.html#json.JSONDecoder.raw_decode
+    start = text.index("(") + 1
+    while text[start].isspace():
+        start += 1
+
+    json_data, _ = JSON_DECODER.raw_decode(text, start)
+    return json_data
+
+
+# parse_video() selectors compiled to XPath once instead of translated by every .css() call,
+# .video_bx is matched by class like Selector.css() does, whatever tag it's on
+VIDEO_RESULT = compile_css(".video_bx")
+VIDEO_TITLE = etree.XPath(f"normalize-space(({css2xpath('.text')})[1])")
+VIDEO_FIELDS = {
+    "link": ".info_title::attr(href)",
+    "thumbnail": ".thumb_area img::attr(src)",
+    "channel": ".channel::text",
+    "origin": ".origin::text",
+    "video_duration": ".time::text",
+    "views": ".desc_group .desc:nth-child(1)::text",
+    "date_published": ".desc_group .desc:nth-child(2)::text"
+}
+VIDEO_FIELDS_SCHEMA = compile_schema(VIDEO_FIELDS)
+
+HTML_PARSER = etree.HTMLParser()
+
+
+def parse_video(video) -> dict:
+    return {
+        "title": VIDEO_TITLE(video).strip(),
+        **extract_fields(VIDEO_FIELDS_SCHEMA, video)
+    }
+
+
+def parse_video_results(html_data: list[str]):
+    # one lxml tree per aData fragment, without a Selector around it
+    for fragment in html_data:
+        root = etree.fromstring(fragment, HTML_PARSER)
+        # empty fragments have no root element
+        if root is not None:
+            yield from map(parse_video, VIDEO_RESULT(root))
+
+
+def parsel_scrape_all_video_results(query: str = "minecraft", base_url: str = NAVER_VIDEO_URL):
     params = {
         "start": 0,            # page number
         "display": "48",       # videos to display. Hard limit.
-        "query": "minecraft",  # search query
+        "query": query,        # search query
         "where": "video",      # Naver videos search engine
         "sort": "rel",         # sorted as you would see in the browser
         "video_more": "1"      # required to receive a JSON data
@@ -66,41 +121,196 @@ def parsel_scrape_all_video_results():
 
     video_results = []
 
-    html = requests.get("https://s.search.naver.com/p/video/search.naver", params=params, headers=headers, timeout=30)
-    json_data = json.loads(html.text.replace("( {", "{").replace("]})", "]}"))
+    html = requests.get(base_url, params=params, headers=headers, timeout=30)
+    json_data = decode_video_page(html.text)
     html_data = json_data["aData"]
 
     while params["start"] <= int(json_data["maxCount"]):
-        for result in html_data:
-            selector = Selector(result)
-
-            for video in selector.css(".video_bx"):
-                title = video.css(".text").xpath("normalize-space()").get().strip()
-                link = video.css(".info_title::attr(href)").get()
-                thumbnail = video.css(".thumb_area img::attr(src)").get()
-                channel = video.css(".channel::text").get()
-                origin = video.css(".origin::text").get()
-                video_duration = video.css(".time::text").get()
-                views = video.css(".desc_group .desc:nth-child(1)::text").get()
-                date_published = video.css(".desc_group .desc:nth-child(2)::text").get()
+        video_results.extend(parse_video_results(html_data))
+
+        # 48, 96, 144, 192, 240, 288, 336, 384, 432, 480, 528, 576, 624...1008
+        params["start"] += 48
+        html = requests.get(base_url, params=params, headers=headers, timeout=30)
+        html_data = decode_video_page(html.text)["aData"]
+
+    return video_results
+
+
+def parsel_scrape_all_video_results_concurrently(query: str = "minecraft", max_workers: int = 8, base_url: str = NAVER_VIDEO_URL, rate_limiter=None):
+    """
+    The first page tells maxCount, so every other `start` offset is known upfront and requested at once.
+    Videos are yielded in the same order as parsel_scrape_all_video_results() returns them.
+    With a `rate_limiter` (scraper_kit.rate_limiter.HostRateLimiter), pages wait for a token of the Naver bucket shared with other scrapers.
+    """
+
+    params = {
+        "display": "48",       # videos to display. Hard limit.
+        "query": query,        # search query
+        "where": "video",      # Naver videos search engine
+        "sort": "rel",         # sorted as you would see in the browser
+        "video_more": "1"      # required to receive a JSON data
+    }
+
+    if rate_limiter:
+        # imported only when it's used: the shared buckets need fcntl, which Windows doesn't have
+        from scraper_kit.rate_limiter import RateLimitedSession
+        session = RateLimitedSession(rate_limiter)
+    else:
+        session = requests.Session()
+
+    # https://requests.readthedocs.io/en/latest/user/advanced/#transport-adapters
+    session.headers.update({
+        "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/98.0.4758.102 Safari/537.36",
+    })
+    session.mount("https://", HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers))
+
+    def fetch_page(start: int) -> dict:
+        return decode_video_page(session.get(base_url, params={**params, "start": start}, timeout=30).text)
 
+    first_page = fetch_page(0)
+    yield from parse_video_results(first_page["aData"])
+
+    # 48, 96, 144, 192, 240, 288, 336, 384, 432, 480, 528, 576, 624...1008
+    offsets = range(48, int(first_page["maxCount"]) + 1, 48)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # map() returns pages in offset order, each one as soon as it and the pages before it are loaded
+        for page in executor.map(fetch_page, offsets):
+            yield from parse_video_results(page["aData"])
+
+
+def fake_video_page(start: int, max_count: int = 1008) -> str:
+    # video_more response with 48 videos split into several aData fragments like Naver does
+    videos = [] if start > max_count else [
+        f'<li class="video_bx"><a class="info_title" href="https://tv.naver.com/v/{start + index}"><span class="text">Video {start + index}</span></a>'
+        f'<div class="thumb_area"><img src="https://thumb.naver.net/{start + index}.jpg"></div><span class="time">01:0{index % 10}</span>'
+        f'<span class="origin">naver tv</span><span class="desc_group"><span class="desc">{index} views</span><span class="desc">2022.07.01.</span></span></li>'
+        for index in range(48)
+    ]
+    fragments = ["".join(videos[index:index + 12]) for index in range(0, len(videos), 12)]
+
+    return f'( {json.dumps({"maxCount": str(max_count), "aData": fragments})})'
+
+
+def benchmark_video_pagination_locally(max_count: int = 1008, latency: float = 0.2, max_workers: int = 8):
+    # local stand-in for s.search.naver.com/p/video/search.naver that answers after `latency` seconds
+    class NaverVideoStubHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            start = int(parse_qs(urlsplit(self.path).query)["start"][0])
+            time.sleep(latency)
+
+            body = fake_video_page(start, max_count).encode()
+
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), NaverVideoStubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}/p/video/search.naver"
+
+    start = time.perf_counter()
+    serial_results = parsel_scrape_all_video_results(base_url=base_url)
+    serial_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    concurrent_results = list(parsel_scrape_all_video_results_concurrently(max_workers=max_workers, base_url=base_url))
+    concurrent_time = time.perf_counter() - start
+
+    server.shutdown()
+
+    print(f"serial: {serial_time:.2f}s, concurrent: {concurrent_time:.2f}s, speedup: {serial_time / concurrent_time:.2f}x")
+    print(f"same videos in the same order: {serial_results == concurrent_results}, {len(concurrent_results)} videos")
+
+
+def benchmark_video_page_decoding(iterations: int = 200):
+    page = fake_video_page(start=0)
+
+    def replace_and_selector_per_fragment():
+        # previous path: two .replace() copies of the body, a Selector for every aData fragment and .css() per field
+        videos = []
+        for result in json.loads(page.replace("( {", "{").replace("]})", "]}"))["aData"]:
+            for video in Selector(result).css(".video_bx"):
+                videos.append({
+                    "title": video.css(".text").xpath("normalize-space()").get().strip(),
+                    "link": video.css(".info_title::attr(href)").get(),
+                    "thumbnail": video.css(".thumb_area img::attr(src)").get(),
+                    "channel": video.css(".channel::text").get(),
+                    "origin": video.css(".origin::text").get(),
+                    "video_duration": video.css(".time::text").get(),
+                    "views": video.css(".desc_group .desc:nth-child(1)::text").get(),
+                    "date_published": video.css(".desc_group .desc:nth-child(2)::text").get()
+                })
+        return videos
+
+    def raw_decode_and_compiled_xpath():
+        return list(parse_video_results(decode_video_page(page)["aData"]))
+
+    results = {}
+    for name, decode in [("replace + Selector per fragment", replace_and_selector_per_fragment), ("raw_decode + compiled XPath", raw_decode_and_compiled_xpath)]:
+        tracemalloc.start()
+        start = time.process_time()
+        for _ in range(iterations):
+            results[name] = decode()
+        cpu_time = (time.process_time() - start) / iterations
+        _, peak_memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        print(f"{name}: {cpu_time * 1000:.3f} ms CPU per page, peak allocations {peak_memory / 1024:.0f} KB")
+
+    print(f"same videos: {results['replace + Selector per fragment'] == results['raw_decode + compiled XPath']}")
+
+
+def benchmark_dom_extraction_locally(pages_count: int = 21):
+    # static page with the same markup as the Naver video results, 48 videos per page
+    videos_html = "".join("".join(decode_video_page(fake_video_page(start))["aData"]) for start in range(0, pages_count * 48, 48))
+
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        page = browser.new_page()
+        page.set_content(f"<html><body><ul>{videos_html}</ul></body></html>")
+
+        def per_element():
+            # previous approach: a browser round trip for every query_selector, inner_text and get_attribute
+            video_results = []
+            for video in page.query_selector_all(".video_bx"):
                 video_results.append({
-                    "title": title,
-                    "link": link,
-                    "thumbnail": thumbnail,
-                    "channel": channel,
-                    "origin": origin,
-                    "video_duration": video_duration,
-                    "views": views,
-                    "date_published": date_published
+                    "title": video.query_selector(".text").inner_text(),
+                    "link": video.query_selector(".info_title").get_attribute("href"),
+                    "thumbnail": video.query_selector(".thumb_area img").get_attribute("src"),
+                    "channel": None if video.query_selector(".channel") is None else video.query_selector(".channel").inner_text(),
+                    "origin": video.query_selector(".origin").inner_text(),
+                    "video_duration": video.query_selector(".time").inner_text(),
+                    "views": video.query_selector(".desc_group .desc:nth-child(1)").inner_text(),
+                    "date_published": None if video.query_selector(".desc_group .desc:nth-child(2)") is None else
+                        video.query_selector(".desc_group .desc:nth-child(2)").inner_text()
                 })
+            return video_results
 
-        # 48, 96, 144, 192, 240, 288, 336, 384, 432, 480, 528, 576, 624...1008
-        params["start"] += 48
-        html = requests.get("https://s.search.naver.com/p/video/search.naver", params=params, headers=headers, timeout=30)
-        html_data = json.loads(html.text.replace("( {", "{").replace("]})", "]}"))["aData"]
+        results = {}
+        for name, extract in [("query_selector per field", per_element), ("one page.evaluate", lambda: extract_records(page, ".video_bx", VIDEO_SCHEMA))]:
+            start = time.perf_counter()
+            results[name] = extract()
+            print(f"{name}: {time.perf_counter() - start:.2f}s for {len(results[name])} videos")
+
+        browser.close()
+
+    print(f"same videos: {results['query_selector per field'] == results['one page.evaluate']}")
+
+
+print(json.dumps(parsel_scrape_all_video_results(), indent=2, ensure_ascii=False))
 
-    print(json.dumps(video_results, indent=2, ensure_ascii=False))
+# for video in parsel_scrape_all_video_results_concurrently(query="minecraft"):
+#     print(json.dumps(video, ensure_ascii=False))
 
+# from scraper_kit.rate_limiter import HostRateLimiter
+# for video in parsel_scrape_all_video_results_concurrently(query="minecraft", rate_limiter=HostRateLimiter(rates={"s.search.naver.com": 2})):
+#     print(json.dumps(video, ensure_ascii=False))
 
-parsel_scrape_all_video_results()
+# benchmark_video_pagination_locally()
+# benchmark_video_page_decoding()
+# benchmark_dom_extraction_locally()
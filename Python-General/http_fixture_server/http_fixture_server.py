@@ -0,0 +1,335 @@
+"""
+Record/replay HTTP fixture server for offline load tests of the requests-based scrapers.
+
+Every request goes to http://127.0.0.1:<port>/<host>/<path>?<query>, e.g.
+http://127.0.0.1:8765/scholar.google.com/scholar?q=biology
+
+record: forwards the request to https://<host>/<path>?<query> and saves the request/response pair
+        to <fixtures_dir>/<host>/<key>.json.gz, bodies as base64 of the raw bytes
+replay: answers from the saved pairs with configurable latency, jitter and injected errors
+
+Scrapers don't need any changes: `run` rewrites every URL requests is asked for to the server
+(one base-URL override) and runs the script, e.g.
+
+python http_fixture_server.py record --port 8765
+python http_fixture_server.py run --base-url http://127.0.0.1:8765 ../../Google/google_scholar/metrics_results/google_scholar_metric_top_publication_results.py
+python http_fixture_server.py replay --port 8765 --latency 0.3 --jitter 0.1 --error-rate 0.05
+python http_fixture_server.py run --base-url http://127.0.0.1:8765 ../../Google/google_scholar/metrics_results/google_scholar_metric_top_publication_results.py
+python http_fixture_server.py load-test --base-url http://127.0.0.1:8765 --concurrency 16 --requests 2000
+"""
+
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qsl, urlencode
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+import requests, json, gzip, base64, hashlib, os, random, runpy, shutil, sys, threading, time, argparse, statistics
+
+
+FIXTURES_DIR = ".http_fixtures"
+
+# hop-by-hop and encoding headers are dropped: bodies are stored uncompressed and served with their own length
+SKIPPED_HEADERS = {"host", "connection", "keep-alive", "transfer-encoding", "content-encoding", "content-length", "accept-encoding"}
+
+
+def fixture_key(method: str, host: str, path: str, query: str, body: bytes = b"") -> str:
+    # query params sorted so ?a=1&b=2 and ?b=2&a=1 are the same fixture
+    canonical_query = urlencode(sorted(parse_qsl(query, keep_blank_values=True)))
+    # POSTs to the same URL with different bodies are different fixtures
+    body_hash = hashlib.blake2b(body, digest_size=16).hexdigest() if body else ""
+    return hashlib.blake2b(f"{method} {host}{path}?{canonical_query} {body_hash}".encode(), digest_size=16).hexdigest()
+
+
+def fixture_body(fixture: dict, name: str = "body_base64") -> bytes:
+    # raw bytes as they came from the origin: HTML in any charset, images, PDFs, ...
+    return base64.b64decode(fixture[name])
+
+
+def split_fixture_path(request_path: str) -> tuple[str, str, str]:
+    # /scholar.google.com/scholar?q=biology -> ("scholar.google.com", "/scholar", "q=biology")
+    url = urlsplit(request_path)
+    host, _, path = url.path.lstrip("/").partition("/")
+    return host, f"/{path}", url.query
+
+
+class FixtureStore:
+    """Request/response pairs as gzipped JSON, one file per request, loaded into memory for replay."""
+
+    def __init__(self, fixtures_dir: str = FIXTURES_DIR):
+        self.fixtures_dir = fixtures_dir
+        self.fixtures = {}
+
+    def save(self, key: str, fixture: dict):
+        host_dir = os.path.join(self.fixtures_dir, fixture["host"])
+        os.makedirs(host_dir, exist_ok=True)
+
+        with gzip.open(os.path.join(host_dir, f"{key}.json.gz"), "wt", encoding="utf-8") as fixture_file:
+            json.dump(fixture, fixture_file, ensure_ascii=False)
+
+        self.fixtures[key] = fixture
+
+    def load(self) -> "FixtureStore":
+        for root, _, file_names in os.walk(self.fixtures_dir):
+            for file_name in file_names:
+                if file_name.endswith(".json.gz"):
+                    with gzip.open(os.path.join(root, file_name), "rt", encoding="utf-8") as fixture_file:
+                        self.fixtures[file_name[:-len(".json.gz")]] = json.load(fixture_file)
+        return self
+
+    def get(self, key: str) -> dict:
+        return self.fixtures.get(key)
+
+
+def make_fixture_server(mode: str, store: FixtureStore, port: int = 8765, latency: float = 0, jitter: float = 0,
+                        error_rate: float = 0, error_statuses: tuple = (429, 503), seed: int = 0, upstream_scheme: str = "https") -> ThreadingHTTPServer:
+    """
+    mode="record" proxies to `upstream_scheme`://<host> and saves every pair,
+    mode="replay" answers from `store` after latency ± jitter seconds and fails `error_rate` of the requests.
+    """
+
+    # seeded so the same run gets the same delays and the same failed requests
+    rng = random.Random(seed)
+    rng_lock = threading.Lock()
+    upstream = requests.Session()
+
+    class FixtureHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # TCP_NODELAY: the body goes out right after the headers instead of waiting for their delayed ACK (~40 ms per response on keep-alive)
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            self.handle_request("GET")
+
+        def do_POST(self):
+            self.handle_request("POST")
+
+        def handle_request(self, method: str):
+            host, path, query = split_fixture_path(self.path)
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            key = fixture_key(method, host, path, query, body)
+
+            if mode == "record":
+                response = upstream.request(method, f"{upstream_scheme}://{host}{path}{'?' + query if query else ''}", data=body or None, timeout=30,
+                                            # a redirect is recorded as it is, the client follows it through the server like it would live
+                                            allow_redirects=False, headers={name: value for name, value in self.headers.items() if name.lower() not in SKIPPED_HEADERS})
+                fixture = {
+                    "method": method,
+                    "host": host,
+                    "path": path,
+                    "query": query,
+                    "request_body_base64": base64.b64encode(body).decode("ascii"),
+                    "status": response.status_code,
+                    "headers": {name: value for name, value in response.headers.items() if name.lower() not in SKIPPED_HEADERS},
+                    # .content, not .text: decoding and re-encoding would break binary bodies and bytes invalid in the charset
+                    "body_base64": base64.b64encode(response.content).decode("ascii")
+                }
+                store.save(key, fixture)
+                return self.respond(fixture["status"], fixture["headers"], response.content)
+
+            with rng_lock:
+                delay = max(0.0, latency + rng.uniform(-jitter, jitter))
+                error_status = rng.choice(error_statuses) if rng.random() < error_rate else None
+
+            time.sleep(delay)
+
+            if error_status:
+                return self.respond(error_status, {"Content-Type": "text/plain", "Retry-After": "1"}, f"injected {error_status}".encode())
+
+            fixture = store.get(key)
+            if fixture is None:
+                return self.respond(404, {"Content-Type": "text/plain"}, f"no fixture for {method} {host}{path}?{query}, record it first".encode())
+
+            self.respond(fixture["status"], fixture["headers"], fixture_body(fixture))
+
+        def respond(self, status: int, headers: dict, body: bytes):
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return ThreadingHTTPServer(("127.0.0.1", port), FixtureHandler)
+
+
+def install_base_url(base_url: str):
+    """
+    Every URL requests is asked for is sent to the fixture server instead:
+    https://scholar.google.com/scholar -> <base_url>/scholar.google.com/scholar
+    requests.get/post go through Session.request, so patching it covers every requests-based scraper.
+    """
+
+    base_host = urlsplit(base_url).netloc
+    session_request = requests.Session.request
+
+    def request(self, method, url, *args, **kwargs):
+        parts = urlsplit(url)
+        if parts.netloc != base_host:
+            url = f"{base_url.rstrip('/')}/{parts.netloc}{parts.path or '/'}{'?' + parts.query if parts.query else ''}"
+        return session_request(self, method, url, *args, **kwargs)
+
+    requests.Session.request = request
+
+
+def run_script(script_path: str, base_url: str):
+    install_base_url(base_url)
+
+    # the script sees itself as __main__ and can import modules next to it
+    sys.path.insert(0, os.path.dirname(os.path.abspath(script_path)))
+    start = time.perf_counter()
+    runpy.run_path(script_path, run_name="__main__")
+    print(f"{script_path}: {time.perf_counter() - start:.2f}s", file=sys.stderr)
+
+
+def load_test(base_url: str, fixtures_dir: str = FIXTURES_DIR, concurrency: int = 16, requests_count: int = 1000) -> dict:
+    # replays the recorded requests round-robin and reports throughput and latency percentiles
+    fixtures = list(FixtureStore(fixtures_dir).load().fixtures.values())
+    if not fixtures:
+        raise ValueError(f"No fixtures in {fixtures_dir}. Record some first.")
+
+    session = requests.Session()
+    session.mount("http://", HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency))
+
+    def send(index: int) -> tuple[float, int]:
+        fixture = fixtures[index % len(fixtures)]
+        url = f"{base_url.rstrip('/')}/{fixture['host']}{fixture['path']}{'?' + fixture['query'] if fixture['query'] else ''}"
+
+        start = time.perf_counter()
+        status = session.request(fixture["method"], url, data=fixture_body(fixture, "request_body_base64") or None, timeout=30).status_code
+        return time.perf_counter() - start, status
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(send, range(requests_count)))
+    wall_time = time.perf_counter() - start
+
+    latencies = sorted(latency for latency, _ in results)
+    percentiles = statistics.quantiles(latencies, n=100)
+    statuses = {}
+    for _, status in results:
+        statuses[status] = statuses.get(status, 0) + 1
+
+    report = {
+        "requests": requests_count,
+        "seconds": round(wall_time, 3),
+        "requests_per_second": round(requests_count / wall_time, 1),
+        "p50_ms": round(percentiles[49] * 1000, 1),
+        "p95_ms": round(percentiles[94] * 1000, 1),
+        "p99_ms": round(percentiles[98] * 1000, 1),
+        "statuses": statuses
+    }
+    print(json.dumps(report, indent=2))
+    return report
+
+
+def check_record_replay_locally(fixtures_dir: str = ".http_fixtures_check"):
+    # local origin instead of a live host, recorded over http
+    class OriginHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.startswith("/image"):
+                # bytes that aren't valid in any text encoding
+                self.send_body(bytes(range(256)) * 4, "image/png")
+            else:
+                self.send_body(json.dumps({"path": self.path, "user_agent": self.headers.get("User-Agent")}).encode(), "application/json")
+
+        def do_POST(self):
+            self.send_body(json.dumps({"path": self.path, "body": self.rfile.read(int(self.headers["Content-Length"])).decode()}).encode(), "application/json")
+
+        def send_body(self, body: bytes, content_type: str):
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    shutil.rmtree(fixtures_dir, ignore_errors=True)
+    origin = ThreadingHTTPServer(("127.0.0.1", 0), OriginHandler)
+    threading.Thread(target=origin.serve_forever, daemon=True).start()
+    origin_host = f"127.0.0.1:{origin.server_port}"
+
+    recorder = make_fixture_server("record", FixtureStore(fixtures_dir), port=0, upstream_scheme="http")
+    threading.Thread(target=recorder.serve_forever, daemon=True).start()
+    recorder_url = f"http://127.0.0.1:{recorder.server_port}"
+
+    recorded = [requests.get(f"{recorder_url}/{origin_host}/search", params={"q": f"query {index}", "hl": "en"}, headers={"User-Agent": "fixture-check"}, timeout=30).json()
+                for index in range(20)]
+    recorded_image = requests.get(f"{recorder_url}/{origin_host}/image.png", timeout=30).content
+    recorded_posts = [requests.post(f"{recorder_url}/{origin_host}/batchexecute", data=f"page={index}", timeout=30).json() for index in range(2)]
+    recorder.shutdown()
+    origin.shutdown()
+
+    replayer = make_fixture_server("replay", FixtureStore(fixtures_dir).load(), port=0)
+    threading.Thread(target=replayer.serve_forever, daemon=True).start()
+
+    # a scraper keeps its live URL, install_base_url() sends it to the replay server; params in another order hit the same fixture
+    session_request = requests.Session.request
+    install_base_url(f"http://127.0.0.1:{replayer.server_port}")
+    replayed = requests.get(f"http://{origin_host}/search?hl=en&q=query+3", timeout=30)
+    replayed_image = requests.get(f"http://{origin_host}/image.png", timeout=30).content
+    replayed_posts = [requests.post(f"http://{origin_host}/batchexecute", data=f"page={index}", timeout=30).json() for index in (1, 0)]
+    requests.Session.request = session_request
+    replayer.shutdown()
+
+    print(f"replayed without origin: {replayed.status_code} {replayed.json() == recorded[3]}")
+    print(f"binary body byte for byte: {replayed_image == recorded_image == bytes(range(256)) * 4}")
+    print(f"POSTs told apart by body: {replayed_posts == recorded_posts[::-1]}")
+
+    replayer = make_fixture_server("replay", FixtureStore(fixtures_dir).load(), port=0, latency=0.05, jitter=0.02, error_rate=0.1)
+    threading.Thread(target=replayer.serve_forever, daemon=True).start()
+    replayer_url = f"http://127.0.0.1:{replayer.server_port}"
+
+    report = load_test(replayer_url, fixtures_dir, concurrency=16, requests_count=400)
+    print(f"injected errors: {report['requests'] - report['statuses'].get(200, 0)} of {report['requests']} (error rate 0.1)")
+
+    replayer.shutdown()
+    shutil.rmtree(fixtures_dir)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record/replay HTTP fixture server for the scrapers.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    for command in ("record", "replay"):
+        server_parser = commands.add_parser(command)
+        server_parser.add_argument("--port", type=int, default=8765)
+        server_parser.add_argument("--fixtures-dir", default=FIXTURES_DIR)
+        if command == "replay":
+            server_parser.add_argument("--latency", type=float, default=0, help="seconds before every response")
+            server_parser.add_argument("--jitter", type=float, default=0, help="latency ± jitter seconds")
+            server_parser.add_argument("--error-rate", type=float, default=0, help="share of requests answered with an error")
+            server_parser.add_argument("--error-statuses", default="429,503")
+            server_parser.add_argument("--seed", type=int, default=0)
+
+    run_parser = commands.add_parser("run")
+    run_parser.add_argument("--base-url", default="http://127.0.0.1:8765")
+    run_parser.add_argument("script")
+
+    load_test_parser = commands.add_parser("load-test")
+    load_test_parser.add_argument("--base-url", default="http://127.0.0.1:8765")
+    load_test_parser.add_argument("--fixtures-dir", default=FIXTURES_DIR)
+    load_test_parser.add_argument("--concurrency", type=int, default=16)
+    load_test_parser.add_argument("--requests", type=int, default=1000)
+
+    args = parser.parse_args()
+
+    if args.command == "record":
+        server = make_fixture_server("record", FixtureStore(args.fixtures_dir), port=args.port)
+    elif args.command == "replay":
+        server = make_fixture_server("replay", FixtureStore(args.fixtures_dir).load(), port=args.port, latency=args.latency, jitter=args.jitter,
+                                     error_rate=args.error_rate, error_statuses=tuple(int(status) for status in args.error_statuses.split(",")), seed=args.seed)
+    elif args.command == "run":
+        run_script(args.script, args.base_url)
+        sys.exit()
+    else:
+        load_test(args.base_url, args.fixtures_dir, args.concurrency, args.requests)
+        sys.exit()
+
+    print(f"{args.command}ing on http://127.0.0.1:{server.server_port}, fixtures in {args.fixtures_dir}")
+    server.serve_forever()
+
+# check_record_replay_locally()
@@ -1,60 +1,163 @@
 from parsel import Selector
 from playwright.sync_api import sync_playwright
-import json, time
-
-
-def scrape_institution_members(institution: str):
-    with sync_playwright() as p:
-        
-        institution_memebers = []
-        page_num = 1
-        
-        members_is_present = True
-        while members_is_present:
-            
-            browser = p.chromium.launch(headless=True, slow_mo=50)
-            page = browser.new_page()
-            page.goto(f"https://www.researchgate.net/institution/{institution}/members/{page_num}")
-            selector = Selector(text=page.content())
-            
-            print(f"page number: {page_num}")
-            
-            for member in selector.css(".nova-legacy-v-person-list-item"):
-                name = member.css(".nova-legacy-v-person-list-item__align-content a::text").get()
-                link = f'https://www.researchgate.net{member.css(".nova-legacy-v-person-list-item__align-content a::attr(href)").get()}'
-                profile_photo = member.css(".nova-legacy-l-flex__item img::attr(src)").get()
-                department = member.css(".nova-legacy-v-person-list-item__stack-item:nth-child(2) span::text").get()
-                desciplines = member.css("span .nova-legacy-e-link::text").getall()
-                
-                institution_memebers.append({
-                    "name": name,
-                    "link": link,
-                    "profile_photo": profile_photo,
-                    "department": department,
-                    "descipline": desciplines
-                })
-                
-            # check for Page not found selector
-            if selector.css(".headline::text").get():
-                members_is_present = False
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import asyncio, json, time, re, threading, os, sys
+
+# scraper_kit/ with helpers shared between scrapers is at the repository root
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+from scraper_kit.researchgate import (ResearchGateEngine, scrape_institution_members, run_researchgate_job, parse_member, is_page_not_found,
+                                      listing_finished, MEMBER_SELECTOR)
+
+
+def browser_processes_rss() -> int:
+    """Sum of RSS in bytes of every process started by this script, i.e. Playwright driver and Chromium (Linux only)."""
+
+    parents = {}
+    for pid in filter(str.isdigit, os.listdir("/proc")):
+        try:
+            with open(f"/proc/{pid}/stat") as stat_file:
+                # "pid (name) state ppid ...", name can contain spaces
+                parents[int(pid)] = int(stat_file.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError):
+            pass
+
+    descendants, found = set(), {os.getpid()}
+    while found:
+        found = {pid for pid, parent in parents.items() if parent in found} - descendants
+        descendants |= found
+
+    rss = 0
+    for pid in descendants:
+        try:
+            with open(f"/proc/{pid}/statm") as statm_file:
+                rss += int(statm_file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except OSError:
+            pass
+    return rss
+
+
+def measure_peak_rss(scrape):
+    # samples browser memory in the background while `scrape` runs
+    peak_rss = [0]
+    running = threading.Event()
+    running.set()
+
+    def sample():
+        while running.is_set():
+            peak_rss[0] = max(peak_rss[0], browser_processes_rss())
+            time.sleep(0.05)
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+
+    start = time.perf_counter()
+    result = scrape()
+    elapsed = time.perf_counter() - start
+
+    running.clear()
+    sampler.join()
+
+    return result, elapsed, peak_rss[0]
+
+
+def benchmark_institution_members_locally(pages_count: int = 20, members_per_page: int = 30, tabs_count: int = 4):
+    """
+    Serves fake members pages from a local server and compares the old loop
+    (new browser per page, slow_mo=50, without the 2 sec sleep) with the tab pool: time per page and peak browser memory.
+    """
+
+    class MembersPageHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            members_page = re.search(r"/members/(\d+)", self.path)
+            if not members_page:
+                # photos and CSS requested by the old approach
+                self.send_error(404)
+                return
+
+            page_num = int(members_page.group(1))
+
+            if page_num > pages_count:
+                body = '<html><body><h1 class="headline">Page not found</h1></body></html>'
             else:
-                time.sleep(2) # use proxies and captcha solver instead of this
-                page_num += 1 # increment a one. Pagination
-
-        print(json.dumps(institution_memebers, indent=2, ensure_ascii=False))
-        print(len(institution_memebers)) # 624 from a EM-Normandie-Business-School
-
-        browser.close()
-        
-        """
-        you can also render the page and extract data from the inline JSON string,
-        however, it's messy and from my perspective it is easier to scrape the page directly.
-        """
-        
-        # https://regex101.com/r/8qjfnH/1
-        # extracted_data = re.findall(r"\s+RGCommons\.react\.mountWidgetTree\(({\"data\":{\"menu\".*:true})\);;",
-        #                        str(page.content()))[0]
-        # json_data = json.loads(extracted_data)
-        # print(json_data)
-    
-scrape_institution_members(institution="EM-Normandie-Business-School")
\ No newline at end of file
+                members = "".join(f"""
+                    <div class="nova-legacy-v-person-list-item">
+                        <div class="nova-legacy-l-flex__item"><img src="/photo/{page_num}-{index}.jpg"></div>
+                        <div class="nova-legacy-v-person-list-item__align-content"><a href="/profile/Member-{page_num}-{index}">Member {page_num}-{index}</a></div>
+                        <ul><li class="nova-legacy-v-person-list-item__stack-item">info</li><li class="nova-legacy-v-person-list-item__stack-item"><span>Department {index}</span></li></ul>
+                        <span><a class="nova-legacy-e-link">Marketing</a></span>
+                    </div>""" for index in range(members_per_page))
+                body = f'<html><head><link rel="stylesheet" href="/style.css"></head><body>{members}</body></html>'
+
+            body = body.encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MembersPageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    def browser_per_page(max_empty_pages: int = 2):
+        old_members = []
+        with sync_playwright() as p:
+            browsers = []
+            page_num = 1
+            empty_pages = 0
+
+            members_is_present = True
+            while members_is_present:
+                browser = p.chromium.launch(headless=True, slow_mo=50)
+                browsers.append(browser)
+                page = browser.new_page()
+                response = page.goto(f"{base_url}/institution/Test/members/{page_num}")
+
+                selector = Selector(text=page.content())
+                members = [parse_member(member) for member in selector.css(MEMBER_SELECTOR)]
+                old_members.extend(members)
+                empty_pages = 0 if members else empty_pages + 1
+
+                members_is_present = not listing_finished(response.status if response else 200, members, is_page_not_found(selector), empty_pages, max_empty_pages)
+                page_num += 1
+
+            for browser in browsers:
+                browser.close()
+        return old_members
+
+    old_members, old_time, old_rss = measure_peak_rss(browser_per_page)
+    async def tab_pool():
+        async with ResearchGateEngine(tabs_count=tabs_count, min_delay=0.05, base_url=base_url) as engine:
+            return await scrape_institution_members(engine, "Test")
+
+    new_members, new_time, new_rss = measure_peak_rss(lambda: asyncio.run(tab_pool()))
+
+    server.shutdown()
+
+    pages_crawled = pages_count + 1  # + "Page not found" page
+    print(f"browser per page: {old_time / pages_crawled * 1000:.0f} ms/page, peak memory {old_rss / 1024 / 1024:.0f} MB")
+    print(f"tab pool ({tabs_count} tabs): {new_time / pages_crawled * 1000:.0f} ms/page, peak memory {new_rss / 1024 / 1024:.0f} MB")
+    print(f"same members: {old_members == new_members}, {len(new_members)} members")
+
+
+# one browser with 4 warm tabs from scraper_kit/researchgate.py, the same engine ../researchgate-crawler-engine.py runs every job on
+institution_memebers = asyncio.run(run_researchgate_job(scrape_institution_members, institution="EM-Normandie-Business-School"))
+
+print(json.dumps(institution_memebers, indent=2, ensure_ascii=False))
+print(len(institution_memebers)) # 624 from a EM-Normandie-Business-School
+
+"""
+you can also render the page and extract data from the inline JSON string,
+however, it's messy and from my perspective it is easier to scrape the page directly.
+"""
+
+# https://regex101.com/r/8qjfnH/1
+# extracted_data = re.findall(r"\s+RGCommons\.react\.mountWidgetTree\(({\"data\":{\"menu\".*:true})\);;",
+#                        str(page.content()))[0]
+# json_data = json.loads(extracted_data)
+# print(json_data)
+
+# benchmark_institution_members_locally()
@@ -0,0 +1,32 @@
+"""
+Every ResearchGate job at once on one browser: the engine, the parsers and the jobs live in scraper_kit/researchgate.py
+and are the same ones the per-page scripts next to this file use.
+"""
+
+import asyncio, json, os, sys
+
+# scraper_kit/ with helpers shared between scrapers is at the repository root
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from scraper_kit.researchgate import (ResearchGateEngine, scrape_researchgate_publications, scrape_researchgate_questions,
+                                      scrape_researchgate_authors, scrape_researchgate_profile)
+
+
+async def main():
+    # every job shares the same browser and its 8 tabs
+    async with ResearchGateEngine(tabs_count=8) as engine:
+        publications, questions, authors, profile = await asyncio.gather(
+            scrape_researchgate_publications(engine, query="coffee"),
+            scrape_researchgate_questions(engine, query="coffee"),
+            scrape_researchgate_authors(engine, query="coffee"),
+            scrape_researchgate_profile(engine, profile="Agnis-Stibe"),
+        )
+
+    print(json.dumps({
+        "publications": publications,
+        "questions": questions,
+        "authors": authors,
+        "profile": profile
+    }, indent=2, ensure_ascii=False))
+
+
+asyncio.run(main())
@@ -0,0 +1,6 @@
+"""
+Helpers shared by several scrapers in this repository.
+
+Scripts add the repository root to sys.path and import from here, e.g.
+from scraper_kit.schema import compile_schema, extract_fields
+"""
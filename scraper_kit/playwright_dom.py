@@ -0,0 +1,98 @@
+"""
+Helpers that do the DOM work of a Playwright scraper inside the page, so a page costs one round trip instead of one per element.
+"""
+
+import time
+
+# runs in the browser: reads every field of every item and returns them as one JSON array
+# https://playwright.dev/python/docs/evaluating
+EXTRACT_RECORDS_JS = """([itemSelector, schema]) => Array.from(document.querySelectorAll(itemSelector), item => {
+    const record = {};
+    for (const [field, [selector, attribute]] of Object.entries(schema)) {
+        const node = selector ? item.querySelector(selector) : item;
+        record[field] = !node ? null : attribute === "text" ? node.innerText : node.getAttribute(attribute);
+    }
+    return record;
+})"""
+
+
+def extract_records(page, item_selector: str, schema: dict) -> list[dict]:
+    """
+    schema: {field: (CSS selector inside the item, "text" or attribute name)}, an empty selector reads the item itself.
+    Missing elements become None.
+    """
+
+    return page.evaluate(EXTRACT_RECORDS_JS, [item_selector, schema])
+
+
+# one scroll step in the browser: scroll (or click "load more") and resolve as soon as the page grows,
+# the sentinel is scrolled into the viewport or nothing changed for `idleTimeout` ms.
+# MutationObserver and scroll events wake it up, no polling from Python.
+# https://developer.mozilla.org/en-US/docs/Web/API/MutationObserver
+SCROLL_STEP_JS = """([sentinelSelector, loadMoreSelector, idleTimeout]) => new Promise(resolve => {
+    const root = document.scrollingElement || document.body;
+    const lastHeight = root.scrollHeight;
+
+    // an element that is merely rendered somewhere below the fold doesn't count, its box has to overlap the viewport
+    const sentinelVisible = () => {
+        const sentinel = sentinelSelector && document.querySelector(sentinelSelector);
+        if (!sentinel) return false;
+
+        const rect = sentinel.getBoundingClientRect();
+        return (rect.width > 0 || rect.height > 0)
+            && rect.bottom > 0 && rect.right > 0
+            && rect.top < window.innerHeight && rect.left < window.innerWidth;
+    };
+
+    let observer, timer;
+    const check = () => {
+        if (root.scrollHeight > lastHeight || sentinelVisible()) finish();
+    };
+    const finish = () => {
+        observer.disconnect();
+        window.removeEventListener("scroll", check);
+        clearTimeout(timer);
+        resolve({height: root.scrollHeight, grew: root.scrollHeight > lastHeight, sentinel: sentinelVisible()});
+    };
+
+    observer = new MutationObserver(check);
+    observer.observe(document.body, {childList: true, subtree: true, attributes: true});
+    // a sentinel that is already in the DOM comes into view by scrolling, without any mutation
+    window.addEventListener("scroll", check, {passive: true});
+    timer = setTimeout(finish, idleTimeout);
+
+    const loadMore = loadMoreSelector && document.querySelector(loadMoreSelector);
+    if (loadMore) {
+        loadMore.click();
+    } else {
+        root.scrollTop = root.scrollHeight;
+    }
+})"""
+
+
+def scroll_to_end(page, sentinel_selector: str = None, load_more_selector: str = None, idle_timeout: float = 5, max_steps: int = 10_000) -> dict:
+    """
+    Scrolls until `sentinel_selector` is in the viewport or the page height stops growing for `idle_timeout` seconds.
+    Every step waits on DOM mutations and scroll events inside the page instead of a fixed sleep or a busy loop.
+    """
+
+    start = time.perf_counter()
+    steps, stopped_by, height = 0, "max_steps", None
+
+    while steps < max_steps:
+        state = page.evaluate(SCROLL_STEP_JS, [sentinel_selector, load_more_selector, idle_timeout * 1000])
+        steps += 1
+        height = state["height"]
+
+        if state["sentinel"]:
+            stopped_by = "sentinel"
+            break
+        if not state["grew"]:
+            # the last step waited the whole `idle_timeout` for new content
+            stopped_by = "height"
+            break
+
+    scroll_stats = {"steps": steps, "seconds": round(time.perf_counter() - start, 2), "height": height, "stopped_by": stopped_by}
+    print(f"scrolled {steps} steps in {scroll_stats['seconds']}s, stopped by {stopped_by}")
+
+    return scroll_stats
@@ -0,0 +1,270 @@
+"""
+Per-host token buckets shared by every thread and every process on the machine.
+
+Each host gets a small memory-mapped file in RATE_LIMIT_DIR holding its bucket. A process maps it
+once, and every acquire() takes a thread lock plus an flock on the file, so two scrapers running
+side by side draw from the same bucket. Linux/macOS only (fcntl).
+
+A caller doesn't sleep while holding the lock: acquire() reserves a token (the bucket may go negative)
+and sleeps outside the lock until that token is due, so waiting callers are served in arrival order.
+
+429/503 answers halve the host rate and pause the bucket for Retry-After (seconds or an HTTP date),
+every 2xx/3xx adds back a little until the configured rate is reached again (additive increase,
+multiplicative decrease). Reservations made during a pause are spaced at the halved rate after it.
+
+The configured rate is written into the bucket every time a process opens it, and a bucket nobody
+used for STALE_AFTER seconds starts over at that rate instead of a halved rate left by an old run.
+
+python -m scraper_kit.rate_limiter runs the local benchmark.
+"""
+
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from urllib.parse import urlsplit
+from email.utils import parsedate_to_datetime
+import requests, fcntl, mmap, os, struct, tempfile, threading, time, multiprocessing, shutil
+
+
+RATE_LIMIT_DIR = os.path.join(tempfile.gettempdir(), "host_rate_limits")
+
+# tokens, updated_at, rate, max_rate, blocked_until, waited_seconds, acquired, initialized
+BUCKET = struct.Struct("<6dQQ")
+
+# seconds without any request after which a bucket's slowdown and pause are forgotten
+STALE_AFTER = 10 * 60
+
+
+class HostBucket:
+    def __init__(self, path: str, rate: float, burst: float, stale_after: float = STALE_AFTER):
+        self.burst = burst
+        self.stale_after = stale_after
+        self.lock = threading.Lock()
+        self.file = open(path, "a+b")
+
+        fcntl.flock(self.file, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self.file.fileno()).st_size < BUCKET.size:
+                self.file.truncate(BUCKET.size)
+            self.memory = mmap.mmap(self.file.fileno(), BUCKET.size)
+
+            tokens, updated_at, current_rate, max_rate, blocked_until, waited_seconds, acquired, initialized = BUCKET.unpack_from(self.memory)
+
+            if not initialized:
+                # the first process to open the bucket sets it up
+                BUCKET.pack_into(self.memory, 0, burst, time.time(), rate, rate, 0.0, 0.0, 0, 1)
+            else:
+                # later ones keep the shared state but bring their own config: a lower rate applies at once, a higher one is reached by successes
+                BUCKET.pack_into(self.memory, 0, *self.restored([tokens, updated_at, min(current_rate, rate), rate, blocked_until, waited_seconds, acquired, initialized]))
+        finally:
+            fcntl.flock(self.file, fcntl.LOCK_UN)
+
+    def restored(self, state: list) -> list:
+        # a bucket nobody used for `stale_after` seconds starts over at the configured rate, without an old pause
+        tokens, updated_at, rate, max_rate, blocked_until, waited_seconds, acquired, initialized = state
+        now = time.time()
+
+        if now - updated_at > self.stale_after:
+            return [self.burst, now, max_rate, max_rate, 0.0, waited_seconds, acquired, initialized]
+        return state
+
+    def update(self, change) -> float:
+        # change(state) -> (new state, value to return); runs under the thread lock and the file lock
+        with self.lock:
+            fcntl.flock(self.file, fcntl.LOCK_EX)
+            try:
+                state = list(BUCKET.unpack_from(self.memory))
+                state, value = change(state)
+                BUCKET.pack_into(self.memory, 0, *state)
+                return value
+            finally:
+                fcntl.flock(self.file, fcntl.LOCK_UN)
+
+    def reserve(self) -> float:
+        def take_token(state):
+            tokens, updated_at, rate, max_rate, blocked_until, waited_seconds, acquired, initialized = self.restored(state)
+            now = time.time()
+
+            # during a pause updated_at is in the future and the refill is negative, the wait runs past blocked_until
+            tokens = min(self.burst, tokens + (now - updated_at) * rate) - 1
+            wait = max(0.0, -tokens / rate, blocked_until - now)
+
+            return [tokens, now, rate, max_rate, blocked_until, waited_seconds + wait, acquired + 1, initialized], wait
+
+        return self.update(take_token)
+
+    def throttled(self, retry_after: float = None, min_rate: float = None):
+        def slow_down(state):
+            tokens, updated_at, rate, max_rate, blocked_until, waited_seconds, acquired, initialized = state
+            now = time.time()
+
+            # tokens settled at the old rate, the burst is dropped but reservations already handed out are kept;
+            # a bucket that is already paused (updated_at in the future) has nothing to settle yet
+            tokens = min(0.0, min(self.burst, tokens + max(0.0, now - updated_at) * rate))
+            rate = max(min_rate or max_rate / 16, rate / 2)
+            blocked_until = max(blocked_until, now + (retry_after if retry_after is not None else 1 / rate))
+
+            # the bucket refills from the end of the pause: reservations made during it are spaced at the new rate
+            # after blocked_until instead of all being due at blocked_until
+            return [tokens, blocked_until, rate, max_rate, blocked_until, waited_seconds, acquired, initialized], rate
+
+        return self.update(slow_down)
+
+    def success(self):
+        def speed_up(state):
+            state[2] = min(state[3], state[2] + state[3] / 20)
+            return state, state[2]
+
+        return self.update(speed_up)
+
+    def stats(self) -> dict:
+        tokens, updated_at, rate, max_rate, blocked_until, waited_seconds, acquired, initialized = BUCKET.unpack_from(self.memory)
+        return {"rate": round(rate, 3), "max_rate": max_rate, "acquired": acquired, "waited_seconds": round(waited_seconds, 3)}
+
+
+class HostRateLimiter:
+    """
+    rates: requests per second per host, e.g. {"scholar.google.com": 0.5}; other hosts get `default_rate`.
+    Every limiter pointed at the same `state_dir` shares the buckets, in this process or any other.
+    """
+
+    def __init__(self, rates: dict = None, default_rate: float = 1.0, burst: float = 1.0, state_dir: str = RATE_LIMIT_DIR, stale_after: float = STALE_AFTER):
+        self.rates = rates or {}
+        self.default_rate = default_rate
+        self.burst = burst
+        self.state_dir = state_dir
+        self.stale_after = stale_after
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+        # time this process spent waiting, next to the totals of every process kept in the buckets
+        self.local_waited_seconds = 0.0
+
+        os.makedirs(state_dir, exist_ok=True)
+
+    def bucket(self, url: str) -> HostBucket:
+        host = urlsplit(url).netloc or url
+        with self.lock:
+            if host not in self.buckets:
+                self.buckets[host] = HostBucket(os.path.join(self.state_dir, host.replace(":", "_")), self.rates.get(host, self.default_rate), self.burst, self.stale_after)
+            return self.buckets[host]
+
+    def acquire(self, url: str) -> float:
+        wait = self.bucket(url).reserve()
+        if wait:
+            time.sleep(wait)
+            with self.lock:
+                self.local_waited_seconds += wait
+        return wait
+
+    def throttled(self, url: str, retry_after: float = None):
+        self.bucket(url).throttled(retry_after)
+
+    def success(self, url: str):
+        self.bucket(url).success()
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {host: bucket.stats() for host, bucket in self.buckets.items()}
+
+
+def retry_after_seconds(retry_after: str):
+    # Retry-After is either seconds or an HTTP date: https://httpwg.org/specs/rfc9110.html#field.retry-after
+    if not retry_after:
+        return None
+    if retry_after.strip().isdigit():
+        return float(retry_after)
+
+    try:
+        retry_at = parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class RateLimitedSession(requests.Session):
+    """requests.Session that waits for a token before every request and feeds 429/503 back to the limiter."""
+
+    def __init__(self, rate_limiter: HostRateLimiter):
+        super().__init__()
+        self.rate_limiter = rate_limiter
+
+    def request(self, method, url, *args, **kwargs):
+        self.rate_limiter.acquire(url)
+        response = super().request(method, url, *args, **kwargs)
+
+        if response.status_code in (429, 503):
+            self.rate_limiter.throttled(url, retry_after_seconds(response.headers.get("Retry-After")))
+        elif response.status_code < 400:
+            # only answers that went through speed the host back up, 500/502/504 leave the rate as it is
+            self.rate_limiter.success(url)
+
+        return response
+
+
+def hammer_host(url: str, requests_count: int, threads: int, rate: float, state_dir: str) -> dict:
+    # one worker process: `threads` threads sending `requests_count` requests through one limiter (or none)
+    rate_limiter = HostRateLimiter(default_rate=rate, state_dir=state_dir) if state_dir else None
+    session = RateLimitedSession(rate_limiter) if rate_limiter else requests.Session()
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        statuses = list(executor.map(lambda _: session.get(url, timeout=30).status_code, range(requests_count)))
+
+    return {"ok": statuses.count(200), "throttled": statuses.count(429), "waited_seconds": rate_limiter.local_waited_seconds if rate_limiter else 0.0}
+
+
+def benchmark_shared_rate_limiter_locally(host_rate: float = 20.0, host_burst: float = 3.0, processes: int = 4, threads: int = 4, requests_per_process: int = 50):
+    # local host that allows `host_rate` requests per second with bursts of `host_burst` and answers 429 above it
+    allowance = {"tokens": host_burst, "updated_at": time.monotonic()}
+    allowance_lock = threading.Lock()
+
+    class RateLimitedStubHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            with allowance_lock:
+                now = time.monotonic()
+                allowance["tokens"] = min(host_burst, allowance["tokens"] + (now - allowance["updated_at"]) * host_rate)
+                allowance["updated_at"] = now
+                allowed = allowance["tokens"] >= 1
+                if allowed:
+                    allowance["tokens"] -= 1
+
+            body = b"ok" if allowed else b"slow down"
+            self.send_response(200 if allowed else 429)
+            if not allowed:
+                self.send_header("Retry-After", "1")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), RateLimitedStubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/search"
+
+    state_root = tempfile.mkdtemp(prefix="host_rate_limits_benchmark_")
+
+    variants = {
+        "no limiter": lambda worker: None,
+        "limiter per process": lambda worker: os.path.join(state_root, f"process_{worker}"),  # every process thinks it has the whole rate
+        "shared limiter": lambda worker: os.path.join(state_root, "shared")
+    }
+
+    with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn")) as executor:
+        for name, state_dir in variants.items():
+            start = time.perf_counter()
+            reports = list(executor.map(hammer_host, [url] * processes, [requests_per_process] * processes, [threads] * processes,
+                                        [host_rate] * processes, [state_dir(worker) for worker in range(processes)]))
+            seconds = time.perf_counter() - start
+
+            ok = sum(report["ok"] for report in reports)
+            throttled = sum(report["throttled"] for report in reports)
+            waited = sum(report["waited_seconds"] for report in reports)
+            print(f"{name}: {ok} ok, {throttled} 429s, {ok / seconds:.1f} ok/s (host allows {host_rate}/s), {seconds:.2f}s, waited {waited:.1f}s in total")
+
+    server.shutdown()
+    shutil.rmtree(state_root)
+
+
+if __name__ == "__main__":
+    benchmark_shared_rate_limiter_locally()
@@ -0,0 +1,360 @@
+"""
+One long-lived Playwright browser for the ResearchGate scrapers: publications and questions search, authors,
+profile, individual publication and institution members jobs share its tabs and can run in one process.
+
+Listing pages return only the outer HTML of result cards and the pagination buttons instead of the whole page.content(),
+detail pages return <body> without scripts and styles.
+"""
+
+from parsel import Selector
+from playwright.async_api import async_playwright
+from urllib.parse import urlencode, quote
+import asyncio, re, time
+
+# images, fonts and CSS aren't needed to read the HTML
+# https://playwright.dev/python/docs/network#abort-requests
+BLOCKED_RESOURCE_TYPES = {"image", "font", "stylesheet", "media"}
+
+# outer HTML of every element matched by the selectors, in document order, evaluated inside the page.
+# An element inside another matched element is skipped, it's already a part of the outer element's HTML.
+FRAGMENTS_JS = """
+selectors => {
+    const elements = new Set(selectors.flatMap(selector => Array.from(document.querySelectorAll(selector))));
+
+    return Array.from(elements)
+        .filter(element => {
+            for (let parent = element.parentElement; parent; parent = parent.parentElement) {
+                if (elements.has(parent)) return false;
+            }
+            return true;
+        })
+        .sort((a, b) => a.compareDocumentPosition(b) & Node.DOCUMENT_POSITION_FOLLOWING ? -1 : 1)
+        .map(element => element.outerHTML)
+        .join("");
+}
+"""
+
+BODY_WITHOUT_SCRIPTS_JS = """
+() => {
+    const body = document.body.cloneNode(true);
+    body.querySelectorAll("script, style, noscript, svg, link").forEach(element => element.remove());
+    return body.outerHTML;
+}
+"""
+
+SEARCH_RESULT_SELECTOR = ".nova-legacy-c-card__body--spacing-inherit"
+MEMBER_SELECTOR = ".nova-legacy-v-person-list-item"
+
+# greyed out next page arrow `attr(rel)` (inactive)
+PAGINATION_SELECTOR = ".nova-legacy-c-button-group"
+LAST_PAGE_SELECTOR = ".nova-legacy-c-button-group__item:nth-child(9) a::attr(rel)"
+
+
+class AdaptiveRate:
+    """
+    Replaces the fixed time.sleep(2) between pages:
+    the delay doubles when ResearchGate answers with 429/5xx and halves after every successful page, but never goes below `min_delay`.
+    The delay is kept between the starts of any two requests, so 4 tabs don't send 4 pages at once.
+    """
+
+    def __init__(self, min_delay: float = 0.5, max_delay: float = 30.0):
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.delay = min_delay
+        self.next_request_at = 0.0
+        self.lock = asyncio.Lock()
+
+    async def wait(self):
+        # every tab books the next free slot under the lock and sleeps outside of it
+        async with self.lock:
+            now = time.monotonic()
+            request_at = max(now, self.next_request_at)
+            self.next_request_at = request_at + self.delay
+
+        await asyncio.sleep(request_at - now)
+
+    def success(self):
+        self.delay = max(self.min_delay, self.delay / 2)
+
+    def throttled(self):
+        self.delay = min(self.max_delay, max(self.delay * 2, 1.0))
+
+
+def listing_finished(status: int, items: list, last_page: bool, empty_pages: int, max_empty_pages: int) -> bool:
+    # the last page, an error page (403, 404, ...) or `max_empty_pages` pages in a row without results end a listing
+    return status != 200 or last_page or (not items and empty_pages >= max_empty_pages)
+
+
+class ResearchGateEngine:
+    def __init__(self, tabs_count: int = 8, min_delay: float = 0.5, max_empty_pages: int = 2, base_url: str = "https://www.researchgate.net"):
+        self.tabs_count = tabs_count
+        self.min_delay = min_delay
+        self.max_empty_pages = max_empty_pages
+        self.base_url = base_url
+
+    async def __aenter__(self):
+        self.playwright = await async_playwright().start()
+        self.browser = await self.playwright.chromium.launch(headless=True)
+        self.context = await self.browser.new_context(user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/101.0.4951.64 Safari/537.36")
+        await self.context.route("**/*", self.block_heavy_resources)
+
+        # warm tabs and one request rate shared by every job
+        self.tabs = asyncio.Queue()
+        for _ in range(self.tabs_count):
+            self.tabs.put_nowait(await self.context.new_page())
+        self.rate = AdaptiveRate(min_delay=self.min_delay)
+
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.browser.close()
+        await self.playwright.stop()
+
+    @staticmethod
+    async def block_heavy_resources(route):
+        if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def fetch_page(self, path: str, selectors: list[str] = None, retries: int = 5) -> tuple[int, Selector]:
+        """
+        Opens `path` in a free tab, returns the status and only `selectors` outer HTML or the cleaned <body> if no selectors passed.
+        429/5xx answers are retried after a longer delay.
+        """
+
+        page = await self.tabs.get()
+        try:
+            for _ in range(retries):
+                await self.rate.wait()
+                response = await page.goto(f"{self.base_url}{path}")
+
+                if response and (response.status == 429 or response.status >= 500):
+                    self.rate.throttled()
+                    continue
+
+                self.rate.success()
+
+                if selectors:
+                    html = await page.evaluate(FRAGMENTS_JS, selectors)
+                else:
+                    html = await page.evaluate(BODY_WITHOUT_SCRIPTS_JS)
+
+                return response.status if response else 200, Selector(text=f"<html><body>{html}</body></html>")
+
+            raise RuntimeError(f"{path} is still throttled after {retries} retries.")
+        finally:
+            self.tabs.put_nowait(page)
+
+    async def fetch(self, path: str, selectors: list[str] = None) -> Selector:
+        status, selector = await self.fetch_page(path, selectors)
+        return selector
+
+    async def crawl_listing(self, path_template: str, item_selector: str, parse_item, is_last_page, extra_selectors: tuple = (PAGINATION_SELECTOR,)):
+        """
+        Paginated listings: the last page isn't known upfront, so the next `tabs_count` pages are requested at once.
+        Results are kept in page order and pages after the last one are dropped.
+        `extra_selectors` are captured next to the items for `is_last_page` to look at.
+        """
+
+        results = []
+        page_num = 1
+        empty_pages = 0
+
+        while True:
+            page_numbers = range(page_num, page_num + self.tabs_count)
+            pages = await asyncio.gather(*(
+                self.fetch_page(path_template.format(page_num=number), [item_selector, *extra_selectors]) for number in page_numbers
+            ))
+
+            for number, (status, selector) in zip(page_numbers, pages):
+                print(f"{path_template.format(page_num=number)} page number: {number}")
+
+                items = [parse_item(item) for item in selector.css(item_selector)]
+                results.extend(items)
+                empty_pages = 0 if items else empty_pages + 1
+
+                if listing_finished(status, items, bool(is_last_page(selector)), empty_pages, self.max_empty_pages):
+                    return results
+
+            page_num += self.tabs_count
+
+
+def parse_publication(publication: Selector) -> dict:
+    return {
+        "title": publication.css(".nova-legacy-v-publication-item__title .nova-legacy-e-link--theme-bare::text").get().title(),
+        "link": f'https://www.researchgate.net{publication.css(".nova-legacy-v-publication-item__title .nova-legacy-e-link--theme-bare::attr(href)").get()}',
+        "source_link": f'https://www.researchgate.net{publication.css(".nova-legacy-v-publication-item__preview-source .nova-legacy-e-link--theme-bare::attr(href)").get()}',
+        "publication_type": publication.css(".nova-legacy-v-publication-item__badge::text").get(),
+        "publication_date": publication.css(".nova-legacy-v-publication-item__meta-data-item:nth-child(1) span::text").get(),
+        "publication_doi": publication.css(".nova-legacy-v-publication-item__meta-data-item:nth-child(2) span").xpath("normalize-space()").get(),
+        "publication_isbn": publication.css(".nova-legacy-v-publication-item__meta-data-item:nth-child(3) span").xpath("normalize-space()").get(),
+        "authors": publication.css(".nova-legacy-v-person-inline-item__fullname::text").getall()
+    }
+
+
+def parse_question(question: Selector) -> dict:
+    return {
+        "title": question.css(".nova-legacy-v-question-item__title .nova-legacy-e-link--theme-bare::text").get().title(),
+        "link": f'https://www.researchgate.net{question.css(".nova-legacy-v-question-item__title .nova-legacy-e-link--theme-bare::attr(href)").get()}',
+        "snippet": question.css(".redraft-text::text").get(),
+        "question_type": question.css(".nova-legacy-v-question-item__badge::text").get(),
+        "question_date": question.css(".nova-legacy-v-question-item__meta-data-item:nth-child(1) span::text").get(),
+        "views": {
+            "views_count": question.css(".nova-legacy-v-question-item__metrics-item:nth-child(1) .nova-legacy-e-link--theme-bare::text").get(),
+            "views_link": question.css(".nova-legacy-v-question-item__metrics-item:nth-child(1) .nova-legacy-e-link--theme-bare::attr(href)").get()
+            },
+        "answer": {
+            "answer_count": question.css(".nova-legacy-v-question-item__metrics-item+ .nova-legacy-v-question-item__metrics-item .nova-legacy-e-link--theme-bare::text").get(),
+            "answers_link": question.css(".nova-legacy-v-question-item__metrics-item+ .nova-legacy-v-question-item__metrics-item .nova-legacy-e-link--theme-bare::attr(href)").get()
+        }
+    }
+
+
+def parse_author(author: Selector) -> dict:
+    return {
+        "name": author.css(".nova-legacy-v-person-item__title a::text").get(),
+        "profile_page": f'https://www.researchgate.net/{author.css("a.nova-legacy-c-button::attr(href)").get()}',
+        "institution": author.css(".nova-legacy-v-person-item__stack-item:nth-child(3) span::text").get(),
+        "department": author.css(".nova-legacy-v-person-item__stack-item:nth-child(4) span").xpath("normalize-space()").get(),
+        "thumbnail": author.css(".nova-legacy-v-person-item__image img::attr(src)").get(),
+        "last_publication": {
+            "title": author.css(".nova-legacy-v-person-item__info-section-list-item .nova-legacy-e-link--theme-bare::text").get(),
+            "link": f'https://www.researchgate.net{author.css(".nova-legacy-v-person-item__info-section-list-item .nova-legacy-e-link--theme-bare::attr(href)").get()}'
+        },
+        "skills": author.css(".nova-legacy-v-person-item__stack-item:nth-child(5) span").xpath("normalize-space()").getall(),
+    }
+
+
+def parse_member(member: Selector) -> dict:
+    return {
+        "name": member.css(".nova-legacy-v-person-list-item__align-content a::text").get(),
+        "link": f'https://www.researchgate.net{member.css(".nova-legacy-v-person-list-item__align-content a::attr(href)").get()}',
+        "profile_photo": member.css(".nova-legacy-l-flex__item img::attr(src)").get(),
+        "department": member.css(".nova-legacy-v-person-list-item__stack-item:nth-child(2) span::text").get(),
+        "descipline": member.css("span .nova-legacy-e-link::text").getall()
+    }
+
+
+def is_last_search_page(selector: Selector) -> bool:
+    return bool(selector.css(LAST_PAGE_SELECTOR).get())
+
+
+def is_page_not_found(selector: Selector) -> bool:
+    return bool(selector.css(".headline::text").get())
+
+
+def search_path(search_type: str, query: str) -> str:
+    # the query is URL-encoded, "{page_num}" is filled in by crawl_listing()
+    return f"/search/{search_type}?{urlencode({'q': query})}&page={{page_num}}"
+
+
+async def scrape_researchgate_publications(engine: ResearchGateEngine, query: str):
+    return await engine.crawl_listing(search_path("publication", query), SEARCH_RESULT_SELECTOR, parse_publication, is_last_search_page)
+
+
+async def scrape_researchgate_questions(engine: ResearchGateEngine, query: str):
+    return await engine.crawl_listing(search_path("question", query), SEARCH_RESULT_SELECTOR, parse_question, is_last_search_page)
+
+
+async def scrape_researchgate_authors(engine: ResearchGateEngine, query: str):
+    return await engine.crawl_listing(search_path("researcher", query), SEARCH_RESULT_SELECTOR, parse_author, is_last_search_page)
+
+
+async def scrape_institution_members(engine: ResearchGateEngine, institution: str):
+    # "Page not found" headline is captured next to the member cards to know when to stop
+    return await engine.crawl_listing(f"/institution/{quote(institution)}/members/{{page_num}}", MEMBER_SELECTOR, parse_member,
+                                      is_page_not_found, extra_selectors=(".headline",))
+
+
+async def scrape_researchgate_profile(engine: ResearchGateEngine, profile: str):
+    selector = await engine.fetch(f"/profile/{quote(profile)}")
+
+    profile_data = {
+        "basic_info": {},
+        "about": {},
+        "co_authors": [],
+        "publications": [],
+    }
+
+    profile_data["basic_info"]["name"] = selector.css(".nova-legacy-e-text.nova-legacy-e-text--size-xxl::text").get()
+    profile_data["basic_info"]["institution"] = selector.css(".nova-legacy-v-institution-item__stack-item a::text").get()
+    profile_data["basic_info"]["department"] = selector.css(".nova-legacy-e-list__item.nova-legacy-v-institution-item__meta-data-item:nth-child(1)").xpath("normalize-space()").get()
+    profile_data["basic_info"]["current_position"] = selector.css(".nova-legacy-e-list__item.nova-legacy-v-institution-item__info-section-list-item").xpath("normalize-space()").get()
+    profile_data["basic_info"]["lab"] = selector.css(".nova-legacy-o-stack__item .nova-legacy-e-link--theme-bare b::text").get()
+
+    profile_data["about"]["number_of_publications"] = re.search(r"\d+", selector.css(".nova-legacy-c-card__body .nova-legacy-o-grid__column:nth-child(1)").xpath("normalize-space()").get()).group()
+    profile_data["about"]["reads"] = re.search(r"\d+", selector.css(".nova-legacy-c-card__body .nova-legacy-o-grid__column:nth-child(2)").xpath("normalize-space()").get()).group()
+    profile_data["about"]["citations"] = re.search(r"\d+", selector.css(".nova-legacy-c-card__body .nova-legacy-o-grid__column:nth-child(3)").xpath("normalize-space()").get()).group()
+    profile_data["about"]["introduction"] = selector.css(".nova-legacy-o-stack__item .Linkify").xpath("normalize-space()").get()
+    profile_data["about"]["skills"] = selector.css(".nova-legacy-l-flex__item .nova-legacy-e-badge ::text").getall()
+
+    for co_author in selector.css(".nova-legacy-c-card--spacing-xl .nova-legacy-c-card__body--spacing-inherit .nova-legacy-v-person-list-item"):
+        profile_data["co_authors"].append({
+            "name": co_author.css(".nova-legacy-v-person-list-item__align-content .nova-legacy-e-link::text").get(),
+            "link": co_author.css(".nova-legacy-l-flex__item a::attr(href)").get(),
+            "avatar": co_author.css(".nova-legacy-l-flex__item .lite-page-avatar img::attr(data-src)").get(),
+            "current_institution": co_author.css(".nova-legacy-v-person-list-item__align-content li").xpath("normalize-space()").get()
+        })
+
+    for publication in selector.css("#publications+ .nova-legacy-c-card--elevation-1-above .nova-legacy-o-stack__item"):
+        profile_data["publications"].append({
+            "title": publication.css(".nova-legacy-v-publication-item__title .nova-legacy-e-link--theme-bare::text").get(),
+            "date_published": publication.css(".nova-legacy-v-publication-item__meta-data-item span::text").get(),
+            "authors": publication.css(".nova-legacy-v-person-inline-item__fullname::text").getall(),
+            "publication_type": publication.css(".nova-legacy-e-badge--theme-solid::text").get(),
+            "description": publication.css(".nova-legacy-v-publication-item__description::text").get(),
+            "publication_link": publication.css(".nova-legacy-c-button-group__item .nova-legacy-c-button::attr(href)").get(),
+        })
+
+    return profile_data
+
+
+async def scrape_researchgate_publication(engine: ResearchGateEngine, publication: str):
+    # accepts publication ID: 340715390
+    # as well as full path: researchgate.net/publication/340715390_Transforming_Technology_for_Global_Business_Acceleration_and_Change_Management
+    selector = await engine.fetch(f"/publication/{quote(publication)}")
+
+    pubilication_data = {
+        "publication_info": {},
+        "references": [],
+        "recomendations": []
+    }
+
+    pubilication_data["publication_info"]["publication_title"] = selector.css(".research-detail-header-section__title::text").get()
+    pubilication_data["publication_info"]["publication_type"] = selector.css(".research-detail-header-section__badge:nth-child(2)::text").get()
+    pubilication_data["publication_info"]["publication_authors"] = selector.css(".nova-legacy-v-person-list-item__align-content div::text").getall()
+    pubilication_data["publication_info"]["publication_date"] = selector.css(".nova-legacy-e-text--color-grey-700 .nova-legacy-e-list__item:nth-child(1)::text").get()
+    pubilication_data["publication_info"]["pdf_availability"] = selector.css(".research-detail-header-section__badge:nth-child(3)::text").get()
+    pubilication_data["publication_info"]["pdf_link"] = f'https://www.researchgate.net{selector.css(".research-detail-header-cta__buttons a:nth-child(1)::attr(href)").get()}'
+    pubilication_data["publication_info"]["publication_full_text_link"] = selector.css(".research-detail-header-cta__buttons a:nth-child(2)::attr(href)").get()
+    pubilication_data["publication_info"]["publication_journal"] = selector.css(".nova-legacy-e-text--color-grey-700+ .nova-legacy-e-text--color-grey-700 .nova-legacy-e-link--theme-decorated::text").get()
+    pubilication_data["publication_info"]["publication_journal_link"] = f'https://www.researchgate.net{selector.css(".nova-legacy-e-text--color-grey-700+ .nova-legacy-e-text--color-grey-700 .nova-legacy-e-link--theme-decorated::attr(href)").get()}'
+    pubilication_data["publication_info"]["citation_link"] = selector.css(".nova-legacy-l-flex__item.hide-l a:nth-child(1)::attr(href)").get()
+
+    for reference in selector.css(".publication-citations__item--redesign"):
+        pubilication_data["references"].append({
+            "title": reference.css(".nova-legacy-v-publication-item__title::text").get(),
+            "link": f'https://www.researchgate.net{reference.css(".nova-legacy-v-publication-item__title a::attr(href)").get()}',
+            "reference_type": reference.css(".nova-legacy-v-publication-item__type::text").get(),
+            "full_text_availability": reference.css(".nova-legacy-v-publication-item__fulltext::text").get(),
+            "authors": reference.css(".nova-legacy-v-person-inline-item__fullname::text").getall(),
+            "publication_date": reference.css(".nova-legacy-v-publication-item__meta-data-item:nth-child(1) span::text").get(),
+        })
+
+    for recommendation in selector.css(".nova-legacy-c-card__body.nova-legacy-c-card__body--spacing-inherit"):
+        pubilication_data["recomendations"].append({
+            "type": recommendation.css(".nova-legacy-e-badge::text").get(),
+            "title": recommendation.css(".nova-legacy-e-text.nova-legacy-e-text--size-l a::text").get(),
+            "link": recommendation.css(".nova-legacy-e-text.nova-legacy-e-text--size-l a::attr(href)").get(),
+            "authors": recommendation.css(".nova-legacy-v-person-inline-item__fullname::text").getall(),
+            "date": recommendation.css(".nova-legacy-e-text span:nth-child(1)::text").getall(),
+        })
+
+    return pubilication_data
+
+
+async def run_researchgate_job(job, *args, tabs_count: int = 4, **kwargs):
+    # a single job on its own engine, for the per-page scripts
+    async with ResearchGateEngine(tabs_count=tabs_count) as engine:
+        return await job(engine, *args, **kwargs)
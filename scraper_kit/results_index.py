@@ -0,0 +1,74 @@
+"""
+SQLite index of the Google Scholar results seen by previous runs, so an incremental run returns only new or changed ones.
+"""
+
+import json, time, sqlite3, hashlib, threading
+
+# results seen so far, for incremental runs
+SCHOLAR_INDEX_PATH = "scholar_results_index.db"
+
+
+class ScholarResultsIndex:
+    """
+    (scope, result id) -> content hash, first and last seen time, kept in SQLite between runs.
+
+    scope is the search the results belong to, e.g. the "q" or "mauthors" of the request, so different queries
+    and scrapers can share one database without one's results counting as known for another.
+
+    `refresh(records, scope)` returns only new or changed records and whether the whole page was known before, without writing anything.
+    Refreshed records are written by `commit()`, which the caller runs after it emitted them: a run that fails before that
+    leaves the index as it was and the next run returns the same records again.
+    """
+
+    def __init__(self, path: str = SCHOLAR_INDEX_PATH, key: str = "result_id"):
+        self.key = key
+        # (scope, result id) -> content hash of every refreshed record that isn't committed yet
+        self.pending = {}
+        # check_same_thread=False + lock: one connection shared by every worker thread
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+
+        with self.lock, self.connection:
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS scoped_results (
+                    scope        TEXT NOT NULL,
+                    result_id    TEXT NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    first_seen   REAL NOT NULL,
+                    last_seen    REAL NOT NULL,
+                    PRIMARY KEY (scope, result_id)
+                )""")
+
+    @staticmethod
+    def content_hash(record: dict) -> str:
+        return hashlib.blake2b(json.dumps(record, sort_keys=True, ensure_ascii=False).encode(), digest_size=16).hexdigest()
+
+    def refresh(self, records: list[dict], scope: str = "") -> tuple[list[dict], bool]:
+        hashes = {record[self.key]: self.content_hash(record) for record in records}
+
+        with self.lock:
+            # one lookup per page
+            known = dict(self.connection.execute(
+                f"SELECT result_id, content_hash FROM scoped_results WHERE scope = ? AND result_id IN ({','.join('?' * len(hashes))})", [scope, *hashes]))
+
+            self.pending.update({(scope, result_id): content_hash for result_id, content_hash in hashes.items()})
+
+        fresh = [record for record in records if known.get(record[self.key]) != hashes[record[self.key]]]
+        page_known = bool(records) and not fresh
+        return fresh, page_known
+
+    def commit(self):
+        now = time.time()
+
+        with self.lock, self.connection:
+            # one upsert for everything refreshed since the last commit
+            self.connection.executemany("""
+                INSERT INTO scoped_results (scope, result_id, content_hash, first_seen, last_seen) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (scope, result_id) DO UPDATE SET content_hash = excluded.content_hash, last_seen = excluded.last_seen""",
+                [(scope, result_id, content_hash, now, now) for (scope, result_id), content_hash in self.pending.items()])
+            self.pending.clear()
+
+    def close(self):
+        # records that weren't committed are dropped, they count as new on the next run
+        self.connection.close()
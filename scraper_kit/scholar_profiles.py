@@ -0,0 +1,204 @@
+"""
+Google Scholar author search (view_op=search_authors): parsing, the serial crawl and the pipelined
+multi-query crawl used by the university profile scrapers.
+"""
+
+from parsel import Selector
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import requests, re, threading, time
+
+SCHOLAR_CITATIONS_URL = "https://scholar.google.com/citations"
+
+# https://docs.python-requests.org/en/master/user/quickstart/#custom-headers
+headers = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/98.0.4758.87 Safari/537.36",
+}
+
+# https://regex101.com/r/e0mq0C/1
+NEXT_PAGE_TOKEN = re.compile(r"after_author\\x3d([^\\]+)\\x26")
+
+
+def parse_profiles(select: Selector) -> list[dict]:
+    profiles = []
+
+    for profile in select.css(".gs_ai_chpr"):
+        name = profile.css(".gs_ai_name a::text").get()
+        link = f'https://scholar.google.com{profile.css(".gs_ai_name a::attr(href)").get()}'
+        affiliations = profile.css(".gs_ai_aff").xpath("normalize-space()").get()
+        email = profile.css(".gs_ai_eml::text").get()
+        cited_by = profile.css(".gs_ai_cby::text").re_first(r"\d+")  # Cited by 17143 -> 17143
+        interests = profile.css(".gs_ai_one_int::text").getall()
+
+        profiles.append({
+            "profile_name": name,
+            "profile_link": link,
+            "profile_affiliations": affiliations,
+            "profile_email": email,
+            "profile_city_by_count": cited_by,
+            "profile_interests": interests
+        })
+
+    return profiles
+
+
+def search_authors_params(label: str, university_name: str) -> dict:
+    # https://docs.python-requests.org/en/master/user/quickstart/#passing-parameters-in-urls
+    return {
+        "view_op": "search_authors",                       # author results
+        "mauthors": f'label:{label} "{university_name}"',  # search query
+        "hl": "en",                                        # language
+        "astart": 0                                        # page number
+    }
+
+
+def scrape_all_profiles_from_university(label: str, university_name: str, index=None, base_url: str = SCHOLAR_CITATIONS_URL) -> list[dict]:
+    """
+    Every page of one label/university query, one request after another.
+    With an `index` (scraper_kit.results_index.ScholarResultsIndex keyed by "profile_link"), only new or changed profiles are returned
+    and pagination stops at the first page that was already known. index.commit() after saving them marks them as known.
+    """
+
+    params = search_authors_params(label, university_name)
+    profile_results = []
+
+    while True:
+        html = requests.get(base_url, params=params, headers=headers, timeout=30).text
+
+        print(f"extracting authors at page #{params['astart']}.")
+
+        profiles = parse_profiles(Selector(html))
+
+        if index:
+            fresh_profiles, page_known = index.refresh(profiles, scope=params["mauthors"])
+            profile_results.extend(fresh_profiles)
+
+            if page_known:
+                break
+        else:
+            profile_results.extend(profiles)
+
+        # if next page token is present -> update next page token and increment 10 to get the next page
+        next_page_token = NEXT_PAGE_TOKEN.search(html)
+        if not next_page_token:
+            break
+
+        params["after_author"] = next_page_token.group(1)  # -> XB0HAMS9__8J
+        params["astart"] += 10
+
+    return profile_results
+
+
+def pipelined_scrape_profiles_from_university(session: requests.Session, fetch_pool: ThreadPoolExecutor, label: str, university_name: str,
+                                              base_url: str = SCHOLAR_CITATIONS_URL) -> list[dict]:
+    params = search_authors_params(label, university_name)
+
+    def fetch_page(page_params: dict) -> str:
+        return session.get(base_url, params=page_params, timeout=30).text
+
+    profile_results = []
+
+    # params are copied on submit so the next page could be requested while this one is still in flight
+    next_page = fetch_pool.submit(fetch_page, dict(params))
+    while next_page:
+        html = next_page.result()
+
+        # next page token is grabbed from the raw HTML so the next request starts before the current page is parsed
+        next_page_token = NEXT_PAGE_TOKEN.search(html)
+
+        if next_page_token:
+            params["after_author"] = next_page_token.group(1)  # -> XB0HAMS9__8J
+            params["astart"] += 10
+            next_page = fetch_pool.submit(fetch_page, dict(params))
+        else:
+            next_page = None
+
+        profile_results.extend(parse_profiles(Selector(html)))
+
+    return profile_results
+
+
+def scrape_all_profiles_from_universities(queries: list[tuple[str, str]], max_workers: int = 8, session: requests.Session = None,
+                                          base_url: str = SCHOLAR_CITATIONS_URL) -> list[list[dict]]:
+    """
+    Many label/university queries at once. `session` can be passed in to wrap it, e.g. a RateLimitedSession.
+    Results are in the same order as `queries`.
+    """
+
+    # one keep-alive connection pool shared by every query
+    # https://requests.readthedocs.io/en/latest/user/advanced/#transport-adapters
+    session = session or requests.Session()
+    session.headers.update(headers)
+    session.mount("https://", HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers))
+    session.mount("http://", HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers))
+
+    # queries and page fetches get separate pools so a query never waits on a fetch queued behind itself
+    with ThreadPoolExecutor(max_workers=max_workers) as fetch_pool, ThreadPoolExecutor(max_workers=max_workers) as query_pool:
+        # map() keeps the results in the same order as the queries
+        return list(query_pool.map(lambda query: pipelined_scrape_profiles_from_university(session, fetch_pool, *query, base_url=base_url), queries))
+
+
+def benchmark_serial_vs_pipelined(queries: list[tuple[str, str]], max_workers: int = 8, base_url: str = SCHOLAR_CITATIONS_URL):
+    start = time.perf_counter()
+    serial_results = [scrape_all_profiles_from_university(label, university_name, base_url=base_url) for label, university_name in queries]
+    serial_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pipelined_results = scrape_all_profiles_from_universities(queries, max_workers=max_workers, base_url=base_url)
+    pipelined_time = time.perf_counter() - start
+
+    print(f"serial: {serial_time:.2f}s, pipelined: {pipelined_time:.2f}s, speedup: {serial_time / pipelined_time:.2f}x")
+    print(f"same ordered results: {serial_results == pipelined_results}")
+
+
+def fake_profiles_page(mauthors: str, astart: int, pages: int = 5) -> str:
+    # same markup as scholar.google.com/citations?view_op=search_authors, 10 profiles per page
+    profiles = "".join(f"""
+        <div class="gs_ai_chpr"><div class="gs_ai_t">
+            <h3 class="gs_ai_name"><a href="/citations?hl=en&amp;user={mauthors[:8]}{astart + index}">Author {astart + index}</a></h3>
+            <div class="gs_ai_aff">{mauthors} university</div>
+            <div class="gs_ai_eml">Verified email at example.edu</div>
+            <div class="gs_ai_cby">Cited by {1000 - astart - index}</div>
+            <div class="gs_ai_int"><a class="gs_ai_one_int">Biology</a><a class="gs_ai_one_int">Genetics</a></div>
+        </div></div>""" for index in range(10))
+
+    # the "next" button carries the token of the next page in an escaped onclick URL, like Scholar does
+    next_button = (f"""<button class="gs_btnPR" onclick="window.location='/citations?view_op\\x3dsearch_authors\\x26hl\\x3den"""
+                   f"""\\x26after_author\\x3dtoken{astart + 10}\\x26astart\\x3d{astart + 10}'"></button>""") if astart + 10 < pages * 10 else ""
+
+    return f"<html><body>{profiles}{next_button}</body></html>"
+
+
+def start_scholar_profiles_stub(latency: float = 0.1, pages: int = 5) -> tuple[ThreadingHTTPServer, str]:
+    # local stand-in for scholar.google.com/citations that answers after `latency` seconds
+    class ProfilesStubHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            query = parse_qs(urlsplit(self.path).query)
+            time.sleep(latency)
+
+            body = fake_profiles_page(query["mauthors"][0], int(query["astart"][0]), pages).encode()
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ProfilesStubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    return server, f"http://127.0.0.1:{server.server_port}/citations"
+
+
+def benchmark_serial_vs_pipelined_locally(queries_count: int = 6, pages: int = 5, latency: float = 0.1, max_workers: int = 8):
+    server, base_url = start_scholar_profiles_stub(latency, pages)
+    queries = [("biology", f"University {index}") for index in range(queries_count)]
+
+    benchmark_serial_vs_pipelined(queries, max_workers=max_workers, base_url=base_url)
+
+    server.shutdown()
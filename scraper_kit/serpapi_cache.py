@@ -0,0 +1,165 @@
+"""
+TTL cache for SerpApi GoogleSearch/NaverSearch results: an in-memory LRU in front of JSON files on disk.
+"""
+
+from collections import OrderedDict
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import json, os, time, hashlib, threading, tempfile, shutil
+
+
+class CachedSearch:
+    """
+    Wraps GoogleSearch/NaverSearch and caches get_dict() results by search parameters without api_key.
+
+    Results are looked up in an in-memory LRU first, then in JSON files on disk that expire after `ttl` seconds.
+    The oldest files are removed once the cache folder grows over `max_disk_bytes`.
+    Everything else, like params_dict used for pagination, is passed through to the wrapped search.
+    """
+
+    # shared by every CachedSearch in the process that uses the same cache_dir: {cache_dir: {cache key: (saved at, JSON text)}}
+    # a new CachedSearch per page still finds the pages before it, but another folder is another cache
+    memory_caches = {}
+    lock = threading.Lock()
+    stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+    def __init__(self, search, cache_dir: str = ".serpapi_cache", ttl: int = 24 * 60 * 60, max_memory_items: int = 256, max_disk_bytes: int = 100 * 1024 * 1024):
+        self.search = search
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_memory_items = max_memory_items
+        self.max_disk_bytes = max_disk_bytes
+
+        with self.lock:
+            self.memory_cache = self.memory_caches.setdefault(os.path.abspath(cache_dir), OrderedDict())
+
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def __getattr__(self, name):
+        return getattr(self.search, name)
+
+    def cache_key(self) -> str:
+        # "source" and "output" are added to params_dict by the SerpApi client itself
+        params = {key: value for key, value in self.search.params_dict.items() if key not in ("api_key", "serp_api_key", "source", "output")}
+        return hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+
+    def count(self, stat: str):
+        with self.lock:
+            self.stats[stat] += 1
+
+    def get_dict(self) -> dict:
+        key = self.cache_key()
+        cache_path = os.path.join(self.cache_dir, f"{key}.json")
+
+        with self.lock:
+            if key in self.memory_cache and time.time() - self.memory_cache[key][0] < self.ttl:
+                self.memory_cache.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return json.loads(self.memory_cache[key][1])
+
+        if os.path.exists(cache_path) and time.time() - os.path.getmtime(cache_path) < self.ttl:
+            with open(cache_path, encoding="utf-8") as cache_file:
+                results_json = cache_file.read()
+            self.count("disk_hits")
+        else:
+            results = self.search.get_dict()
+            self.count("misses")
+
+            # errors like an invalid API key shouldn't be served from cache later
+            if "error" in results:
+                return results
+
+            results_json = json.dumps(results)
+
+            # written next to the cache file and renamed over it: a reader or a crash mid-write never leaves a truncated JSON behind
+            file_descriptor, temp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=f"{key}.", suffix=".tmp")
+            try:
+                with os.fdopen(file_descriptor, "w", encoding="utf-8") as cache_file:
+                    cache_file.write(results_json)
+                os.replace(temp_path, cache_path)
+            except BaseException:
+                os.remove(temp_path)
+                raise
+            self.evict_disk_cache()
+
+        # the memory entry expires together with the file it came from, not `ttl` after it was read
+        saved_at = os.path.getmtime(cache_path) if os.path.exists(cache_path) else time.time()
+
+        with self.lock:
+            self.memory_cache[key] = (saved_at, results_json)
+            while len(self.memory_cache) > self.max_memory_items:
+                self.memory_cache.popitem(last=False)  # least recently used
+
+        return json.loads(results_json)
+
+    def evict_disk_cache(self):
+        # temp files another thread is still writing aren't cache files yet
+        cache_files = sorted((cache_file for cache_file in os.scandir(self.cache_dir) if cache_file.name.endswith(".json")),
+                             key=lambda cache_file: cache_file.stat().st_mtime)
+        cache_size = sum(cache_file.stat().st_size for cache_file in cache_files)
+
+        for cache_file in cache_files:
+            expired = time.time() - cache_file.stat().st_mtime >= self.ttl
+            if not expired and cache_size <= self.max_disk_bytes:
+                break
+
+            cache_size -= cache_file.stat().st_size
+            os.remove(cache_file.path)
+
+
+def check_cached_search_locally():
+    from serpapi import GoogleSearch
+
+    # local stand-in for serpapi.com/search that counts how many requests reach it
+    requests_count = {"search": 0}
+
+    class SerpApiStubHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            requests_count["search"] += 1
+            body = json.dumps({"profiles": [{"name": "Stub Author", "author_id": "stub"}]}).encode()
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SerpApiStubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    def stub_search(api_key: str, query: str, cache_dir: str, ttl: int = 60):
+        search = GoogleSearch({"api_key": api_key, "engine": "google_scholar_profiles", "mauthors": query})
+        search.BACKEND = f"http://127.0.0.1:{server.server_port}"
+        return CachedSearch(search, cache_dir=cache_dir, ttl=ttl)
+
+    # a fresh folder every time, so a previous check can't turn the first miss into a disk hit
+    cache_dir = tempfile.mkdtemp(prefix="serpapi_cache_check_")
+    CachedSearch.memory_caches.clear()
+
+    first_results = stub_search("key-1", "biology", cache_dir).get_dict()         # miss
+    second_results = stub_search("key-2", "biology", cache_dir).get_dict()        # memory hit, api_key isn't a part of the key
+    other_cache_dir = tempfile.mkdtemp(prefix="serpapi_cache_check_")
+    stub_search("key-1", "biology", other_cache_dir).get_dict()                   # miss, another folder doesn't share the memory cache
+    CachedSearch.memory_caches.clear()
+    third_results = stub_search("key-1", "biology", cache_dir).get_dict()         # disk hit
+    stub_search("key-1", "physics", cache_dir).get_dict()                         # miss, another query
+
+    # the disk hit above is remembered with the file's mtime: once the file is older than ttl, memory doesn't serve it either
+    cache_path = os.path.join(cache_dir, f"{stub_search('key-1', 'biology', cache_dir).cache_key()}.json")
+    os.utime(cache_path, (time.time() - 120, time.time() - 120))
+    CachedSearch.memory_caches.clear()
+    stub_search("key-1", "biology", cache_dir, ttl=200).get_dict()                # disk hit, 120s old file
+    stub_search("key-1", "biology", cache_dir, ttl=100).get_dict()                # miss, memory entry is 120s old too
+
+    server.shutdown()
+    # only finished cache files are left, no temp files from the writes
+    cache_file_names = os.listdir(cache_dir) + os.listdir(other_cache_dir)
+    shutil.rmtree(cache_dir)
+    shutil.rmtree(other_cache_dir)
+
+    assert first_results == second_results == third_results
+    assert requests_count["search"] == 4
+    assert all(file_name.endswith(".json") for file_name in cache_file_names)
+    print(f"CachedSearch works against the local stub: {CachedSearch.stats}")
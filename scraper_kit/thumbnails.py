@@ -0,0 +1,95 @@
+"""
+Base64 thumbnails that Google SERPs set from inline scripts: indexed by image id in one pass over the scripts,
+and optionally written to files straight from the escaped script text.
+"""
+
+import re, os, base64, binascii, hashlib
+
+
+# thumbnails are set by inline scripts: (function(){var s='data:image/jpeg;base64,\x2F9j\x2F4AAQ...';var ii=['dimg_1'];_setImagesSrc(ii,s);})();
+INLINE_THUMBNAIL = re.compile(r"\bs='([^']+)';(?:\s?var\s?ii=\[([^\]]*)\];)?")
+INLINE_THUMBNAIL_IDS = re.compile(r"'([^']+)'")
+
+# \x2F -> /, \x3d -> = on the escaped bytes
+ESCAPED_BYTE = re.compile(rb"\\x([0-9a-fA-F]{2})")
+
+
+class ThumbnailStore:
+    """
+    Writes base64 thumbnails to content-addressed files: <folder>/<blake2b of the image bytes>.<extension>
+    Results keep only the file path instead of the whole base64 string, and the same image is written once.
+    """
+
+    def __init__(self, folder: str = "thumbnails"):
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+
+    def save(self, escaped: str):
+        """
+        data:image/jpeg;base64,\\x2F9j\\x2F4AAQ... as it is in the script -> thumbnails/3f0c...e1.jpeg
+        Regular URLs and data URIs that aren't base64 are only unescaped, broken base64 becomes None.
+        """
+
+        if not escaped or not escaped.startswith("data:image/") or ";base64," not in escaped:
+            return ThumbnailIndex.unescape(escaped) if escaped else escaped
+
+        try:
+            data = escaped.encode("ascii")
+            header_end = data.index(b",")
+
+            # the base64 part is unescaped and decoded right from the script bytes,
+            # the unescaped data URI string is never built
+            image = base64.b64decode(ESCAPED_BYTE.sub(lambda match: bytes((int(match.group(1), 16),)), memoryview(data)[header_end + 1:]))
+        except (UnicodeEncodeError, binascii.Error):
+            return None
+
+        extension = escaped[len("data:image/"):header_end].split(";")[0]
+        path = os.path.join(self.folder, f"{hashlib.blake2b(image, digest_size=16).hexdigest()}.{extension}")
+
+        if not os.path.exists(path):
+            with open(path, "wb") as image_file:
+                image_file.write(image)
+
+        return path
+
+
+class ThumbnailIndex:
+    """
+    Scans the inline scripts once into id -> escaped thumbnail, instead of running a new regex
+    over every script for each result. Thumbnails are unescaped, or written to `thumbnail_store`, only when they are looked up.
+    """
+
+    def __init__(self, script_texts: list[str], thumbnail_store: ThumbnailStore = None):
+        self.thumbnail_store = thumbnail_store
+        self.escaped = []  # document order, for results that aren't linked by id
+        self.escaped_by_id = {}
+
+        for script_text in script_texts:
+            for thumbnail, ids in INLINE_THUMBNAIL.findall(script_text):
+                self.escaped.append(thumbnail)
+                for _id in INLINE_THUMBNAIL_IDS.findall(ids):
+                    # a later _setImagesSrc() for the same id replaces the image in the browser as well
+                    self.escaped_by_id[_id] = thumbnail
+
+    @staticmethod
+    def unescape(thumbnail: str) -> str:
+        # \x2F -> /, \x3d -> =
+        # one pass is enough on the raw script text, the double decode was only needed on str(list_of_scripts)
+        return thumbnail.encode("ascii").decode("unicode-escape")
+
+    def decode(self, escaped: str):
+        if escaped is None:
+            return None
+        return self.thumbnail_store.save(escaped) if self.thumbnail_store else self.unescape(escaped)
+
+    def get(self, _id: str):
+        return self.decode(self.escaped_by_id.get(_id))
+
+    def __iter__(self):
+        return map(self.decode, self.escaped)
+
+
+def fake_escaped_thumbnail(index: int) -> str:
+    # ~2 KB of valid base64, escaped the way Google inlines it: / -> \x2F, = -> \x3d
+    encoded = base64.b64encode(bytes((index + byte) % 256 for byte in range(1535))).decode()
+    return encoded.replace("/", "\\x2F").replace("=", "\\x3d")